@@ -8,37 +8,282 @@ calculate performance metrics, and suggest tuning improvements.
 Usage:
     python analyze_bot_logs.py <path_to_qconsole.log>
     python analyze_bot_logs.py c:\\reaperai\\launch\\quake-spasm\\qconsole.log
+    python analyze_bot_logs.py qconsole.log --incremental   # Only lines added since last run
+    python analyze_bot_logs.py qconsole.log --follow        # Tail the log live during a match
+    python analyze_bot_logs.py logs/ "server*/qconsole.log" # Many logs, one combined report
+    python analyze_bot_logs.py qconsole.log --jobs 8        # Split one huge log across 8 cores
+    python analyze_bot_logs.py qconsole.log --metrics m.json --profile run.pstats
+    python analyze_bot_logs.py qconsole.log --no-cache      # Parse even if the log is unchanged
 """
 
+import argparse
+import contextlib
+import glob
+import heapq
+import io
+import os
 import re
 import sys
+import time
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import parse_cache
+import tool_metrics
+from log_reader import IncrementalLogReader, MIN_RANGE_SIZE, map_log, split_line_ranges
+
+# Seconds between live reports in --follow mode
+FOLLOW_REPORT_INTERVAL = 60.0
+
+# Parse cache entry kind; bump when parsing or BotSummary fields change
+SUMMARY_CACHE_KIND = "bots-1"
+
+# Report feature extraction
+SCORE_PATTERN = re.compile(r'score=([\d.]+)')
+GOAL_CLASS_PATTERN = re.compile(r'([^\s(]+)')
+
+# Fewer distinct goals than this is reported as low goal diversity
+GOAL_DIVERSITY_THRESHOLD = 5
+
+
+@dataclass
+class BotSummary:
+    """
+    Compact per-bot totals behind every figure in the report.
+
+    Every event updates the totals as it is parsed, so memory stays
+    O(bots x categories) however long the log is. Summaries of consecutive
+    stretches of log (whole files, or chunks of one file) merge into the
+    summary of their concatenation, so logs can be parsed independently and
+    reduced afterwards.
+    """
+    targets: int = 0
+    goals: int = 0
+    deaths: int = 0
+    target_switches: int = 0
+    goal_switches: int = 0
+    engagement_time: int = 0
+    idle_time: int = 0
+
+    # First/last values, for switches across a merge boundary
+    first_target: Optional[str] = None
+    last_target: Optional[str] = None
+    first_goal: Optional[str] = None
+    last_goal: Optional[str] = None
+
+    # Target patterns
+    none_visible: int = 0
+    score_count: int = 0
+    score_sum: float = 0.0
+    score_min: Optional[float] = None
+    score_max: Optional[float] = None
+
+    # Goal patterns; goal_values keeps only enough distinct goals to tell
+    # whether there are fewer than GOAL_DIVERSITY_THRESHOLD
+    goal_types: Counter = field(default_factory=Counter)
+    goal_values: Set[str] = field(default_factory=set)
+
+    # Tactical events
+    weapon_switches: int = 0
+    weapon_tactical: int = 0
+    weapon_gl_prevent: int = 0
+    hear_events: int = 0
+    combo_events: int = 0
+    combo_shaft: int = 0
+    combo_burst: int = 0
+    stuck_events: int = 0
+    unstuck_events: int = 0
+    unstuck_train: int = 0
+    unstuck_rocket: int = 0
+    unstuck_super: int = 0
+    hazard_events: int = 0
+    fixate_events: int = 0
+
+    def add_target(self, target_info: str):
+        """Record a target selection"""
+        self.targets += 1
+
+        # Count switches (when target changes)
+        if self.last_target is not None and self.last_target != target_info:
+            self.target_switches += 1
+        if self.first_target is None:
+            self.first_target = target_info
+        self.last_target = target_info
+
+        # Track engagement vs idle time
+        if target_info == "None visible":
+            self.idle_time += 1
+        else:
+            self.engagement_time += 1
+
+        if "None visible" in target_info:
+            self.none_visible += 1
+        score_match = SCORE_PATTERN.search(target_info)
+        if score_match:
+            self.add_score(float(score_match.group(1)))
+
+    def add_goal(self, goal_info: str):
+        """Record a goal selection"""
+        self.goals += 1
+
+        # Count goal switches
+        if self.last_goal is not None and self.last_goal != goal_info:
+            self.goal_switches += 1
+        if self.first_goal is None:
+            self.first_goal = goal_info
+        self.last_goal = goal_info
+
+        # Extract goal classname (e.g., "item_armor2"); interned, as the
+        # same few dozen classnames repeat for the whole match
+        classname_match = GOAL_CLASS_PATTERN.match(goal_info)
+        if classname_match:
+            self.goal_types[sys.intern(classname_match.group(1))] += 1
+
+        if len(self.goal_values) < GOAL_DIVERSITY_THRESHOLD:
+            self.goal_values.add(goal_info)
+
+    def add_weapon_switch(self, info: str):
+        self.weapon_switches += 1
+        if 'tactical' in info:
+            self.weapon_tactical += 1
+        if 'GL-suicide-prevent' in info:
+            self.weapon_gl_prevent += 1
+
+    def add_combo(self, info: str):
+        self.combo_events += 1
+        if 'shaft-combo' in info or 'LG' in info:
+            self.combo_shaft += 1
+        if 'burst-combo' in info or 'SSG' in info:
+            self.combo_burst += 1
+
+    def add_unstuck(self, info: str):
+        self.unstuck_events += 1
+        if 'Train surf' in info:
+            self.unstuck_train += 1
+        if 'Rocket jump' in info:
+            self.unstuck_rocket += 1
+        if 'Super jump' in info:
+            self.unstuck_super += 1
+
+    def add_score(self, score: float):
+        self.score_count += 1
+        self.score_sum += score
+        if self.score_min is None or score < self.score_min:
+            self.score_min = score
+        if self.score_max is None or score > self.score_max:
+            self.score_max = score
+
+    def merge(self, later: 'BotSummary'):
+        """Fold in the summary of the log stretch that directly follows this one"""
+        # A switch happens across the boundary if the values differ there
+        if self.last_target is not None and later.first_target is not None \
+                and self.last_target != later.first_target:
+            self.target_switches += 1
+        if self.last_goal is not None and later.first_goal is not None \
+                and self.last_goal != later.first_goal:
+            self.goal_switches += 1
+
+        if self.first_target is None:
+            self.first_target = later.first_target
+        if later.last_target is not None:
+            self.last_target = later.last_target
+        if self.first_goal is None:
+            self.first_goal = later.first_goal
+        if later.last_goal is not None:
+            self.last_goal = later.last_goal
+
+        for name in ('targets', 'goals', 'deaths', 'target_switches', 'goal_switches',
+                     'engagement_time', 'idle_time', 'none_visible', 'score_count', 'score_sum',
+                     'weapon_switches', 'weapon_tactical', 'weapon_gl_prevent', 'hear_events',
+                     'combo_events', 'combo_shaft', 'combo_burst', 'stuck_events',
+                     'unstuck_events', 'unstuck_train', 'unstuck_rocket', 'unstuck_super',
+                     'hazard_events', 'fixate_events'):
+            setattr(self, name, getattr(self, name) + getattr(later, name))
+
+        if later.score_count:
+            if self.score_min is None or later.score_min < self.score_min:
+                self.score_min = later.score_min
+            if self.score_max is None or later.score_max > self.score_max:
+                self.score_max = later.score_max
+
+        self.goal_types.update(later.goal_types)
+        for goal in later.goal_values:
+            if len(self.goal_values) >= GOAL_DIVERSITY_THRESHOLD:
+                break
+            self.goal_values.add(goal)
+
+    def to_record(self) -> dict:
+        """Field values as plain types, for the parse cache"""
+        record = {f.name: getattr(self, f.name) for f in fields(self)}
+        record['goal_types'] = dict(self.goal_types)
+        record['goal_values'] = list(self.goal_values)
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict) -> 'BotSummary':
+        summary = cls(**record)
+        summary.goal_types = Counter(summary.goal_types)
+        summary.goal_values = set(summary.goal_values)
+        return summary
+
+
+def merge_summaries(merged: Dict[str, BotSummary], summaries: Dict[str, BotSummary],
+                    unseen_deaths: Dict[str, int]):
+    """
+    Reduce step: fold one log stretch's results into the running totals.
+
+    unseen_deaths are deaths of bots that had not logged an event yet in
+    that stretch; they count only if the bot is known from earlier stretches
+    (the same rule parse_line applies within one log).
+    """
+    for bot_name, deaths in unseen_deaths.items():
+        if bot_name in merged:
+            merged[bot_name].deaths += deaths
+
+    for bot_name, summary in summaries.items():
+        if bot_name in merged:
+            merged[bot_name].merge(summary)
+        else:
+            merged[bot_name] = summary
+
+
+def summaries_to_record(summaries: Dict[str, BotSummary], unseen_deaths: Dict[str, int]) -> tuple:
+    return {name: summary.to_record() for name, summary in summaries.items()}, dict(unseen_deaths)
+
+
+def summaries_from_record(record: tuple) -> Tuple[Dict[str, BotSummary], Dict[str, int]]:
+    summaries, unseen_deaths = record
+    return {name: BotSummary.from_record(values) for name, values in summaries.items()}, unseen_deaths
+
+
+def summarize_log(log_path, start: int = 0, end: Optional[int] = None
+                  ) -> Tuple[Dict[str, BotSummary], Dict[str, int], Dict[str, int]]:
+    """Worker: parse a log (or its bytes [start, end)) and return per-bot
+    summaries, unseen deaths and the worker's counters"""
+    analyzer = BotLogAnalyzer(log_path)
+    # Fresh counters per task (a worker process runs several)
+    with tool_metrics.session("analyze_bot_logs") as metrics, map_log(analyzer.log_path) as data:
+        analyzer.parse_mapped(data, start, end)
+    return analyzer.summarize(), dict(analyzer.unseen_deaths), metrics.counters
 
 
 class BotLogAnalyzer:
     def __init__(self, log_path):
         self.log_path = Path(log_path)
-        self.bots = defaultdict(lambda: {
-            'targets': [],
-            'goals': [],
-            'deaths': 0,
-            'kills': 0,
-            'target_switches': 0,
-            'goal_switches': 0,
-            'engagement_time': 0,
-            'idle_time': 0,
-            'first_timestamp': None,
-            'last_timestamp': None,
-            'weapon_switches': [],  # NEW: Weapon switch events
-            'hear_events': [],      # NEW: Hearing activations
-            'combo_events': [],     # NEW: Juggler combos
-            'stuck_events': [],     # NEW: Stuck detections
-            'unstuck_events': [],   # NEW: Unstuck methods
-            'hazard_events': [],    # NEW: Hazard avoidance events
-            'fixate_events': []     # NEW: Goal fixation avoids
-        })
+        self.bots: Dict[str, BotSummary] = defaultdict(BotSummary)
+
+        # Deaths of bots with no events yet (only used when merging logs)
+        self.unseen_deaths = Counter()
+
+        # Combined summaries from parse_files(); the report uses these when set
+        self.merged_summaries = None
+
+        # parse_cache.ParseCache for whole-log parses (None: always parse)
+        self.cache = None
 
         # Track overall match timing
         self.first_decision_time = None
@@ -46,132 +291,310 @@ class BotLogAnalyzer:
         self.match_duration_seconds = 0
 
         # Regex patterns for log parsing
-        self.target_pattern = re.compile(r'\[(.+?)\] TARGET: (.+)')
-        self.goal_pattern = re.compile(r'\[(.+?)\] GOAL: (.+)')
         self.death_pattern = re.compile(r'(.+?) died')
         self.kill_pattern = re.compile(r'(.+?) was killed by (.+)')
 
-        # NEW: Phase 1 enhanced logging patterns
-        self.weapon_pattern = re.compile(r'\[(.+?)\] WEAPON: (.+)')
-        self.hear_pattern = re.compile(r'\[(.+?)\] HEAR: (.+)')
-        self.combo_pattern = re.compile(r'\[(.+?)\] COMBO: (.+)')
-        self.stuck_pattern = re.compile(r'\[(.+?)\] STUCK: (.+)')
-        self.unstuck_pattern = re.compile(r'\[(.+?)\] UNSTUCK: (.+)')
-        self.hazard_pattern = re.compile(r'\[(.+?)\] HAZARD: (.+)')
-        self.fixate_pattern = re.compile(r'\[(.+?)\] FIXATE: (.+)')
+        # Tagged bot events ("[BotName] TAG: info") are routed through a single
+        # compiled alternation instead of one full-line scan per tag.
+        # Use register_event() to hook additional tags.
+        self.event_handlers = {}
+        self._event_pattern = None
+        self._bytes_event_pattern = None
+
+        self.register_event('TARGET', self._on_target)
+        self.register_event('GOAL', self._on_goal)
+
+        # NEW: Phase 1 enhanced logging events
+        self.register_event('WEAPON', lambda bot_name, info: self.bots[bot_name].add_weapon_switch(info))
+        self.register_event('HEAR', self._count('hear_events'))
+        self.register_event('COMBO', lambda bot_name, info: self.bots[bot_name].add_combo(info))
+        self.register_event('STUCK', self._count('stuck_events'))
+        self.register_event('UNSTUCK', lambda bot_name, info: self.bots[bot_name].add_unstuck(info))
+        self.register_event('HAZARD', self._count('hazard_events'))
+        self.register_event('FIXATE', self._count('fixate_events'))
+
+        # Event and death matches so far, for --metrics
+        self.regex_hits = 0
 
         # Timestamp pattern (if present in logs)
         # Quake logs don't have timestamps by default, so we'll estimate from decision count
         self.estimated_duration = True
 
-    def parse_log(self):
-        """Parse qconsole.log and extract bot decision data"""
+    def register_event(self, tag, handler):
+        """Register handler(bot_name, info) for '[BotName] TAG: info' log lines"""
+        self.event_handlers[tag] = handler
+        self._event_pattern = None  # Rebuilt on next parse
+        self._bytes_event_pattern = None
+
+    def _compile_event_pattern(self):
+        """Build one regex matching every registered event tag"""
+        # Longest tags first so a tag never shadows a longer one sharing its prefix
+        tags = sorted(self.event_handlers, key=len, reverse=True)
+        alternation = '|'.join(re.escape(tag) for tag in tags)
+        return re.compile(r'\[(.+?)\] (' + alternation + r'): (.+)')
+
+    def _compile_bytes_event_pattern(self):
+        """The event regex for a mapped log; '.' stops at '\\n', so it never spans lines"""
+        return re.compile(self._compile_event_pattern().pattern.encode('utf-8'))
+
+    def _count(self, field_name):
+        """Create a handler that counts an event in a per-bot summary field"""
+        def handler(bot_name, info):
+            bot = self.bots[bot_name]
+            setattr(bot, field_name, getattr(bot, field_name) + 1)
+        return handler
+
+    def _on_target(self, bot_name, target_info):
+        """Record a target selection"""
+        self.bots[bot_name].add_target(target_info)
+
+    def _on_goal(self, bot_name, goal_info):
+        """Record a goal selection"""
+        self.bots[bot_name].add_goal(goal_info)
+
+    def parse_line(self, line):
+        """Dispatch a single log line to its event handler"""
+        if self._event_pattern is None:
+            self._event_pattern = self._compile_event_pattern()
+
+        line = line.strip()
+
+        event_match = self._event_pattern.search(line)
+        if event_match:
+            self.regex_hits += 1
+            bot_name, tag, info = event_match.groups()
+            self.event_handlers[tag](bot_name, info)
+
+        # Parse deaths (cheap substring test before running the regex)
+        if ' died' in line:
+            self._on_death_line(line)
+
+    def _on_death_line(self, line):
+        """Count the death in a stripped line containing ' died'"""
+        death_match = self.death_pattern.search(line)
+        if death_match:
+            self.regex_hits += 1
+            bot_name = death_match.group(1)
+            if bot_name in self.bots:
+                self.bots[bot_name].deaths += 1
+            else:
+                self.unseen_deaths[bot_name] += 1
+
+    def parse_log(self, reader=None):
+        """Parse qconsole.log and extract bot decision data
+
+        With an IncrementalLogReader only the lines appended since its
+        checkpoint are parsed, and the checkpoint is advanced afterwards.
+        """
         print(f"[*] Parsing log file: {self.log_path}")
 
         if not self.log_path.exists():
             print(f"[ERROR] Log file not found: {self.log_path}")
             sys.exit(1)
 
-        with open(self.log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-
-                # Parse target selections
-                target_match = self.target_pattern.search(line)
-                if target_match:
-                    bot_name = target_match.group(1)
-                    target_info = target_match.group(2)
-                    self.bots[bot_name]['targets'].append(target_info)
-
-                    # Count switches (when target changes)
-                    if len(self.bots[bot_name]['targets']) > 1:
-                        prev_target = self.bots[bot_name]['targets'][-2]
-                        if prev_target != target_info:
-                            self.bots[bot_name]['target_switches'] += 1
-
-                    # Track engagement vs idle time
-                    if target_info == "None visible":
-                        self.bots[bot_name]['idle_time'] += 1
-                    else:
-                        self.bots[bot_name]['engagement_time'] += 1
-
-                # Parse goal selections
-                goal_match = self.goal_pattern.search(line)
-                if goal_match:
-                    bot_name = goal_match.group(1)
-                    goal_info = goal_match.group(2)
-                    self.bots[bot_name]['goals'].append(goal_info)
-
-                    # Count goal switches
-                    if len(self.bots[bot_name]['goals']) > 1:
-                        prev_goal = self.bots[bot_name]['goals'][-2]
-                        if prev_goal != goal_info:
-                            self.bots[bot_name]['goal_switches'] += 1
-
-                # Parse deaths
-                death_match = self.death_pattern.search(line)
-                if death_match:
-                    bot_name = death_match.group(1)
-                    if bot_name in self.bots:
-                        self.bots[bot_name]['deaths'] += 1
-
-                # Parse weapon switches (NEW)
-                weapon_match = self.weapon_pattern.search(line)
-                if weapon_match:
-                    bot_name = weapon_match.group(1)
-                    weapon_info = weapon_match.group(2)
-                    self.bots[bot_name]['weapon_switches'].append(weapon_info)
-
-                # Parse hearing events (NEW)
-                hear_match = self.hear_pattern.search(line)
-                if hear_match:
-                    bot_name = hear_match.group(1)
-                    hear_info = hear_match.group(2)
-                    self.bots[bot_name]['hear_events'].append(hear_info)
-
-                # Parse combo events (NEW)
-                combo_match = self.combo_pattern.search(line)
-                if combo_match:
-                    bot_name = combo_match.group(1)
-                    combo_info = combo_match.group(2)
-                    self.bots[bot_name]['combo_events'].append(combo_info)
-
-                # Parse stuck events (NEW)
-                stuck_match = self.stuck_pattern.search(line)
-                if stuck_match:
-                    bot_name = stuck_match.group(1)
-                    stuck_info = stuck_match.group(2)
-                    self.bots[bot_name]['stuck_events'].append(stuck_info)
-
-                # Parse unstuck events (NEW)
-                unstuck_match = self.unstuck_pattern.search(line)
-                if unstuck_match:
-                    bot_name = unstuck_match.group(1)
-                    unstuck_info = unstuck_match.group(2)
-                    self.bots[bot_name]['unstuck_events'].append(unstuck_info)
-
-                # Parse hazard events (NEW)
-                hazard_match = self.hazard_pattern.search(line)
-                if hazard_match:
-                    bot_name = hazard_match.group(1)
-                    hazard_info = hazard_match.group(2)
-                    self.bots[bot_name]['hazard_events'].append(hazard_info)
-
-                # Parse fixation events (NEW)
-                fixate_match = self.fixate_pattern.search(line)
-                if fixate_match:
-                    bot_name = fixate_match.group(1)
-                    fixate_info = fixate_match.group(2)
-                    self.bots[bot_name]['fixate_events'].append(fixate_info)
+        if reader is not None:
+            self.parse_lines(reader.lines())
+            if reader.rotated:
+                print("[*] Log was rotated or truncated - re-read from the start")
+            reader.save()
+        else:
+            cached = self.load_cached(self.log_path)
+            if cached is not None:
+                summaries, unseen_deaths = cached
+                self.bots.update(summaries)
+                self.unseen_deaths.update(unseen_deaths)
+            else:
+                with map_log(self.log_path) as data:
+                    self.parse_mapped(data)
+                self.store_cached(self.log_path, self.bots, self.unseen_deaths)
 
         print(f"[OK] Parsed data for {len(self.bots)} bots\n")
 
+    def load_cached(self, log_path) -> Optional[Tuple[Dict[str, BotSummary], Dict[str, int]]]:
+        """Summaries and unseen deaths of an unchanged log from the parse cache, or None"""
+        if self.cache is None:
+            return None
+        record = self.cache.load(log_path, SUMMARY_CACHE_KIND)
+        if record is None:
+            return None
+        print(f"[*] Unchanged since last run, using cached parse: {log_path}")
+        return summaries_from_record(record)
+
+    def store_cached(self, log_path, summaries: Dict[str, BotSummary], unseen_deaths: Dict[str, int]):
+        if self.cache is not None:
+            self.cache.store(log_path, SUMMARY_CACHE_KIND, summaries_to_record(summaries, unseen_deaths))
+
+    def parse_lines(self, lines):
+        """Feed an iterable of log lines through the dispatcher"""
+        scanned = 0
+        hits = self.regex_hits
+        for scanned, line in enumerate(lines, 1):
+            self.parse_line(line)
+        tool_metrics.count('lines_scanned', scanned)
+        tool_metrics.count('regex_hits', self.regex_hits - hits)
+
+    def parse_mapped(self, data, start: int = 0, end: Optional[int] = None):
+        """Parse a memory-mapped log (or its bytes [start, end), on line boundaries)
+
+        The event regex runs over the mapping as bytes and only the bot name
+        and info of each match are decoded; death lines are found with a
+        plain search for ' died'. Both are handled in log order, the event
+        first on a line holding both, so the summaries equal parse_lines().
+        """
+        if end is None:
+            end = len(data)
+        if self._bytes_event_pattern is None:
+            self._bytes_event_pattern = self._compile_bytes_event_pattern()
+
+        # (end of line, 0 = event / 1 = death, match or line)
+        events = ((match.end(), 0, match) for match in self._bytes_event_pattern.finditer(data, start, end))
+        deaths = ((line_end, 1, line) for line_end, line in self._death_lines(data, start, end))
+
+        hits = self.regex_hits
+        for _, kind, item in heapq.merge(events, deaths):
+            if kind:
+                self._on_death_line(item)
+                continue
+            # parse_line() matches the stripped line: info must survive the strip
+            info = item.group(3).decode('utf-8', errors='ignore').strip()
+            if info:
+                self.regex_hits += 1
+                self.event_handlers[item.group(2).decode('utf-8')](
+                    item.group(1).decode('utf-8', errors='ignore'), info)
+        tool_metrics.count('regex_hits', self.regex_hits - hits)
+
+    @staticmethod
+    def _death_lines(data, start: int, end: int) -> Iterator[Tuple[int, str]]:
+        """(end of line, stripped line) of each line of data[start:end] containing ' died'"""
+        pos = start
+        while True:
+            hit = data.find(b' died', pos, end)
+            if hit == -1:
+                return
+            line_start = max(start, data.rfind(b'\n', start, hit) + 1)
+            line_end = data.find(b'\n', hit, end)
+            if line_end == -1:
+                line_end = end
+            line = data[line_start:line_end].decode('utf-8', errors='ignore').strip()
+            if ' died' in line:
+                yield line_end, line
+            pos = line_end + 1
+
+    def parse_files(self, log_paths: List[Path], jobs: Optional[int] = None):
+        """Parse many logs in a process pool and reduce them into one report
+
+        Each worker returns compact per-bot summaries; they are merged in
+        the order given, so the report equals parsing the logs back to back.
+        Logs found in the parse cache are not handed to a worker at all.
+        """
+        print(f"[*] Parsing {len(log_paths)} log files with {jobs or 'all available'} workers")
+
+        cached = {}
+        for log_path in log_paths:
+            record = self.load_cached(log_path) if self.cache is not None else None
+            if record is not None:
+                cached[log_path] = record
+        to_parse = [log_path for log_path in log_paths if log_path not in cached]
+
+        merged = {}
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = pool.map(summarize_log, to_parse)
+            for log_path in log_paths:
+                if log_path in cached:
+                    summaries, unseen_deaths = cached[log_path]
+                else:
+                    summaries, unseen_deaths, counters = next(results)
+                    count_worker(counters)
+                    self.store_cached(log_path, summaries, unseen_deaths)
+                merge_summaries(merged, summaries, unseen_deaths)
+                print(f"    {log_path}: {len(summaries)} bots")
+
+        self.merged_summaries = merged
+        print(f"[OK] Parsed data for {len(merged)} bots\n")
+
+    def parse_chunked(self, jobs: Optional[int] = None, min_size: int = MIN_RANGE_SIZE):
+        """Parse one log as newline-aligned byte ranges on separate cores
+
+        Each range is summarised independently; merge_summaries() stitches
+        switches and deaths across the range boundaries, so the report is
+        the same as for parse_log().
+        """
+        print(f"[*] Parsing log file: {self.log_path}")
+
+        if not self.log_path.exists():
+            print(f"[ERROR] Log file not found: {self.log_path}")
+            sys.exit(1)
+
+        cached = self.load_cached(self.log_path)
+        if cached is not None:
+            self.merged_summaries = cached[0]
+            print(f"[OK] Parsed data for {len(self.merged_summaries)} bots\n")
+            return
+
+        ranges = split_line_ranges(self.log_path, jobs or os.cpu_count() or 1, min_size)
+        print(f"[*] Split into {len(ranges)} chunks")
+
+        merged = {}
+        # Deaths before a bot's first event anywhere in the file, kept for
+        # the cache entry so it can also serve a multi-log parse_files()
+        file_unseen = Counter()
+        with ProcessPoolExecutor(max_workers=min(len(ranges), jobs or len(ranges))) as pool:
+            results = pool.map(summarize_log, [self.log_path] * len(ranges),
+                               [start for start, _ in ranges], [end for _, end in ranges])
+            for summaries, unseen_deaths, counters in results:
+                for bot_name, deaths in unseen_deaths.items():
+                    if bot_name not in merged:
+                        file_unseen[bot_name] += deaths
+                merge_summaries(merged, summaries, unseen_deaths)
+                count_worker(counters)
+
+        self.store_cached(self.log_path, merged, file_unseen)
+        self.merged_summaries = merged
+        print(f"[OK] Parsed data for {len(merged)} bots\n")
+
+    def summarize(self) -> Dict[str, BotSummary]:
+        """Per-bot summaries of the events parsed so far"""
+        return dict(self.bots)
+
+    def bot_summaries(self) -> Dict[str, BotSummary]:
+        """Summaries the report is built from"""
+        if self.merged_summaries is not None:
+            return self.merged_summaries
+        return self.bots
+
+    def follow_log(self, reader, interval=FOLLOW_REPORT_INTERVAL):
+        """Tail the log live, printing a fresh summary every interval seconds"""
+        print(f"[*] Following log file: {self.log_path} (Ctrl+C to stop)")
+
+        last_report = time.monotonic()
+        pending = False
+        try:
+            for line in reader.follow():
+                if line is None:
+                    reader.save()  # Log idle - checkpoint what we have
+                    continue
+
+                self.parse_line(line)
+                pending = True
+
+                if pending and time.monotonic() - last_report >= interval:
+                    self.print_summary()
+                    last_report = time.monotonic()
+                    pending = False
+        except KeyboardInterrupt:
+            reader.save()
+            print("\n[*] Stopped following log")
+
+        if self.bots:
+            self.print_summary()
+
     def calculate_statistics(self):
         """Calculate aggregate statistics across all bots"""
-        total_decisions = sum(len(bot['targets']) + len(bot['goals']) for bot in self.bots.values())
-        total_engagement = sum(bot['engagement_time'] for bot in self.bots.values())
-        total_idle = sum(bot['idle_time'] for bot in self.bots.values())
-        total_switches = sum(bot['target_switches'] for bot in self.bots.values())
+        bots = self.bot_summaries()
+        total_decisions = sum(bot.targets + bot.goals for bot in bots.values())
+        total_engagement = sum(bot.engagement_time for bot in bots.values())
+        total_idle = sum(bot.idle_time for bot in bots.values())
+        total_switches = sum(bot.target_switches for bot in bots.values())
 
         engagement_pct = (total_engagement / (total_engagement + total_idle) * 100) if (total_engagement + total_idle) > 0 else 0
 
@@ -189,11 +612,11 @@ class BotLogAnalyzer:
             switches_per_minute = (total_switches / self.match_duration_seconds) * 60
             switches_per_second = total_switches / self.match_duration_seconds
 
-        avg_switches_per_bot = total_switches / len(self.bots) if self.bots else 0
+        avg_switches_per_bot = total_switches / len(bots) if bots else 0
 
         # Calculate per-bot switching rate
         avg_switches_per_bot_per_min = 0
-        if self.match_duration_seconds > 0 and len(self.bots) > 0:
+        if self.match_duration_seconds > 0 and len(bots) > 0:
             avg_switches_per_bot_per_min = (avg_switches_per_bot / self.match_duration_seconds) * 60
 
         return {
@@ -210,6 +633,7 @@ class BotLogAnalyzer:
 
     def print_summary(self):
         """Print analysis summary"""
+        bots = self.bot_summaries()
         print("=" * 70)
         print("BOT DECISION LOG ANALYSIS - Modern Reaper Enhancements")
         print("=" * 70)
@@ -234,12 +658,12 @@ class BotLogAnalyzer:
         print(f"{'Bot Name':<15} {'Targets':<10} {'Goals':<10} {'Switches':<10} {'Engage%':<10}")
         print("-" * 70)
 
-        for bot_name, data in sorted(self.bots.items()):
-            total_time = data['engagement_time'] + data['idle_time']
-            engage_pct = (data['engagement_time'] / total_time * 100) if total_time > 0 else 0
+        for bot_name, data in sorted(bots.items()):
+            total_time = data.engagement_time + data.idle_time
+            engage_pct = (data.engagement_time / total_time * 100) if total_time > 0 else 0
 
-            print(f"{bot_name:<15} {len(data['targets']):<10} {len(data['goals']):<10} "
-                  f"{data['target_switches']:<10} {engage_pct:<10.1f}")
+            print(f"{bot_name:<15} {data.targets:<10} {data.goals:<10} "
+                  f"{data.target_switches:<10} {engage_pct:<10.1f}")
 
         self.analyze_target_patterns()
         self.analyze_goal_patterns()
@@ -250,70 +674,62 @@ class BotLogAnalyzer:
         """Analyze target selection patterns"""
         print(f"\nTARGET SELECTION PATTERNS:")
 
-        all_targets = []
-        for bot_data in self.bots.values():
-            all_targets.extend(bot_data['targets'])
+        bots = self.bot_summaries().values()
+        total_targets = sum(bot.targets for bot in bots)
 
-        if not all_targets:
+        if not total_targets:
             print("  No target data found.")
             return
 
         # Count "None visible" frequency
-        none_visible_count = sum(1 for t in all_targets if "None visible" in t)
-        combat_count = len(all_targets) - none_visible_count
-
-        print(f"  Combat engagements: {combat_count} ({combat_count/len(all_targets)*100:.1f}%)")
-        print(f"  Idle/searching: {none_visible_count} ({none_visible_count/len(all_targets)*100:.1f}%)")
-
-        # Extract target scores
-        scores = []
-        for target in all_targets:
-            score_match = re.search(r'score=([\d.]+)', target)
-            if score_match:
-                scores.append(float(score_match.group(1)))
-
-        if scores:
-            avg_score = sum(scores) / len(scores)
-            max_score = max(scores)
-            min_score = min(scores)
+        none_visible_count = sum(bot.none_visible for bot in bots)
+        combat_count = total_targets - none_visible_count
+
+        print(f"  Combat engagements: {combat_count} ({combat_count/total_targets*100:.1f}%)")
+        print(f"  Idle/searching: {none_visible_count} ({none_visible_count/total_targets*100:.1f}%)")
+
+        # Target scores
+        score_count = sum(bot.score_count for bot in bots)
+        if score_count:
+            avg_score = sum(bot.score_sum for bot in bots) / score_count
+            max_score = max(bot.score_max for bot in bots if bot.score_count)
+            min_score = min(bot.score_min for bot in bots if bot.score_count)
             print(f"  Target scores: avg={avg_score:.1f}, max={max_score:.1f}, min={min_score:.1f}")
 
     def analyze_goal_patterns(self):
         """Analyze goal selection patterns"""
         print(f"\nGOAL SELECTION PATTERNS:")
 
-        all_goals = []
-        for bot_data in self.bots.values():
-            all_goals.extend(bot_data['goals'])
+        bots = self.bot_summaries().values()
+        total_goals = sum(bot.goals for bot in bots)
 
-        if not all_goals:
+        if not total_goals:
             print("  No goal data found.")
             return
 
-        # Count goal types
+        # Count goal types (insertion order matches a scan of all goals)
         goal_types = Counter()
-        for goal in all_goals:
-            # Extract goal classname (e.g., "item_armor2")
-            classname_match = re.match(r'([^\s(]+)', goal)
-            if classname_match:
-                goal_types[classname_match.group(1)] += 1
+        for bot in bots:
+            goal_types.update(bot.goal_types)
 
         print(f"  Most sought goals:")
         for goal_type, count in goal_types.most_common(5):
-            print(f"    {goal_type}: {count} times ({count/len(all_goals)*100:.1f}%)")
+            print(f"    {goal_type}: {count} times ({count/total_goals*100:.1f}%)")
 
     def analyze_tactical_events(self):
         """Analyze Phase 1 enhanced logging events (weapon switches, combos, hearing, stuck)"""
         print(f"\nTACTICAL EVENTS ANALYSIS:")
 
+        bots = self.bot_summaries()
+
         # Aggregate counts across all bots
-        total_weapon_switches = sum(len(bot['weapon_switches']) for bot in self.bots.values())
-        total_hear_events = sum(len(bot['hear_events']) for bot in self.bots.values())
-        total_combo_events = sum(len(bot['combo_events']) for bot in self.bots.values())
-        total_stuck_events = sum(len(bot['stuck_events']) for bot in self.bots.values())
-        total_unstuck_events = sum(len(bot['unstuck_events']) for bot in self.bots.values())
-        total_hazard_events = sum(len(bot['hazard_events']) for bot in self.bots.values())
-        total_fixate_events = sum(len(bot['fixate_events']) for bot in self.bots.values())
+        total_weapon_switches = sum(bot.weapon_switches for bot in bots.values())
+        total_hear_events = sum(bot.hear_events for bot in bots.values())
+        total_combo_events = sum(bot.combo_events for bot in bots.values())
+        total_stuck_events = sum(bot.stuck_events for bot in bots.values())
+        total_unstuck_events = sum(bot.unstuck_events for bot in bots.values())
+        total_hazard_events = sum(bot.hazard_events for bot in bots.values())
+        total_fixate_events = sum(bot.fixate_events for bot in bots.values())
 
         # Overall summary
         print(f"  Weapon switches (tactical): {total_weapon_switches}")
@@ -329,25 +745,17 @@ class BotLogAnalyzer:
             print(f"\n  PER-BOT TACTICAL BREAKDOWN:")
             print(f"  {'Bot Name':<15} {'Weapons':<10} {'Combos':<10} {'Hears':<10} {'Stuck':<10} {'Hazards':<10} {'Fixate':<10}")
             print("  " + "-" * 83)
-            for bot_name, data in sorted(self.bots.items()):
-                weapon_count = len(data['weapon_switches'])
-                combo_count = len(data['combo_events'])
-                hear_count = len(data['hear_events'])
-                stuck_count = len(data['stuck_events'])
-                hazard_count = len(data['hazard_events'])
-                fixate_count = len(data['fixate_events'])
-                print(f"  {bot_name:<15} {weapon_count:<10} {combo_count:<10} {hear_count:<10} {stuck_count:<10} {hazard_count:<10} {fixate_count:<10}")
+            for bot_name, data in sorted(bots.items()):
+                print(f"  {bot_name:<15} {data.weapon_switches:<10} {data.combo_events:<10} {data.hear_events:<10} "
+                      f"{data.stuck_events:<10} {data.hazard_events:<10} {data.fixate_events:<10}")
 
         # Analyze weapon switch patterns
         if total_weapon_switches > 0:
             print(f"\n  WEAPON SWITCH RATIONALE:")
-            all_weapon_switches = []
-            for bot_data in self.bots.values():
-                all_weapon_switches.extend(bot_data['weapon_switches'])
 
             # Count switch reasons
-            tactical_count = sum(1 for w in all_weapon_switches if 'tactical' in w)
-            gl_suicide_prevent_count = sum(1 for w in all_weapon_switches if 'GL-suicide-prevent' in w)
+            tactical_count = sum(bot.weapon_tactical for bot in bots.values())
+            gl_suicide_prevent_count = sum(bot.weapon_gl_prevent for bot in bots.values())
 
             if tactical_count > 0:
                 print(f"    Tactical switches: {tactical_count} ({tactical_count/total_weapon_switches*100:.1f}%)")
@@ -357,12 +765,9 @@ class BotLogAnalyzer:
         # Analyze combo patterns
         if total_combo_events > 0:
             print(f"\n  JUGGLER COMBO BREAKDOWN:")
-            all_combos = []
-            for bot_data in self.bots.values():
-                all_combos.extend(bot_data['combo_events'])
 
-            shaft_combos = sum(1 for c in all_combos if 'shaft-combo' in c or 'LG' in c)
-            burst_combos = sum(1 for c in all_combos if 'burst-combo' in c or 'SSG' in c)
+            shaft_combos = sum(bot.combo_shaft for bot in bots.values())
+            burst_combos = sum(bot.combo_burst for bot in bots.values())
 
             print(f"    RL -> LG (shaft-combo): {shaft_combos} ({shaft_combos/total_combo_events*100:.1f}%)")
             print(f"    RL -> SSG (burst-combo): {burst_combos} ({burst_combos/total_combo_events*100:.1f}%)")
@@ -370,13 +775,10 @@ class BotLogAnalyzer:
         # Analyze unstuck methods
         if total_unstuck_events > 0:
             print(f"\n  UNSTUCK METHODS:")
-            all_unstuck = []
-            for bot_data in self.bots.values():
-                all_unstuck.extend(bot_data['unstuck_events'])
 
-            train_surf = sum(1 for u in all_unstuck if 'Train surf' in u)
-            rocket_jump = sum(1 for u in all_unstuck if 'Rocket jump' in u)
-            super_jump = sum(1 for u in all_unstuck if 'Super jump' in u)
+            train_surf = sum(bot.unstuck_train for bot in bots.values())
+            rocket_jump = sum(bot.unstuck_rocket for bot in bots.values())
+            super_jump = sum(bot.unstuck_super for bot in bots.values())
 
             if train_surf > 0:
                 print(f"    Train surf escape: {train_surf} ({train_surf/total_unstuck_events*100:.1f}%)")
@@ -430,12 +832,8 @@ class BotLogAnalyzer:
             print(f"      This is healthy for FFA dynamics!")
 
         # Check goal diversity
-        all_goals = []
-        for bot_data in self.bots.values():
-            all_goals.extend(bot_data['goals'])
-
-        unique_goals = len(set(all_goals))
-        if unique_goals < 5:
+        unique_goals = len(set().union(*(bot.goal_values for bot in self.bot_summaries().values())))
+        if unique_goals < GOAL_DIVERSITY_THRESHOLD:
             print(f"  [!] Low goal diversity ({unique_goals} unique goals)")
             print(f"      -> Consider: Increase weight for underutilized items")
             print(f"      -> Consider: Add randomization to goal scoring")
@@ -443,16 +841,137 @@ class BotLogAnalyzer:
         print(f"\n[*] Analysis complete! Use these insights to tune bot behavior.")
 
 
+def count_worker(counters: Dict[str, int]):
+    """Add a worker's counters to this run's metrics"""
+    for name, amount in counters.items():
+        tool_metrics.count(name, amount)
+
+
+def check_chunked(log_path, jobs: Optional[int] = None) -> bool:
+    """Compare the chunked report for a log against the sequential one
+
+    Chunks are not held to MIN_RANGE_SIZE here, so even a small log is
+    split and every boundary case in it is exercised.
+    """
+    reports = []
+    for chunked in (False, True):
+        analyzer = BotLogAnalyzer(log_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            if chunked:
+                analyzer.parse_chunked(jobs or 8, min_size=1)
+            else:
+                analyzer.parse_log()
+        with contextlib.redirect_stdout(io.StringIO()) as report:
+            analyzer.print_summary()
+        reports.append(report.getvalue())
+
+    if reports[0] == reports[1]:
+        print(f"[OK] Chunked report matches sequential report for {log_path}")
+        return True
+    print(f"[ERROR] Chunked report differs from sequential report for {log_path}")
+    return False
+
+
+def expand_log_paths(patterns: List[str]) -> List[Path]:
+    """Resolve files, directories (every *.log below) and glob patterns, keeping order"""
+    paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            paths.extend(sorted(path.rglob('*.log')))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(Path(p) for p in glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(path)
+
+    # Drop repeats (a file matched by two patterns is parsed once)
+    return list(dict.fromkeys(paths))
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python analyze_bot_logs.py <path_to_qconsole.log>")
-        print("Example: python analyze_bot_logs.py c:\\reaperai\\launch\\quake-spasm\\qconsole.log")
+    parser = argparse.ArgumentParser(
+        description="Analyze bot decision logs from qconsole.log",
+        epilog="Example: python analyze_bot_logs.py c:\\reaperai\\launch\\quake-spasm\\qconsole.log")
+    parser.add_argument("log_path", nargs='+',
+                        help="path to qconsole.log; several files, directories or glob patterns "
+                             "are parsed in parallel into one combined report")
+    parser.add_argument("--jobs", type=int,
+                        help="worker processes (default: one per CPU for multiple logs); "
+                             "with a single log, split it into this many chunks")
+    parser.add_argument("--check", action="store_true",
+                        help="verify that chunked parsing reproduces the sequential report")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only parse lines appended since the previous --incremental run")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep tailing the log and print a report periodically")
+    parser.add_argument("--interval", type=float, default=FOLLOW_REPORT_INTERVAL,
+                        help="seconds between reports in --follow mode (default: %(default)s)")
+    parser.add_argument("--checkpoint", help="checkpoint file for --incremental/--follow "
+                                             "(default: next to the log)")
+    parse_cache.add_arguments(parser)
+    tool_metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    with tool_metrics.session("analyze_bot_logs", args):
+        run(args)
+
+
+def run(args):
+    """Run the analysis the command line asked for"""
+    log_paths = expand_log_paths(args.log_path)
+    if not log_paths:
+        print(f"[ERROR] No log files match: {' '.join(args.log_path)}")
         sys.exit(1)
 
-    log_path = sys.argv[1]
-    analyzer = BotLogAnalyzer(log_path)
-    analyzer.parse_log()
-    analyzer.print_summary()
+    if args.check:
+        results = [check_chunked(log_path, args.jobs) for log_path in log_paths]
+        sys.exit(0 if all(results) else 1)
+
+    if len(log_paths) > 1:
+        if args.follow or args.incremental:
+            print("[ERROR] --follow and --incremental take a single log file")
+            sys.exit(1)
+        missing = [p for p in log_paths if not p.exists()]
+        if missing:
+            print(f"[ERROR] Log file not found: {missing[0]}")
+            sys.exit(1)
+
+        analyzer = BotLogAnalyzer(log_paths[0])
+        analyzer.cache = parse_cache.from_args(args)
+        with tool_metrics.stage('parse'):
+            analyzer.parse_files(log_paths, args.jobs)
+        with tool_metrics.stage('report'):
+            analyzer.print_summary()
+        return
+
+    analyzer = BotLogAnalyzer(log_paths[0])
+
+    if args.follow:
+        if not analyzer.log_path.exists():
+            print(f"[ERROR] Log file not found: {analyzer.log_path}")
+            sys.exit(1)
+        reader = IncrementalLogReader(log_paths[0], args.checkpoint, tool="analyze_bot_logs")
+        analyzer.follow_log(reader, args.interval)
+        return
+
+    if not args.incremental:
+        analyzer.cache = parse_cache.from_args(args)
+
+    if args.jobs and args.jobs > 1 and not args.incremental:
+        with tool_metrics.stage('parse'):
+            analyzer.parse_chunked(args.jobs)
+        with tool_metrics.stage('report'):
+            analyzer.print_summary()
+        return
+
+    reader = None
+    if args.incremental:
+        reader = IncrementalLogReader(log_paths[0], args.checkpoint, tool="analyze_bot_logs")
+
+    with tool_metrics.stage('parse'):
+        analyzer.parse_log(reader)
+    with tool_metrics.stage('report'):
+        analyzer.print_summary()
 
 
 if __name__ == "__main__":
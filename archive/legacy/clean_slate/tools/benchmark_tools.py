@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner for Modern Reaper Enhancements (MRE)
+Measures throughput, peak memory and scaling of the log tools.
+
+Usage:
+    python benchmark_tools.py                                  # 1MB and 10MB logs, all tools
+    python benchmark_tools.py --sizes 1MB 10MB 100MB 1GB       # Scaling curve
+    python benchmark_tools.py --tools analyze learn_rj         # Selected tools only
+    python benchmark_tools.py --tools learn_rj_dense --sizes 1MB 12MB 115MB   # 10^4..10^6 RJ events
+    python benchmark_tools.py --save-baseline baseline.json    # Record a baseline
+    python benchmark_tools.py --compare baseline.json          # Flag regressions (exit 1)
+
+Each tool runs through its normal command line in a child process, against
+seeded logs from generate_synthetic_log.py, inside a scratch copy of the
+project layout (launch/quake-spasm/qconsole.log, tools/, bot_memory/), so
+the real project is never touched. Per run it records wall time, MB/s,
+lines/s and the child's peak RSS; the best of --repeat runs is kept, with
+the per-stage timings and counters the tool wrote through --metrics (see
+tool_metrics.py). learn_rj_dense runs on a log that is mostly rocket-jump
+markers (about 8800 per MB), so its sizes scale the event count that RJ
+validation and clustering see.
+
+Peak RSS comes from os.wait4() and is reported only on Unix.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from generate_synthetic_log import generate_log, parse_size
+
+TOOLS_DIR = Path(__file__).parent
+
+DEFAULT_SIZES = ["1MB", "10MB"]
+DEFAULT_WORK_DIR = TOOLS_DIR / "bench_work"
+
+# Relative slowdown against the baseline that counts as a regression
+REGRESSION_THRESHOLD = 0.10
+
+# Command line per benchmark; {log} is the sandbox qconsole.log. Parsing is
+# what gets measured, so repeat runs must not be served by the parse cache
+BENCHMARKS = {
+    'analyze': ["analyze_bot_logs.py", "{log}", "--no-cache"],
+    'analyze_chunked': ["analyze_bot_logs.py", "{log}", "--jobs", "{jobs}", "--no-cache"],
+    'memory_auto': ["bot_memory_manager.py", "auto", "--no-cache"],
+    'learn_rj': ["learn_rj_from_player.py", "{log}", "dm2", "{out}", "--no-cache"],
+    'learn_rj_dense': ["learn_rj_from_player.py", "{log}", "dm2", "{out}", "--no-cache"],
+    'parse_waypoints': ["parse_waypoints.py", "{log}", "dm2", "{out}"],
+}
+
+# Synthetic log mix per benchmark (generate_synthetic_log.LINE_MIXES), if not
+# the default full match
+BENCHMARK_MIX = {
+    'learn_rj_dense': 'rj',
+}
+
+# Every tool takes --metrics (tool_metrics.py)
+METRICS_ARGS = ["--metrics", "{metrics}"]
+
+
+def prepare_sandbox(work_dir: Path) -> Path:
+    """Scratch project root with a copy of the tools"""
+    root = work_dir / "project"
+    tools = root / "tools"
+    tools.mkdir(parents=True, exist_ok=True)
+    (root / "launch" / "quake-spasm").mkdir(parents=True, exist_ok=True)
+    (root / "reaper_mre").mkdir(exist_ok=True)
+
+    for source in TOOLS_DIR.glob("*.py"):
+        shutil.copy2(source, tools / source.name)
+    return root
+
+
+def synthetic_log(work_dir: Path, size: int, seed: int, mix: str = 'default') -> Path:
+    """Generate (or reuse) the seeded log for a size and line mix"""
+    suffix = "" if mix == 'default' else f"_{mix}"
+    log_path = work_dir / f"synthetic_{size}_{seed}{suffix}.log"
+    if not log_path.exists():
+        print(f"[*] Generating {size / 1024 / 1024:.1f} MB {mix} log (seed {seed})...")
+        generate_log(log_path, size, seed, mix=mix)
+    return log_path
+
+
+def count_lines(path: Path) -> int:
+    lines = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            lines += block.count(b'\n')
+    return lines
+
+
+def _reset_sandbox(root: Path):
+    """Forget state from the previous run (memory files, checkpoints)"""
+    shutil.rmtree(root / "bot_memory", ignore_errors=True)
+    for checkpoint in (root / "launch" / "quake-spasm").glob("*.ckpt"):
+        checkpoint.unlink()
+
+
+def run_once(command: List[str], cwd: Path, timeout: Optional[float]) -> dict:
+    """Run one tool invocation; wall time, exit code and peak RSS of the child"""
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=stderr)
+
+        peak_rss_mb = None
+        try:
+            if hasattr(os, 'wait4'):
+                # wait4 gives the rusage of this child alone
+                deadline = start + timeout if timeout else None
+                while True:
+                    pid, status, usage = os.wait4(proc.pid, os.WNOHANG if deadline else 0)
+                    if pid:
+                        break
+                    if time.perf_counter() > deadline:
+                        raise subprocess.TimeoutExpired(command, timeout)
+                    time.sleep(0.005)
+                elapsed = time.perf_counter() - start
+                returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+                proc.returncode = returncode
+                # ru_maxrss is KB on Linux, bytes on macOS
+                peak_rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+            else:
+                returncode = proc.wait(timeout=timeout)
+                elapsed = time.perf_counter() - start
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            return {'elapsed': None, 'returncode': None, 'peak_rss_mb': None, 'error': 'timeout'}
+
+        result = {'elapsed': elapsed, 'returncode': returncode, 'peak_rss_mb': peak_rss_mb}
+        if returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode('utf-8', errors='ignore').strip()
+            result['error'] = message.splitlines()[-1] if message else f"exit {returncode}"
+        return result
+
+
+def run_benchmark(name: str, root: Path, repeat: int, jobs: int,
+                  timeout: Optional[float]) -> dict:
+    """Best-of-N run of one tool against the sandbox log"""
+    sandbox_log = root / "launch" / "quake-spasm" / "qconsole.log"
+    metrics_path = root / "bench_metrics.json"
+    command = [sys.executable] + [arg.format(log=sandbox_log, jobs=jobs, out=root / "bench_out.qc",
+                                             metrics=metrics_path)
+                                  for arg in BENCHMARKS[name] + METRICS_ARGS]
+
+    best = None
+    for _ in range(repeat):
+        _reset_sandbox(root)
+        if metrics_path.exists():
+            metrics_path.unlink()
+        result = run_once(command, root / "tools", timeout)
+        if 'error' in result:
+            return result
+        if metrics_path.exists():
+            with open(metrics_path, 'r', encoding='utf-8') as f:
+                metrics = json.load(f)
+            result['stages'] = metrics.get('stages', {})
+            result['counters'] = metrics.get('counters', {})
+        if best is None or result['elapsed'] < best['elapsed']:
+            # Peak RSS is kept as the worst seen, time as the best
+            if best is not None and best['peak_rss_mb'] is not None:
+                result['peak_rss_mb'] = max(result['peak_rss_mb'], best['peak_rss_mb'])
+            best = result
+        elif best['peak_rss_mb'] is not None:
+            best['peak_rss_mb'] = max(best['peak_rss_mb'], result['peak_rss_mb'])
+    return best
+
+
+def scaling_exponent(points: List[dict]) -> Optional[float]:
+    """Slope of log(time) over log(size): ~1.0 is linear, >1 superlinear"""
+    points = [p for p in points if p.get('elapsed')]
+    if len(points) < 2:
+        return None
+    first, last = points[0], points[-1]
+    if last['size_bytes'] == first['size_bytes'] or first['elapsed'] <= 0:
+        return None
+    return math.log(last['elapsed'] / first['elapsed']) / math.log(last['size_bytes'] / first['size_bytes'])
+
+
+def run_suite(sizes: List[int], tools: List[str], work_dir: Path, seed: int, repeat: int,
+              jobs: int, timeout: Optional[float]) -> dict:
+    work_dir.mkdir(parents=True, exist_ok=True)
+    root = prepare_sandbox(work_dir)
+    sandbox_log = root / "launch" / "quake-spasm" / "qconsole.log"
+
+    # Tools grouped by the log they run on, in the order given
+    by_mix: Dict[str, List[str]] = {}
+    for name in tools:
+        by_mix.setdefault(BENCHMARK_MIX.get(name, 'default'), []).append(name)
+
+    results = []
+    for size in sizes:
+        for mix, mix_tools in by_mix.items():
+            log_path = synthetic_log(work_dir, size, seed, mix)
+            size_bytes = log_path.stat().st_size
+            lines = count_lines(log_path)
+
+            if sandbox_log.exists() or sandbox_log.is_symlink():
+                sandbox_log.unlink()
+            try:
+                os.link(log_path, sandbox_log)
+            except OSError:
+                shutil.copy2(log_path, sandbox_log)
+
+            for name in mix_tools:
+                result = run_benchmark(name, root, repeat, jobs, timeout)
+                result.update({'tool': name, 'size_bytes': size_bytes, 'lines': lines})
+                if result.get('elapsed'):
+                    result['mb_per_s'] = size_bytes / 1024 / 1024 / result['elapsed']
+                    result['lines_per_s'] = lines / result['elapsed']
+                results.append(result)
+                print_result(result)
+
+    scaling = {name: scaling_exponent([r for r in results if r['tool'] == name]) for name in tools}
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'seed': seed,
+        'repeat': repeat,
+        'results': results,
+        'scaling': scaling,
+    }
+
+
+def print_result(result: dict):
+    size_mb = result['size_bytes'] / 1024 / 1024
+    if 'error' in result:
+        print(f"  {result['tool']:<16} {size_mb:>9.1f} MB  FAILED: {result['error']}")
+        return
+    rss = f"{result['peak_rss_mb']:>8.1f} MB" if result['peak_rss_mb'] is not None else f"{'n/a':>11}"
+    events = result.get('counters', {}).get('rj_events')
+    events = f"  {events:,} RJ events" if events is not None else ""
+    print(f"  {result['tool']:<16} {size_mb:>9.1f} MB  {result['elapsed']:>8.2f}s  "
+          f"{result['mb_per_s']:>8.1f} MB/s  {result['lines_per_s']:>11,.0f} lines/s  {rss}{events}")
+
+
+def print_scaling(report: dict):
+    print("\nSCALING (time ~ size^k; k=1.0 is linear):")
+    for name, exponent in report['scaling'].items():
+        if exponent is None:
+            print(f"  {name:<16} n/a (needs two or more sizes)")
+        else:
+            print(f"  {name:<16} k={exponent:.2f}")
+
+
+def compare_baseline(report: dict, baseline: dict, threshold: float) -> List[str]:
+    """Describe runs that got slower than the baseline by more than threshold"""
+    previous: Dict[tuple, dict] = {(r['tool'], r['size_bytes']): r for r in baseline.get('results', [])}
+    regressions = []
+
+    print(f"\nCOMPARISON WITH BASELINE ({baseline.get('created', 'unknown date')}):")
+    for result in report['results']:
+        old = previous.get((result['tool'], result['size_bytes']))
+        if old is None or not old.get('elapsed') or not result.get('elapsed'):
+            continue
+        change = result['elapsed'] / old['elapsed'] - 1
+        marker = ""
+        if change > threshold:
+            marker = "  <-- REGRESSION"
+            regressions.append(f"{result['tool']} @ {result['size_bytes']} bytes: {change:+.1%}")
+        print(f"  {result['tool']:<16} {result['size_bytes'] / 1024 / 1024:>9.1f} MB  "
+              f"{old['elapsed']:>8.2f}s -> {result['elapsed']:>8.2f}s  ({change:+.1%}){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the MRE log tools on synthetic qconsole.logs",
+        epilog="Example: python benchmark_tools.py --sizes 1MB 100MB --save-baseline baseline.json")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES,
+                        help="log sizes to test, e.g. 1MB 100MB 10GB (default: %(default)s)")
+    parser.add_argument("--tools", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS),
+                        help="benchmarks to run (default: all)")
+    parser.add_argument("--seed", type=int, default=1, help="log generator seed (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, best kept (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="workers for analyze_chunked (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, help="seconds before a run is abandoned")
+    parser.add_argument("--work-dir", type=Path, default=DEFAULT_WORK_DIR,
+                        help="scratch directory for logs and the sandbox project (default: tools/bench_work)")
+    parser.add_argument("--save-baseline", type=Path, help="write results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="compare against a saved baseline JSON")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown that counts as a regression (default: %(default)s = 10%%)")
+    args = parser.parse_args()
+
+    try:
+        sizes = sorted(parse_size(size) for size in args.sizes)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"  {'Tool':<16} {'Log':>12}  {'Time':>9}  {'Throughput':>13}  {'Lines':>17}  {'Peak RSS':>11}")
+    report = run_suite(sizes, args.tools, args.work_dir, args.seed, max(1, args.repeat),
+                       args.jobs, args.timeout)
+    print_scaling(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    failed = [r for r in report['results'] if 'error' in r]
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Bot Memory Database for Modern Reaper Enhancements (MRE)
+SQLite backend for bot_memory_manager.py (--backend sqlite).
+
+One database (bot_memory/bot_memory.db) holds every map. Unlike the per-map
+files, which are overwritten each run, it keeps the history of every session:
+
+    maps          one row per map
+    sessions      one row per processed waypoint dump
+    nodes         current merged state of each waypoint
+    observations  the raw traffic/danger each session reported for a node
+    links         learned links between nodes (see waypoint_graph.py)
+    node_rtree    R*Tree over node origins (kept in sync by triggers)
+
+Merges are radius queries against the R*Tree followed by batched
+executemany() updates/inserts in one transaction, with the same rules as
+SpatialMergeIndex.merge. Statistics are answered with SQL aggregates, so
+`stats` never loads a whole map into Python.
+
+Uses only the standard library (sqlite3). If the SQLite build lacks the
+R*Tree module, a plain B-tree index on the coordinates is used instead.
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from spatial_index import SpatialMergeIndex
+from waypoint_graph import WaypointGraph, combine_link_type
+
+DB_FILENAME = "bot_memory.db"
+
+# Merge weights, matching BotMemoryManager._combine_nodes
+WEIGHT_OLD = 0.6
+WEIGHT_NEW = 0.4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS maps (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    map_id INTEGER NOT NULL REFERENCES maps(id),
+    recorded_at REAL NOT NULL,
+    source TEXT,
+    dump_nodes INTEGER NOT NULL,
+    merged INTEGER NOT NULL DEFAULT 0,
+    inserted INTEGER NOT NULL DEFAULT 0,
+    duplicates INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    map_id INTEGER NOT NULL REFERENCES maps(id),
+    x REAL NOT NULL,
+    y REAL NOT NULL,
+    z REAL NOT NULL,
+    traffic REAL NOT NULL,
+    danger REAL NOT NULL,
+    sessions_seen INTEGER NOT NULL DEFAULT 1,
+    updated REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS nodes_map_traffic ON nodes (map_id, traffic);
+CREATE INDEX IF NOT EXISTS nodes_map_danger ON nodes (map_id, danger);
+
+CREATE TABLE IF NOT EXISTS observations (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    node_id INTEGER NOT NULL,
+    traffic REAL NOT NULL,
+    danger REAL NOT NULL,
+    PRIMARY KEY (node_id, session_id)
+);
+
+CREATE TABLE IF NOT EXISTS links (
+    src INTEGER NOT NULL,
+    dst INTEGER NOT NULL,
+    type INTEGER NOT NULL,
+    usage REAL NOT NULL,
+    PRIMARY KEY (src, dst)
+);
+"""
+
+RTREE_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS node_rtree USING rtree (
+    id, min_x, max_x, min_y, max_y, min_z, max_z
+);
+
+CREATE TRIGGER IF NOT EXISTS nodes_rtree_insert AFTER INSERT ON nodes BEGIN
+    INSERT INTO node_rtree VALUES (new.id, new.x, new.x, new.y, new.y, new.z, new.z);
+END;
+
+CREATE TRIGGER IF NOT EXISTS nodes_rtree_update AFTER UPDATE OF x, y, z ON nodes BEGIN
+    UPDATE node_rtree SET min_x = new.x, max_x = new.x, min_y = new.y, max_y = new.y,
+                          min_z = new.z, max_z = new.z
+    WHERE id = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS nodes_rtree_delete AFTER DELETE ON nodes BEGIN
+    DELETE FROM node_rtree WHERE id = old.id;
+END;
+"""
+
+FALLBACK_INDEX = "CREATE INDEX IF NOT EXISTS nodes_map_xyz ON nodes (map_id, x, y, z);"
+
+# Nearest node within radius: ?s are x, y, z (distance), box, map, radius^2.
+# The joins/index hints make the spatial index drive the lookup; left to
+# itself the planner prefers the map_id indexes and scans the whole map.
+_DISTANCE = "((n.x - ?) * (n.x - ?) + (n.y - ?) * (n.y - ?) + (n.z - ?) * (n.z - ?))"
+
+NEAREST_RTREE = f"""
+SELECT n.id, {_DISTANCE} AS dist_sq
+FROM node_rtree r CROSS JOIN nodes n ON n.id = r.id
+WHERE r.max_x >= ? AND r.min_x <= ? AND r.max_y >= ? AND r.min_y <= ?
+  AND r.max_z >= ? AND r.min_z <= ? AND n.map_id = ? AND dist_sq <= ?
+ORDER BY dist_sq, n.id
+LIMIT 1
+"""
+
+NEAREST_BTREE = f"""
+SELECT n.id, {_DISTANCE} AS dist_sq
+FROM nodes n INDEXED BY nodes_map_xyz
+WHERE n.x BETWEEN ? AND ? AND n.y BETWEEN ? AND ? AND n.z BETWEEN ? AND ?
+  AND n.map_id = ? AND dist_sq <= ?
+ORDER BY dist_sq, n.id
+LIMIT 1
+"""
+
+
+class BotMemoryDB:
+    """Per-session bot memory history in SQLite"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        try:
+            self.conn.executescript(RTREE_SCHEMA)
+            self.has_rtree = True
+        except sqlite3.OperationalError:
+            # SQLite built without the R*Tree module
+            self.conn.execute(FALLBACK_INDEX)
+            self.has_rtree = False
+
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def map_id(self, mapname: str, create: bool = False) -> Optional[int]:
+        """Row id of a map (created on demand if create)"""
+        row = self.conn.execute("SELECT id FROM maps WHERE name = ?", (mapname,)).fetchone()
+        if row:
+            return row[0]
+        if not create:
+            return None
+        return self.conn.execute("INSERT INTO maps (name) VALUES (?)", (mapname,)).lastrowid
+
+    def nearest(self, map_id: int, origin: Sequence[float], radius: float) -> Optional[Tuple[int, float]]:
+        """(node id, squared distance) of the closest node within radius, or None"""
+        x, y, z = origin
+        params = (x, x, y, y, z, z,
+                  x - radius, x + radius, y - radius, y + radius, z - radius, z + radius,
+                  map_id, radius * radius)
+        return self.conn.execute(NEAREST_RTREE if self.has_rtree else NEAREST_BTREE, params).fetchone()
+
+    def merge_session(self, mapname: str, new_nodes, radius: float, source: str = "",
+                      links: Optional[WaypointGraph] = None) -> Dict[str, int]:
+        """
+        Record one waypoint dump and merge it into the map's nodes.
+
+        new_nodes are WaypointNode objects. Matching follows
+        SpatialMergeIndex.merge: each new node merges into the nearest
+        stored node within radius (closest claimant wins, the rest are
+        duplicates); unmatched nodes are inserted unless they repeat a node
+        inserted earlier in the same dump. Every merged or inserted node
+        gets an observation row for this session. The dump's links (over
+        new_nodes) follow their nodes, as WaypointGraph.update does.
+
+        Returns merged/inserted/duplicates counts.
+        """
+        stats = {'merged': 0, 'inserted': 0, 'duplicates': 0}
+        now = datetime.now().timestamp()
+        placement = [0] * len(new_nodes)  # Node id each new node ended up in
+
+        with self.conn:
+            map_id = self.map_id(mapname, create=True)
+            session_id = self.conn.execute(
+                "INSERT INTO sessions (map_id, recorded_at, source, dump_nodes) VALUES (?, ?, ?, ?)",
+                (map_id, now, source, len(new_nodes))).lastrowid
+
+            # Nearest stored node for every new node (indexed lookups)
+            claims: Dict[int, Tuple[float, int]] = {}
+            unmatched = []
+            for pos, node in enumerate(new_nodes):
+                hit = self.nearest(map_id, node.origin, radius)
+                if hit is None:
+                    unmatched.append(pos)
+                    continue
+                node_id, dist_sq = hit
+                placement[pos] = node_id
+                if node_id not in claims or dist_sq < claims[node_id][0]:
+                    if node_id in claims:
+                        stats['duplicates'] += 1
+                    claims[node_id] = (dist_sq, pos)
+                else:
+                    stats['duplicates'] += 1
+
+            # Merge winners: weighted average, most recent position
+            updates = []
+            observed = []
+            for node_id, (_, pos) in claims.items():
+                node = new_nodes[pos]
+                x, y, z = node.origin
+                updates.append((x, y, z, node.traffic_score * WEIGHT_NEW, node.danger_scent * WEIGHT_NEW,
+                                now, node_id))
+                observed.append((session_id, node_id, node.traffic_score, node.danger_scent))
+            self.conn.executemany(
+                f"UPDATE nodes SET x = ?, y = ?, z = ?, traffic = traffic * {WEIGHT_OLD} + ?, "
+                f"danger = danger * {WEIGHT_OLD} + ?, sessions_seen = sessions_seen + 1, updated = ? "
+                "WHERE id = ?", updates)
+            stats['merged'] = len(claims)
+
+            # Inserts, skipping repeats within this dump
+            first_id = self._next_node_id()
+            fresh = SpatialMergeIndex((), radius)
+            inserts = []
+            for pos in unmatched:
+                node = new_nodes[pos]
+                duplicate_of = fresh.nearest(node.origin)[0]
+                if duplicate_of is not None:
+                    stats['duplicates'] += 1
+                    placement[pos] = first_id + duplicate_of
+                    continue
+                placement[pos] = first_id + fresh.insert(node.origin)
+                inserts.append(node)
+
+            self.conn.executemany(
+                "INSERT INTO nodes (id, map_id, x, y, z, traffic, danger, sessions_seen, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(first_id + i, map_id, *node.origin, node.traffic_score, node.danger_scent,
+                  node.sessions_seen, now)
+                 for i, node in enumerate(inserts)])
+            observed.extend((session_id, first_id + i, node.traffic_score, node.danger_scent)
+                            for i, node in enumerate(inserts))
+            stats['inserted'] = len(inserts)
+
+            self.conn.executemany("INSERT INTO observations VALUES (?, ?, ?, ?)", observed)
+            if links is not None:
+                self._merge_links(map_id, links, placement)
+            self.conn.execute(
+                "UPDATE sessions SET merged = ?, inserted = ?, duplicates = ? WHERE id = ?",
+                (stats['merged'], stats['inserted'], stats['duplicates'], session_id))
+
+        return stats
+
+    def _merge_links(self, map_id: int, links: WaypointGraph, placement: List[int]):
+        """Store a dump's links between the node ids its nodes were merged into"""
+        stored: Dict[Tuple[int, int], List] = {}
+        for src, dst, link_type, usage in links.edges():
+            key = (placement[src], placement[dst])
+            if key[0] == key[1]:
+                continue
+            if key in stored:
+                stored[key][0] = combine_link_type(stored[key][0], link_type)
+                stored[key][1] += usage
+            else:
+                stored[key] = [link_type, usage]
+
+        # A special type sticks; the dump's usage replaces the stored one
+        for src, dst, old_type in self.conn.execute(
+                "SELECT l.src, l.dst, l.type FROM links l JOIN nodes n ON n.id = l.src "
+                "WHERE n.map_id = ?", (map_id,)):
+            if (src, dst) in stored:
+                stored[(src, dst)][0] = combine_link_type(old_type, stored[(src, dst)][0])
+
+        self.conn.executemany("INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?)",
+                              [(src, dst, link_type, usage) for (src, dst), (link_type, usage) in stored.items()])
+
+    def _next_node_id(self) -> int:
+        """First id never given to a node, deleted ones included.
+
+        optimize() keeps the observations of the nodes it drops, so MAX(id)
+        of nodes alone would hand a dropped node's id, and its history, to
+        the next node inserted. Every node gets an observation when it is
+        inserted, so the observations know the highest id ever used.
+        """
+        return self.conn.execute(
+            "SELECT MAX(COALESCE((SELECT MAX(id) FROM nodes), 0), "
+            "COALESCE((SELECT MAX(node_id) FROM observations), 0)) + 1").fetchone()[0]
+
+    def optimize(self, mapname: str, min_traffic: float, min_danger: float) -> Tuple[int, int]:
+        """
+        Drop low-value nodes and normalise scores to 0-100 (as optimize_nodes).
+
+        Observation history of dropped nodes is kept. Returns (removed, remaining).
+        """
+        with self.conn:
+            map_id = self.map_id(mapname)
+            if map_id is None:
+                return 0, 0
+
+            removed = self.conn.execute(
+                "DELETE FROM nodes WHERE map_id = ? AND traffic < ? AND danger < ?",
+                (map_id, min_traffic, min_danger)).rowcount
+            if removed:
+                self.conn.execute("DELETE FROM links WHERE src NOT IN (SELECT id FROM nodes) "
+                                  "OR dst NOT IN (SELECT id FROM nodes)")
+
+            max_traffic, max_danger, remaining = self.conn.execute(
+                "SELECT MAX(traffic), MAX(danger), COUNT(*) FROM nodes WHERE map_id = ?",
+                (map_id,)).fetchone()
+            if max_traffic and max_traffic > 0:
+                self.conn.execute("UPDATE nodes SET traffic = (traffic / ?) * 100 WHERE map_id = ?",
+                                  (max_traffic, map_id))
+            if max_danger and max_danger > 0:
+                self.conn.execute("UPDATE nodes SET danger = (danger / ?) * 100 WHERE map_id = ?",
+                                  (max_danger, map_id))
+
+        return removed, remaining
+
+    def load_nodes(self, mapname: str) -> List[tuple]:
+        """All nodes of a map as (origin, traffic, danger, updated, sessions_seen), oldest first"""
+        map_id = self.map_id(mapname)
+        if map_id is None:
+            return []
+
+        rows = self.conn.execute(
+            "SELECT x, y, z, traffic, danger, updated, sessions_seen FROM nodes "
+            "WHERE map_id = ? ORDER BY id", (map_id,))
+        return [((x, y, z), traffic, danger, updated, sessions)
+                for x, y, z, traffic, danger, updated, sessions in rows]
+
+    def load_links(self, mapname: str) -> WaypointGraph:
+        """A map's links over its nodes in load_nodes() order"""
+        map_id = self.map_id(mapname)
+        if map_id is None:
+            return WaypointGraph.empty()
+
+        ids = [node_id for node_id, in self.conn.execute(
+            "SELECT id FROM nodes WHERE map_id = ? ORDER BY id", (map_id,))]
+        row = {node_id: i for i, node_id in enumerate(ids)}
+        links = self.conn.execute(
+            "SELECT l.src, l.dst, l.type, l.usage FROM links l JOIN nodes n ON n.id = l.src "
+            "WHERE n.map_id = ?", (map_id,))
+        return WaypointGraph.from_edges(len(ids), (
+            (row[src], row.get(dst, -1), link_type, usage) for src, dst, link_type, usage in links))
+
+    def summary(self, mapname: str, top: int = 5) -> Optional[dict]:
+        """Statistics for print_stats, computed in SQL"""
+        map_id = self.map_id(mapname)
+        if map_id is None:
+            return None
+
+        count, avg_traffic, avg_danger = self.conn.execute(
+            "SELECT COUNT(*), AVG(traffic), AVG(danger) FROM nodes WHERE map_id = ?",
+            (map_id,)).fetchone()
+        if not count:
+            return None
+
+        def ranked(column):
+            return [(value, (x, y, z)) for value, x, y, z in self.conn.execute(
+                f"SELECT {column}, x, y, z FROM nodes WHERE map_id = ? "
+                f"ORDER BY {column} DESC, id LIMIT ?", (map_id, top))]
+
+        veterans, max_sessions = self.conn.execute(
+            "SELECT COUNT(*), MAX(sessions_seen) FROM nodes WHERE map_id = ? AND sessions_seen > 1",
+            (map_id,)).fetchone()
+        sessions = self.conn.execute(
+            "SELECT COUNT(*) FROM sessions WHERE map_id = ?", (map_id,)).fetchone()[0]
+
+        return {
+            'count': count,
+            'avg_traffic': avg_traffic,
+            'avg_danger': avg_danger,
+            'top_traffic': ranked('traffic'),
+            'top_danger': ranked('danger'),
+            'veterans': veterans,
+            'max_sessions': max_sessions,
+            'sessions': sessions,
+        }
+
+    def node_history(self, mapname: str, origin: Sequence[float], radius: float) -> List[tuple]:
+        """
+        Per-session observations of the node nearest origin.
+
+        Returns [(recorded_at, observed traffic, observed danger)] oldest first.
+        """
+        map_id = self.map_id(mapname)
+        if map_id is None:
+            return []
+
+        hit = self.nearest(map_id, origin, radius)
+        if hit is None:
+            return []
+
+        return self.conn.execute(
+            "SELECT s.recorded_at, o.traffic, o.danger FROM observations o "
+            "JOIN sessions s ON s.id = o.session_id WHERE o.node_id = ? ORDER BY s.id",
+            (hit[0],)).fetchall()
@@ -5,7 +5,8 @@ Bot Memory Manager - Automated Waypoint Persistence System
 Modern Reaper Enhancements (MRE) - Phase 5 Tool
 
 Extracts, analyzes, optimizes, and persists bot learning data from Quake matches.
-Converts qconsole.log dumps into production-ready QuakeC code.
+Converts qconsole.log dumps into per-map data files that the mod loads at map
+start (data/maps/<map>.wpt), or optionally into compiled-in QuakeC code.
 
 Usage:
     python bot_memory_manager.py extract    # Extract from latest log
@@ -13,18 +14,59 @@ Usage:
     python bot_memory_manager.py optimize   # Clean up and optimize
     python bot_memory_manager.py generate   # Create .qc files
     python bot_memory_manager.py auto       # Run full pipeline
+    python bot_memory_manager.py stats dm4  # Show stored statistics for a map
+    python bot_memory_manager.py export dm4 # Write bot_memory/dm4.json from the store
+    python bot_memory_manager.py migrate    # Convert old JSON memory files to .wpm
+    python bot_memory_manager.py history dm4 --backend sqlite --origin "X Y Z"
+
+Options:
+    --incremental   Only read log data appended since the previous run
+    --follow        Keep tailing the log; process each dump as it is written
+    --backend sqlite
+                    Keep all maps in bot_memory/bot_memory.db with per-session
+                    history (see the history command)
+    --qc            Also write reaper_mre/maps/<map>_memory.qc, for engines
+                    without the FRIK_FILE extension (needs a recompile)
+    --game-dir DIR  Mod directory that receives data/maps/<map>.wpt
+                    (default: launch/quake-spasm/reaper_mre)
+    --budget N      Most nodes written for the game (default 100, 0 = no limit);
+                    extra nodes are decimated, keeping map coverage
+    --jobs N        Worker processes for logs that hold several maps
+                    (default: one per CPU); each map's newest dump is processed
+    --no-cache      Scan the log even if it is unchanged since the last run
+                    (see parse_cache.py; also --cache-dir, --cache-budget)
+    --metrics FILE  Write per-stage timings, counters and peak memory as JSON
+    --profile FILE  Run under cProfile and write a pstats file
 """
 
+import argparse
+import contextlib
+import io
 import re
+from array import array
 import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 from dataclasses import dataclass, asdict
 from collections import defaultdict
 
+from log_reader import IncrementalLogReader, decode_range, map_log
+from spatial_index import SpatialMergeIndex
+from waypoint_table import WaypointTable, available as tables_available
+import memory_store
+import node_budget
+import parse_cache
+import qc_emitter
+import tool_metrics
+import waypoint_data
+from waypoint_graph import WaypointGraph, parse_link_calls
+from waypoint_routes import ROUTE_NODE_LIMIT, RouteTable, build_routes
+from bot_memory_db import BotMemoryDB, DB_FILENAME
+
 # Fix Windows console encoding for UTF-8
 if sys.platform == 'win32':
     try:
@@ -32,6 +74,34 @@ if sys.platform == 'win32':
     except:
         pass  # Fallback: use ASCII symbols
 
+# Waypoint dump markers printed by DumpWaypoints (impulse 99)
+DUMP_START = "// ===== CUT HERE: START WAYPOINTS ====="
+DUMP_END = "// ===== CUT HERE: END WAYPOINTS ====="
+
+SPAWN_SERVER_PATTERN = re.compile(r'SpawnServer: (\w+)')
+
+# The same markers, searched for as bytes in the memory-mapped log
+DUMP_START_BYTES = DUMP_START.encode('ascii')
+DUMP_END_BYTES = DUMP_END.encode('ascii')
+SPAWN_SERVER_BYTES = b'SpawnServer: '
+SPAWN_SERVER_BYTES_PATTERN = re.compile(rb'SpawnServer: (\w+)')
+
+# Match: SpawnSavedWaypoint('X Y Z', traffic, danger);
+WAYPOINT_PATTERN = re.compile(r"SpawnSavedWaypoint\('([^']+)',\s*([\d.]+),\s*([\d.]+)\)")
+
+# Hashes of the generated QC files, next to them in reaper_mre/maps/
+QC_MANIFEST = "memory_manifest.json"
+
+# Parse cache entry kind; bump when dump parsing changes
+DUMP_CACHE_KIND = "dumps-3"
+
+# Nodes closer than this (in Quake units) are the same node across sessions
+MERGE_THRESHOLD = 16.0
+
+# Nodes below both of these after merging are dropped as not useful
+MIN_TRAFFIC = 5.0
+MIN_DANGER = 2.0
+
 
 @dataclass
 class WaypointNode:
@@ -44,60 +114,349 @@ class WaypointNode:
 
     def to_qc(self) -> str:
         """Generate QuakeC spawn call"""
-        origin_str = f"'{self.origin[0]} {self.origin[1]} {self.origin[2]}'"
+        # One decimal, as vtos() dumps them and WaypointTable.qc_lines() writes them
+        origin_str = f"'{self.origin[0]:.1f} {self.origin[1]:.1f} {self.origin[2]:.1f}'"
         return f"    SpawnSavedWaypoint({origin_str}, {self.traffic_score:.1f}, {self.danger_scent:.1f});"
 
 
+def latest_dumps(dumps: Iterable[Tuple[str, List[WaypointNode], WaypointGraph]]
+                 ) -> Tuple[int, Dict[str, Tuple[List[WaypointNode], WaypointGraph]]]:
+    """Number of dumps read and the newest dump of each map
+
+    Maps are ordered by their newest dump, oldest first.
+    """
+    count = 0
+    latest = {}
+    for mapname, nodes, links in dumps:
+        count += 1
+        latest.pop(mapname, None)
+        latest[mapname] = (nodes, links)
+    return count, latest
+
+
+def dump_to_record(dump: Tuple[List[WaypointNode], WaypointGraph]) -> tuple:
+    """A parsed dump as packed arrays, for the parse cache"""
+    nodes, links = dump
+    values = array('d')
+    for node in nodes:
+        values.extend(node.origin)
+        values.append(node.traffic_score)
+        values.append(node.danger_scent)
+    return (values.tobytes(),
+            [(data.typecode, data.tobytes())
+             for data in (links.offsets, links.neighbours, links.link_types, links.weights)])
+
+
+def dump_from_record(record: tuple) -> Tuple[List[WaypointNode], WaypointGraph]:
+    node_bytes, link_arrays = record
+    values = array('d')
+    values.frombytes(node_bytes)
+    now = datetime.now().isoformat()
+    nodes = [WaypointNode(origin=(values[i], values[i + 1], values[i + 2]), traffic_score=values[i + 3],
+                          danger_scent=values[i + 4], last_updated=now)
+             for i in range(0, len(values), 5)]
+
+    arrays = []
+    for typecode, data in link_arrays:
+        arrays.append(array(typecode))
+        arrays[-1].frombytes(data)
+    return nodes, WaypointGraph(len(nodes), *arrays)
+
+
+def process_map_worker(project_root: Path, options: dict, mapname: str, nodes: List[WaypointNode],
+                       links: WaypointGraph) -> Tuple[Path, str, Dict[str, int], Dict[str, dict]]:
+    """Worker: run process_map for one map's dump in a fresh manager
+
+    options are BotMemoryManager.options(). Returns (data file, the
+    pipeline's console output, the worker's counters, QC results). The QC
+    results map the map name to {'file', 'sha256', 'changed'} as recorded by
+    generate_qc_file; they are empty without --qc. Workers do not touch the
+    manifest: the caller passes the results to update_qc_manifest().
+    """
+    manager = BotMemoryManager.from_options(project_root, options)
+    output = io.StringIO()
+    with tool_metrics.session("bot_memory_manager") as metrics, contextlib.redirect_stdout(output):
+        data_file = manager.process_map(mapname, nodes, links)
+    return data_file, output.getvalue(), metrics.counters, manager.qc_results
+
+
+def update_qc_manifest(maps_dir: Path, results: Dict[str, dict]) -> Path:
+    """Record the QC files of a run in maps_dir/memory_manifest.json and report what changed
+
+    The manifest keeps every map's file name and SHA-256, plus the maps
+    whose file changed in the last run: a build script can skip the
+    compile when that list is empty, or compare hashes with its last build.
+    """
+    manifest_path = maps_dir / QC_MANIFEST
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    maps = manifest.get('maps', {})
+    for mapname, result in results.items():
+        maps[mapname] = {'file': result['file'], 'sha256': result['sha256']}
+    changed = sorted(mapname for mapname, result in results.items() if result['changed'])
+
+    manifest = {'version': 1, 'changed': changed, 'maps': dict(sorted(maps.items()))}
+    maps_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, manifest_path)
+
+    if changed:
+        print(f"\n🔁 QC changed for: {', '.join(changed)} - recompile progs.dat")
+    else:
+        print("\n✅ QC unchanged for every map - no recompile needed")
+    return manifest_path
+
+
 class BotMemoryManager:
     """Manages bot memory extraction, analysis, and optimization"""
 
-    def __init__(self, project_root: Path):
+    def __init__(self, project_root: Path, backend: str = "wpm"):
         self.project_root = project_root
         self.log_path = project_root / "launch" / "quake-spasm" / "qconsole.log"
         self.memory_dir = project_root / "bot_memory"
         self.memory_dir.mkdir(exist_ok=True)
 
-    def extract_from_log(self) -> Optional[Dict[str, List[WaypointNode]]]:
-        """Extract waypoint data from qconsole.log"""
+        # Runtime data files go to <game dir>/data/maps/ (read by LoadBotMemory)
+        self.game_dir = project_root / "launch" / "quake-spasm" / "reaper_mre"
+
+        # Also generate compiled-in QC files (engines without FRIK_FILE)
+        self.emit_qc = False
+
+        # Most nodes written for the game (0 = no limit); the store keeps all
+        self.budget = node_budget.DEFAULT_NODE_BUDGET
+
+        # SQLite backend (per-session history) instead of per-map .wpm files
+        self.db = BotMemoryDB(self.memory_dir / DB_FILENAME) if backend == "sqlite" else None
+
+        # Optional IncrementalLogReader: when set, only new log data is scanned
+        self.reader = None
+
+        # Optional parse_cache.ParseCache for full scans of an unchanged log
+        self.cache = None
+
+        # Worker processes for the per-map pipelines (None: one per CPU)
+        self.jobs = None
+
+        # Compiled-in QC output (--qc), and per map the file written by
+        # generate_qc_file: {'file', 'sha256', 'changed'}
+        self.maps_dir = project_root / "reaper_mre" / "maps"
+        self.qc_results: Dict[str, dict] = {}
+
+        # Merged/inserted/duplicate counts from the last merge_nodes() call
+        self.merge_stats = {}
+
+        # Where the last merge_nodes() put each new node, and which input rows
+        # the last optimize/decimate stage kept (to carry links along)
+        self.merge_placement = []
+        self.kept_rows = []
+
+    def options(self) -> dict:
+        """Settings a worker needs to run the pipeline like this manager"""
+        return {
+            'backend': "sqlite" if self.db is not None else "wpm",
+            'emit_qc': self.emit_qc,
+            'budget': self.budget,
+            'game_dir': self.game_dir,
+        }
+
+    @classmethod
+    def from_options(cls, project_root: Path, options: dict) -> 'BotMemoryManager':
+        manager = cls(project_root, backend=options['backend'])
+        manager.emit_qc = options['emit_qc']
+        manager.budget = options['budget']
+        if options['game_dir']:
+            manager.game_dir = options['game_dir']
+        return manager
+
+    def extract_from_log(self) -> Optional[Dict[str, Tuple[List[WaypointNode], WaypointGraph]]]:
+        """Extract the newest waypoint dump (nodes and links) of every map in qconsole.log
+
+        One pass over the log; each dump belongs to the map that was running
+        when it was printed. A later dump of a map replaces an earlier one,
+        as the mod dumps everything it has learned on that map so far.
+        """
         print("📖 Reading qconsole.log...")
 
         if not self.log_path.exists():
             print(f"❌ Log file not found: {self.log_path}")
             return None
 
-        with open(self.log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            log_content = f.read()
-
-        # Find all waypoint dump sections
-        dump_pattern = r'// ===== CUT HERE: START WAYPOINTS =====(.+?)// ===== CUT HERE: END WAYPOINTS ====='
-        dumps = re.findall(dump_pattern, log_content, re.DOTALL)
+        record = None
+        if self.cache is not None and self.reader is None:
+            record = self.cache.load(self.log_path, DUMP_CACHE_KIND)
 
-        if not dumps:
-            print("⚠️  No waypoint dumps found in log. Use 'impulse 100' in-game to dump waypoints.")
+        if record is not None:
+            print("♻️  Log unchanged since last run, using cached parse")
+            dump_count = record[0]
+            latest = {mapname: dump_from_record(dump) for mapname, dump in record[1].items()}
+        else:
+            # Stream the log, keeping only the newest complete dump per map in memory
+            dump_count, latest = latest_dumps(self.iter_dumps())
+            if self.cache is not None and self.reader is None:
+                self.cache.store(self.log_path, DUMP_CACHE_KIND,
+                                 (dump_count, {mapname: dump_to_record(dump) for mapname, dump in latest.items()}))
+
+        if not latest:
+            print("⚠️  No waypoint dumps found in log. Use 'impulse 99' in-game to dump waypoints.")
             return None
 
-        print(f"✅ Found {len(dumps)} waypoint dump(s)")
+        print(f"✅ Found {dump_count} waypoint dump(s) for {len(latest)} map(s)")
+
+        for mapname, (nodes, links) in latest.items():
+            print(f"📊 Extracted {len(nodes)} waypoints and {len(links)} links from map '{mapname}'")
 
-        # Extract map name from log
-        map_match = re.search(r'SpawnServer: (\w+)', log_content)
-        mapname = map_match.group(1) if map_match else "unknown"
+        return latest
 
-        # Parse the most recent dump (last one in log)
-        latest_dump = dumps[-1]
-        nodes = self._parse_waypoint_dump(latest_dump)
+    def iter_dumps(self) -> Iterator[Tuple[str, List[WaypointNode], WaypointGraph]]:
+        """Lazily yield (mapname, nodes, links) for every complete dump in the log.
 
-        print(f"📊 Extracted {len(nodes)} waypoints from map '{mapname}'")
+        The whole log is memory-mapped and searched for markers, so only
+        the dumps themselves are decoded and memory is bounded by the size
+        of one dump; incremental reads go line by line. Each dump is tagged
+        with the map from the last SpawnServer line printed before it.
+        """
+        if self.reader is not None:
+            yield from self.scan_dumps(self.reader.lines(), self.reader)
+            return
 
-        return {mapname: nodes}
+        with map_log(self.log_path) as data:
+            yield from self._scan_mapped(data)
+
+    def scan_dumps(self, lines: Iterable[Optional[str]],
+                    reader: Optional[IncrementalLogReader] = None
+                    ) -> Iterator[Tuple[str, List[WaypointNode], WaypointGraph]]:
+        """State machine over log lines: outside a dump / inside a dump
+
+        With a reader, the current map survives between runs in the
+        checkpoint, and a dump still being written when the data runs out
+        is re-read from its START line next time. None lines (idle polls
+        in follow mode) checkpoint the reader while outside a dump.
+
+        A SpawnServer line inside a dump means the server changed map
+        before the dump ended: the unfinished dump is dropped, so a later
+        END is never credited to the previous map.
+        """
+        mapname = reader.state.get('mapname', "unknown") if reader else "unknown"
+        block = None  # Spawn lines of the dump being read, None when outside a dump
+        block_start = 0
+        scanned = 0
+
+        for line in lines:
+            if line is None:
+                if reader is not None and block is None:
+                    reader.save()
+                continue
+
+            scanned += 1
+            if block is None:
+                if DUMP_START in line:
+                    block = []
+                    block_start = reader.line_start if reader else 0
+                elif 'SpawnServer:' in line:
+                    mapname = self._switch_map(line, mapname, reader)
+            elif DUMP_END in line:
+                tool_metrics.count('lines_scanned', scanned)
+                scanned = 0
+                nodes, links = self._parse_dump("".join(block))
+                yield mapname, nodes, links
+                block = None
+            elif DUMP_START in line:
+                # Previous dump was cut short (crash/quit mid-dump) - start over
+                block = []
+                block_start = reader.line_start if reader else 0
+            elif 'SpawnServer:' in line and SPAWN_SERVER_PATTERN.search(line):
+                # Map changed mid-dump - drop the unfinished dump
+                block = None
+                mapname = self._switch_map(line, mapname, reader)
+            elif 'SpawnSaved' in line:
+                # SpawnSavedWaypoint / SpawnSavedLink, parsed once the dump is complete
+                block.append(line)
+
+        tool_metrics.count('lines_scanned', scanned)
+        if block is not None and reader is not None:
+            reader.rewind(block_start)
+
+    @staticmethod
+    def _switch_map(line: str, mapname: str, reader: Optional[IncrementalLogReader]) -> str:
+        """The map a SpawnServer line starts (mapname if it names none), kept in the reader's state"""
+        map_match = SPAWN_SERVER_PATTERN.search(line)
+        if not map_match:
+            return mapname
+        if reader is not None:
+            reader.state['mapname'] = map_match.group(1)
+        return map_match.group(1)
+
+    def _scan_mapped(self, data) -> Iterator[Tuple[str, List[WaypointNode], WaypointGraph]]:
+        """The dumps scan_dumps() finds, located by searching a mapped log for the markers
+
+        Plain find()/rfind() jump from marker to marker; only the map name
+        and the lines between a dump's START and END markers are decoded.
+        """
+        mapname = "unknown"
+        pos = 0
+
+        while True:
+            start = data.find(DUMP_START_BYTES, pos)
+            if start == -1:
+                break
+            end = data.find(DUMP_END_BYTES, start)
+            if end == -1:
+                break  # Dump still being written
+
+            # Earlier STARTs without an END were cut short (crash/quit mid-dump);
+            # the section that END closes opens at the last START before it
+            start = data.rfind(DUMP_START_BYTES, start, end)
+            line_end = data.find(b'\n', start, end)
+            block_start = end if line_end == -1 else line_end + 1
+            block_end = max(block_start, data.rfind(b'\n', block_start, end) + 1)
+            scanned, pos = pos, end + len(DUMP_END_BYTES)
+
+            # Map changed mid-dump: the dump was never finished, and the END
+            # belongs to no dump (as in scan_dumps)
+            new_map = self._last_map(data, block_start, end)
+            if new_map is not None:
+                mapname = new_map
+                continue
+
+            # The map that was running: the last SpawnServer line before the START
+            mapname = self._last_map(data, scanned, start) or mapname
+
+            nodes, links = self._parse_dump(decode_range(data, block_start, block_end))
+            yield mapname, nodes, links
+
+    @staticmethod
+    def _last_map(data, start: int, end: int) -> Optional[str]:
+        """Map of the last SpawnServer line in data[start:end] that names one, or None"""
+        spawn = data.rfind(SPAWN_SERVER_BYTES, start, end)
+        while spawn != -1:
+            map_match = SPAWN_SERVER_BYTES_PATTERN.match(data, spawn)
+            if map_match:
+                return map_match.group(1).decode('ascii')
+            spawn = data.rfind(SPAWN_SERVER_BYTES, start, spawn)
+        return None
+
+    def _parse_dump(self, text: str) -> Tuple[List[WaypointNode], WaypointGraph]:
+        """Nodes and links of one complete dump's text"""
+        with tool_metrics.stage('parse'):
+            nodes = self._parse_waypoint_dump(text)
+            edges = parse_link_calls(text)
+            links = WaypointGraph.from_edges(len(nodes), edges)
+        tool_metrics.count('dumps', 1)
+        tool_metrics.count('regex_hits', len(nodes) + len(edges))
+        return nodes, links
 
     def _parse_waypoint_dump(self, dump_text: str) -> List[WaypointNode]:
         """Parse waypoint spawn calls from dump text"""
         nodes = []
 
-        # Match: SpawnSavedWaypoint('X Y Z', traffic, danger);
-        pattern = r"SpawnSavedWaypoint\('([^']+)',\s*([\d.]+),\s*([\d.]+)\)"
-
-        for match in re.finditer(pattern, dump_text):
+        for match in WAYPOINT_PATTERN.finditer(dump_text):
             origin_str, traffic, danger = match.groups()
             x, y, z = map(float, origin_str.split())
 
@@ -110,33 +469,109 @@ class BotMemoryManager:
 
         return nodes
 
-    def save_memory(self, map_data: Dict[str, List[WaypointNode]]):
-        """Save extracted waypoints to JSON"""
+    def save_memory(self, map_data: Dict[str, List[WaypointNode]],
+                    links: Optional[Dict[str, WaypointGraph]] = None):
+        """Save waypoints to the binary memory store (bot_memory/<map>.wpm)
+
+        Each map's links, if given, go to bot_memory/<map>.wpl. With the
+        SQLite backend each map's nodes are recorded as a new session and
+        merged into the database instead.
+        """
+        links = links or {}
         for mapname, nodes in map_data.items():
-            memory_file = self.memory_dir / f"{mapname}.json"
+            if self.db is not None:
+                stats = self.db.merge_session(mapname, nodes, MERGE_THRESHOLD, source=str(self.log_path),
+                                              links=links.get(mapname))
+                print(f"💾 Recorded {len(nodes)} nodes for {mapname} in {DB_FILENAME} "
+                      f"({stats['merged']} merged, {stats['inserted']} inserted)")
+                continue
+
+            memory_file = memory_store.store_path(self.memory_dir, mapname)
 
-            data = {
-                "map": mapname,
-                "last_updated": datetime.now().isoformat(),
-                "total_nodes": len(nodes),
-                "nodes": [asdict(node) for node in nodes]
-            }
+            if isinstance(nodes, WaypointTable):
+                memory_store.write_table(memory_file, mapname, nodes)
+            else:
+                memory_store.write_records(memory_file, mapname, [
+                    (node.origin, node.traffic_score, node.danger_scent,
+                     datetime.fromisoformat(node.last_updated).timestamp(), node.sessions_seen)
+                    for node in nodes
+                ])
 
-            with open(memory_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            if mapname in links:
+                memory_store.write_links(memory_store.links_path(self.memory_dir, mapname), links[mapname])
 
             print(f"💾 Saved {len(nodes)} nodes to {memory_file.name}")
 
-    def load_memory(self, mapname: str) -> List[WaypointNode]:
-        """Load existing waypoint data for a map"""
+    def load_memory(self, mapname: str, as_table: bool = False, mmap: bool = False):
+        """Load existing waypoint data for a map (as a WaypointTable if as_table)
+
+        Reads the binary store, or a legacy JSON file if the map has not
+        been migrated yet. mmap memory-maps the store (tables only).
+        With the SQLite backend the nodes come from the database.
+        """
+        if self.db is not None:
+            return self._load_db_memory(mapname, as_table)
+
+        memory_file = memory_store.store_path(self.memory_dir, mapname)
+
+        if not memory_file.exists():
+            return self._load_json_memory(mapname, as_table)
+
+        if as_table:
+            _, nodes = memory_store.read_table(memory_file, mmap=mmap)
+        else:
+            _, records = memory_store.read_records(memory_file)
+            nodes = [
+                WaypointNode(
+                    origin=origin,
+                    traffic_score=traffic,
+                    danger_scent=danger,
+                    last_updated=datetime.fromtimestamp(updated).isoformat(),
+                    sessions_seen=sessions
+                )
+                for origin, traffic, danger, updated, sessions in records
+            ]
+
+        print(f"📂 Loaded {len(nodes)} existing nodes for {mapname}")
+        return nodes
+
+    def load_links(self, mapname: str, count: int) -> WaypointGraph:
+        """Stored links between a map's `count` stored nodes"""
+        if self.db is not None:
+            return self.db.load_links(mapname)
+        return memory_store.read_links(memory_store.links_path(self.memory_dir, mapname), count)
+
+    def _load_db_memory(self, mapname: str, as_table: bool = False):
+        """Load a map's current nodes from the SQLite backend"""
+        nodes = [
+            WaypointNode(
+                origin=origin,
+                traffic_score=traffic,
+                danger_scent=danger,
+                last_updated=datetime.fromtimestamp(updated).isoformat(),
+                sessions_seen=sessions
+            )
+            for origin, traffic, danger, updated, sessions in self.db.load_nodes(mapname)
+        ]
+
+        print(f"📂 Loaded {len(nodes)} existing nodes for {mapname}")
+        return WaypointTable.from_nodes(nodes) if as_table else nodes
+
+    def _load_json_memory(self, mapname: str, as_table: bool = False):
+        """Load a legacy bot_memory/<map>.json file"""
         memory_file = self.memory_dir / f"{mapname}.json"
 
         if not memory_file.exists():
-            return []
+            return WaypointTable.from_dicts([]) if as_table else []
 
         with open(memory_file, 'r') as f:
             data = json.load(f)
 
+        if as_table:
+            nodes = WaypointTable.from_dicts(data['nodes'])
+            print(f"📂 Loaded {len(nodes)} existing nodes for {mapname} (JSON)")
+            return nodes
+
         nodes = [
             WaypointNode(
                 origin=tuple(n['origin']),
@@ -148,54 +583,100 @@ class BotMemoryManager:
             for n in data['nodes']
         ]
 
-        print(f"📂 Loaded {len(nodes)} existing nodes for {mapname}")
+        print(f"📂 Loaded {len(nodes)} existing nodes for {mapname} (JSON)")
         return nodes
 
+    def export_json(self, mapname: str) -> Optional[Path]:
+        """Write a map's memory as JSON (the pre-binary format) for sharing/inspection"""
+        nodes = self.load_memory(mapname, as_table=tables_available())
+        if not len(nodes):
+            print(f"❌ No memory stored for {mapname}")
+            return None
+
+        if isinstance(nodes, WaypointTable):
+            records = nodes.to_dicts()
+        else:
+            records = [asdict(node) for node in nodes]
+
+        data = {
+            "map": mapname,
+            "last_updated": datetime.now().isoformat(),
+            "total_nodes": len(nodes),
+            "nodes": records
+        }
+
+        json_file = self.memory_dir / f"{mapname}.json"
+        with open(json_file, 'w') as f:
+            json.dump(data, f, indent=2)
+
+        print(f"📤 Exported {len(nodes)} nodes to {json_file.name}")
+        return json_file
+
+    def migrate_json(self):
+        """One-shot conversion of every legacy JSON memory file to the binary store
+
+        Each converted JSON file is kept as <map>.json.bak.
+        """
+        json_files = sorted(self.memory_dir.glob("*.json"))
+        if not json_files:
+            print("✅ Nothing to migrate")
+            return
+
+        migrated = 0
+        for json_file in json_files:
+            mapname = json_file.stem
+            if memory_store.store_path(self.memory_dir, mapname).exists():
+                print(f"⚠️  Skipping {json_file.name}: {mapname}{memory_store.STORE_SUFFIX} already exists")
+                continue
+
+            nodes = self._load_json_memory(mapname, as_table=tables_available())
+            self.save_memory({mapname: nodes})
+            json_file.replace(json_file.with_name(json_file.name + '.bak'))
+            migrated += 1
+
+        print(f"✅ Migrated {migrated} memory file(s)")
+
     def merge_nodes(self, old_nodes: List[WaypointNode], new_nodes: List[WaypointNode]) -> List[WaypointNode]:
         """Merge old and new waypoints with intelligent averaging"""
         print("🔀 Merging waypoint data...")
 
-        # Create spatial index for matching (within 16 units = same node)
-        MERGE_THRESHOLD = 16.0
-        merged = {}
-
-        # Add old nodes to index
-        for node in old_nodes:
-            key = self._spatial_key(node.origin)
-            merged[key] = node
-
-        # Merge or add new nodes
-        for new_node in new_nodes:
-            key = self._spatial_key(new_node.origin)
-
-            if key in merged:
-                # Merge: weighted average favoring recent data
-                old = merged[key]
-                weight_old = 0.6  # Give 60% weight to historical data
-                weight_new = 0.4  # 40% to new session
-
-                merged[key] = WaypointNode(
-                    origin=new_node.origin,  # Use more recent position
-                    traffic_score=old.traffic_score * weight_old + new_node.traffic_score * weight_new,
-                    danger_scent=old.danger_scent * weight_old + new_node.danger_scent * weight_new,
-                    last_updated=datetime.now().isoformat(),
-                    sessions_seen=old.sessions_seen + 1
-                )
-            else:
-                # New node
-                merged[key] = new_node
+        if isinstance(old_nodes, WaypointTable):
+            result, self.merge_stats, placement = old_nodes.merge(new_nodes, MERGE_THRESHOLD)
+            self.merge_placement = placement.tolist()
+        else:
+            # Radius index: nodes within MERGE_THRESHOLD units are the same node
+            index = SpatialMergeIndex((node.origin for node in old_nodes), MERGE_THRESHOLD)
+            result = index.merge(old_nodes, new_nodes, self._combine_nodes, lambda node: node.origin)
+            self.merge_stats = index.stats
+            self.merge_placement = index.placement
 
-        result = list(merged.values())
         print(f"✅ Merged to {len(result)} nodes ({len(old_nodes)} old + {len(new_nodes)} new)")
+        print(f"   {self.merge_stats['merged']} merged, {self.merge_stats['inserted']} inserted, "
+              f"{self.merge_stats['duplicates']} duplicates dropped")
+        self._count_merge()
         return result
 
-    def _spatial_key(self, origin: Tuple[float, float, float]) -> Tuple[int, int, int]:
-        """Create spatial hash key for node proximity matching"""
-        GRID_SIZE = 32  # 32-unit grid cells
-        return (
-            int(origin[0] // GRID_SIZE),
-            int(origin[1] // GRID_SIZE),
-            int(origin[2] // GRID_SIZE)
+    def _count_merge(self):
+        """Add the last merge's statistics to the run's metrics"""
+        tool_metrics.count('nodes_merged', self.merge_stats['merged'])
+        tool_metrics.count('nodes_inserted', self.merge_stats['inserted'])
+        tool_metrics.count('nodes_duplicate', self.merge_stats['duplicates'])
+
+    def merge_links(self, old_links: WaypointGraph, new_links: WaypointGraph, count: int) -> WaypointGraph:
+        """Fold a dump's links into the stored ones, following the last merge_nodes()"""
+        return old_links.update(new_links, self.merge_placement, count)
+
+    def _combine_nodes(self, old: WaypointNode, new_node: WaypointNode) -> WaypointNode:
+        """Merge: weighted average favoring recent data"""
+        weight_old = 0.6  # Give 60% weight to historical data
+        weight_new = 0.4  # 40% to new session
+
+        return WaypointNode(
+            origin=new_node.origin,  # Use more recent position
+            traffic_score=old.traffic_score * weight_old + new_node.traffic_score * weight_new,
+            danger_scent=old.danger_scent * weight_old + new_node.danger_scent * weight_new,
+            last_updated=datetime.now().isoformat(),
+            sessions_seen=old.sessions_seen + 1
         )
 
     def optimize_nodes(self, nodes: List[WaypointNode]) -> List[WaypointNode]:
@@ -205,13 +686,19 @@ class BotMemoryManager:
         initial_count = len(nodes)
 
         # Remove nodes with very low traffic AND low danger (not useful)
-        MIN_TRAFFIC = 5.0
-        MIN_DANGER = 2.0
-
-        optimized = [
-            node for node in nodes
+        if isinstance(nodes, WaypointTable):
+            optimized, kept = nodes.optimize(MIN_TRAFFIC, MIN_DANGER)
+            self.kept_rows = kept.tolist()
+            removed = initial_count - len(optimized)
+            print(f"🗑️  Removed {removed} low-value nodes ({len(optimized)} remain)")
+            tool_metrics.count('nodes_removed', removed)
+            return optimized
+
+        self.kept_rows = [
+            i for i, node in enumerate(nodes)
             if node.traffic_score >= MIN_TRAFFIC or node.danger_scent >= MIN_DANGER
         ]
+        optimized = [nodes[i] for i in self.kept_rows]
 
         # Normalize scores to prevent inflation over many sessions
         if optimized:
@@ -227,63 +714,175 @@ class BotMemoryManager:
 
         removed = initial_count - len(optimized)
         print(f"🗑️  Removed {removed} low-value nodes ({len(optimized)} remain)")
+        tool_metrics.count('nodes_removed', removed)
 
         return optimized
 
-    def generate_qc_file(self, mapname: str, nodes: List[WaypointNode]) -> Path:
-        """Generate production-ready QuakeC file"""
-        print(f"📝 Generating QuakeC code for {mapname}...")
+    def decimate_nodes(self, nodes: List[WaypointNode]) -> List[WaypointNode]:
+        """Cut the set down to the in-game node budget, keeping coverage"""
+        self.kept_rows = list(range(len(nodes)))
+        if not self.budget or len(nodes) <= self.budget:
+            return nodes
 
-        # Calculate statistics
-        avg_traffic = sum(n.traffic_score for n in nodes) / len(nodes) if nodes else 0
-        avg_danger = sum(n.danger_scent for n in nodes) / len(nodes) if nodes else 0
+        print(f"✂️  Decimating {len(nodes)} nodes to a budget of {self.budget}...")
 
-        # Sort by traffic (highways first) for better readability
-        sorted_nodes = sorted(nodes, key=lambda n: n.traffic_score, reverse=True)
-
-        # Generate file content
-        output = []
-        output.append("// ===== AUTO-GENERATED BOT MEMORY =====")
-        output.append(f"// Map: {mapname}")
-        output.append(f"// Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        output.append(f"// Total Nodes: {len(nodes)}")
-        output.append(f"// Avg Traffic: {avg_traffic:.1f}")
-        output.append(f"// Avg Danger: {avg_danger:.1f}")
-        output.append("// Format: SpawnSavedWaypoint(origin, traffic_score, danger_scent)")
-        output.append("")
-        output.append(f"void() Load{mapname.upper()}Memory =")
-        output.append("{")
-
-        # High-traffic nodes first (top 10)
-        if len(sorted_nodes) > 10:
-            output.append("    // === HIGH TRAFFIC ROUTES (Top 10) ===")
-            for node in sorted_nodes[:10]:
-                output.append(node.to_qc())
-            output.append("")
-            output.append("    // === REMAINING NODES ===")
-            for node in sorted_nodes[10:]:
-                output.append(node.to_qc())
+        if isinstance(nodes, WaypointTable):
+            kept, report = node_budget.decimate(nodes.origin_list(), nodes.traffic.tolist(),
+                                                nodes.danger.tolist(), self.budget)
+            decimated = nodes.take(kept)
         else:
-            for node in sorted_nodes:
-                output.append(node.to_qc())
-
-        output.append("};")
-        output.append("// ===== END AUTO-GENERATED =====")
+            kept, report = node_budget.decimate([n.origin for n in nodes],
+                                                [n.traffic_score for n in nodes],
+                                                [n.danger_scent for n in nodes], self.budget)
+            decimated = [nodes[i] for i in kept]
+        self.kept_rows = list(kept)
+        tool_metrics.count('nodes_decimated', len(nodes) - len(kept))
+
+        print(f"   Coverage: {report['covered']:.1%} of nodes within "
+              f"{node_budget.COVERAGE_RADIUS:.0f} units of a kept node "
+              f"(max gap {report['max_gap']:.0f}, mean {report['mean_gap']:.1f})")
+        print(f"   Kept {report['traffic_kept']:.1%} of traffic, {report['danger_kept']:.1%} of danger")
+        return decimated
+
+    def _traffic_order(self, nodes: List[WaypointNode]) -> List[int]:
+        """Node indices by traffic, highest first, ties by origin
+
+        Depends only on the node set, not on the order merges left the
+        nodes in, so the same memory always gives the same files.
+        """
+        if isinstance(nodes, WaypointTable):
+            return nodes.traffic_order().tolist()
+        return sorted(range(len(nodes)), key=lambda i: (-nodes[i].traffic_score, nodes[i].origin))
+
+    def _routes(self, nodes: List[WaypointNode], order: List[int],
+                links: Optional[WaypointGraph]) -> Optional[RouteTable]:
+        """Next-hop tables for links over the nodes taken in `order`"""
+        if links is None or not len(links):
+            return None
+        if len(nodes) > ROUTE_NODE_LIMIT:
+            print(f"⚠️  No route tables: {len(nodes)} nodes is over {ROUTE_NODE_LIMIT} (see --budget)")
+            return None
 
-        # Write to reaper_mre/maps/ directory
-        maps_dir = self.project_root / "reaper_mre" / "maps"
-        maps_dir.mkdir(exist_ok=True)
+        if isinstance(nodes, WaypointTable):
+            origins, danger = nodes.origin_list(), nodes.danger.tolist()
+        else:
+            origins, danger = [n.origin for n in nodes], [n.danger_scent for n in nodes]
+        routes = build_routes(links, [origins[i] for i in order], [danger[i] for i in order])
+        print(f"🧭 Route tables: {routes.connected():.1%} of node pairs connected")
+        return routes
+
+    def generate_qc_file(self, mapname: str, nodes: List[WaypointNode],
+                         links: Optional[WaypointGraph] = None) -> Path:
+        """Generate production-ready QuakeC file (links and routes re-created after the nodes)"""
+        print(f"📝 Generating QuakeC code for {mapname}...")
 
-        qc_file = maps_dir / f"{mapname}_memory.qc"
-        with open(qc_file, 'w') as f:
-            f.write('\n'.join(output))
+        # Sort by traffic (highways first) for better readability
+        order = self._traffic_order(nodes)
+        qc_links = links.subset(order) if links is not None else None
+        link_lines = qc_links.qc_lines() if qc_links is not None else []
+        routes = self._routes(nodes, order, qc_links)
+
+        if isinstance(nodes, WaypointTable):
+            avg_traffic = nodes.traffic.mean() if len(nodes) else 0
+            avg_danger = nodes.danger.mean() if len(nodes) else 0
+            node_lines = nodes.qc_lines(order)
+        else:
+            # Calculate statistics
+            avg_traffic = sum(n.traffic_score for n in nodes) / len(nodes) if nodes else 0
+            avg_danger = sum(n.danger_scent for n in nodes) / len(nodes) if nodes else 0
+            node_lines = [nodes[i].to_qc() for i in order]
+
+        # Stream to reaper_mre/maps/; the file is only replaced when its
+        # content changed: any rewrite looks like a source change and forces a recompile
+        qc_file = self.maps_dir / f"{mapname}_memory.qc"
+        with qc_emitter.write_qc_file(qc_file) as qc:
+            qc.comment("===== AUTO-GENERATED BOT MEMORY =====")
+            qc.comment(f"Map: {mapname}")
+            qc.comment(f"Total Nodes: {len(nodes)}")
+            qc.comment(f"Total Links: {len(link_lines)}")
+            qc.comment(f"Avg Traffic: {avg_traffic:.1f}")
+            qc.comment(f"Avg Danger: {avg_danger:.1f}")
+            qc.comment("Format: SpawnSavedWaypoint(origin, traffic_score, danger_scent)")
+            qc.comment("        SpawnSavedLink(from, to, link_type, usage) (node numbers from 1)")
+            qc.comment("        SpawnSavedRoutes(node, next_hop_slots)")
+            qc.line()
+
+            with qc.loader(f"Load{mapname.upper()}Memory") as body:
+                if link_lines:
+                    body.statement("    saved_node_base = saved_node_count;")
+
+                # High-traffic nodes first (top 10)
+                if len(node_lines) > 10:
+                    body.comment("=== HIGH TRAFFIC ROUTES (Top 10) ===")
+                    body.statements_from(node_lines[:10])
+                    body.blank()
+                    body.comment("=== REMAINING NODES ===")
+                    body.statements_from(node_lines[10:])
+                else:
+                    body.statements_from(node_lines)
+
+                # Learned connectivity, once every node exists
+                if link_lines:
+                    body.blank()
+                    body.comment("=== LEARNED LINKS ===")
+                    body.statements_from(link_lines)
+
+                # Next-hop tables, once every link has its slot
+                if routes is not None:
+                    body.blank()
+                    body.comment("=== ROUTE TABLES ===")
+                    body.statements_from(routes.qc_lines())
+
+            qc.comment("===== END AUTO-GENERATED =====")
+
+        if qc.changed:
+            print(f"✅ Generated {qc_file.name} ({len(nodes)} nodes, {len(link_lines)} links)")
+        else:
+            print(f"⏭️  {qc_file.name} unchanged ({len(nodes)} nodes, {len(link_lines)} links)")
+        tool_metrics.count('qc_files_written' if qc.changed else 'qc_files_unchanged')
 
-        print(f"✅ Generated {qc_file.name} ({len(nodes)} nodes)")
+        self.qc_results[mapname] = {'file': qc_file.name, 'sha256': qc.sha256, 'changed': qc.changed}
         return qc_file
 
+    def generate_data_file(self, mapname: str, nodes: List[WaypointNode],
+                           links: Optional[WaypointGraph] = None) -> Path:
+        """Write the runtime data file the mod loads at map start (no recompile)"""
+        print(f"📝 Writing bot memory data file for {mapname}...")
+
+        # Highways first, as in the QC file: they are spawned in the first batch
+        order = self._traffic_order(nodes)
+        if isinstance(nodes, WaypointTable):
+            blocks = nodes.data_text(order)
+        else:
+            blocks = [waypoint_data.format_node(nodes[i].origin, nodes[i].traffic_score, nodes[i].danger_scent)
+                      for i in order]
+
+        file_links = links.subset(order) if links is not None else None
+        routes = self._routes(nodes, order, file_links)
+        data_file = waypoint_data.write_data_file(waypoint_data.data_path(self.game_dir, mapname),
+                                                  blocks, len(nodes), file_links, routes)
+        print(f"✅ Generated {data_file.name} ({len(nodes)} nodes, "
+              f"{len(file_links) if file_links is not None else 0} links)")
+        return data_file
+
+    def _generate_outputs(self, mapname: str, nodes: List[WaypointNode],
+                          links: Optional[WaypointGraph] = None) -> Path:
+        """Step 6: data file, plus the QC file when requested"""
+        nodes = self.decimate_nodes(nodes)
+        if links is not None:
+            links = links.subset(self.kept_rows)
+        data_file = self.generate_data_file(mapname, nodes, links)
+        if self.emit_qc:
+            self.generate_qc_file(mapname, nodes, links)
+        return data_file
+
     def print_stats(self, mapname: str, nodes: List[WaypointNode]):
         """Print analysis statistics"""
-        if not nodes:
+        if not len(nodes):
+            return
+
+        if isinstance(nodes, WaypointTable):
+            self._print_table_stats(mapname, nodes)
             return
 
         print(f"\n📊 STATISTICS FOR {mapname.upper()}")
@@ -313,49 +912,238 @@ class BotMemoryManager:
 
         print("=" * 50)
 
+    def print_db_stats(self, mapname: str):
+        """print_stats for the SQLite backend, answered by SQL queries"""
+        summary = self.db.summary(mapname)
+        if not summary:
+            return
+
+        print(f"\n📊 STATISTICS FOR {mapname.upper()}")
+        print("=" * 50)
+        print(f"Total Waypoints: {summary['count']}")
+        print(f"Avg Traffic Score: {summary['avg_traffic']:.1f}")
+        print(f"Avg Danger Scent: {summary['avg_danger']:.1f}")
+
+        # Top 5 highways
+        print("\n🛣️  TOP 5 HIGHWAYS (Most Traveled):")
+        for i, (traffic, origin) in enumerate(summary['top_traffic'], 1):
+            print(f"  {i}. Traffic: {traffic:5.1f} at {origin}")
+
+        # Top 5 danger zones
+        print("\n☠️  TOP 5 DANGER ZONES (Most Deaths):")
+        for i, (danger, origin) in enumerate(summary['top_danger'], 1):
+            print(f"  {i}. Danger: {danger:5.1f} at {origin}")
+
+        # Multi-session nodes
+        if summary['veterans']:
+            print(f"\n🎖️  VETERAN NODES: {summary['veterans']} nodes seen in multiple sessions")
+            print(f"   Max sessions: {summary['max_sessions']}")
+
+        print(f"\n🗂️  SESSIONS RECORDED: {summary['sessions']}")
+        print("=" * 50)
+
+    def print_node_history(self, mapname: str, origin: Tuple[float, float, float]):
+        """Print how one node's observed traffic/danger evolved (SQLite backend)"""
+        history = self.db.node_history(mapname, origin, MERGE_THRESHOLD)
+        if not history:
+            print(f"❌ No node within {MERGE_THRESHOLD:.0f} units of {origin} on {mapname}")
+            return
+
+        print(f"\n📈 HISTORY FOR NODE NEAR {origin} ON {mapname.upper()}")
+        print("=" * 50)
+        for recorded_at, traffic, danger in history:
+            when = datetime.fromtimestamp(recorded_at).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"  {when}  Traffic: {traffic:5.1f}  Danger: {danger:5.1f}")
+        print("=" * 50)
+
+    def _print_table_stats(self, mapname: str, table: WaypointTable):
+        """print_stats for a WaypointTable"""
+        print(f"\n📊 STATISTICS FOR {mapname.upper()}")
+        print("=" * 50)
+        print(f"Total Waypoints: {len(table)}")
+        print(f"Avg Traffic Score: {table.traffic.mean():.1f}")
+        print(f"Avg Danger Scent: {table.danger.mean():.1f}")
+
+        # Top 5 highways
+        top = table.ranked('traffic')[:5]
+        print("\n🛣️  TOP 5 HIGHWAYS (Most Traveled):")
+        for i, (traffic, origin) in enumerate(zip(table.traffic[top], table.take(top).origin_list()), 1):
+            print(f"  {i}. Traffic: {traffic:5.1f} at {tuple(origin)}")
+
+        # Top 5 danger zones
+        top = table.ranked('danger')[:5]
+        print("\n☠️  TOP 5 DANGER ZONES (Most Deaths):")
+        for i, (danger, origin) in enumerate(zip(table.danger[top], table.take(top).origin_list()), 1):
+            print(f"  {i}. Danger: {danger:5.1f} at {tuple(origin)}")
+
+        # Multi-session nodes
+        veterans = table.sessions_seen[table.sessions_seen > 1]
+        if len(veterans):
+            print(f"\n🎖️  VETERAN NODES: {len(veterans)} nodes seen in multiple sessions")
+            print(f"   Max sessions: {veterans.max()}")
+
+        print("=" * 50)
+
     def run_auto_pipeline(self):
         """Run complete extraction → merge → optimize → generate pipeline"""
         print("\n🚀 STARTING AUTOMATED BOT MEMORY PIPELINE")
         print("=" * 60)
 
         # Step 1: Extract
-        extracted = self.extract_from_log()
+        with tool_metrics.stage('extract'):
+            extracted = self.extract_from_log()
         if not extracted:
-            print("❌ No data to process. Run 'impulse 100' in-game first.")
+            print("❌ No data to process. Run 'impulse 99' in-game first.")
             return
 
-        for mapname, new_nodes in extracted.items():
-            print(f"\n📍 Processing map: {mapname}")
+        self.process_maps(extracted)
 
-            # Step 2: Load existing
-            old_nodes = self.load_memory(mapname)
+    def process_maps(self, extracted: Dict[str, Tuple[List[WaypointNode], WaypointGraph]]):
+        """Run process_map for every extracted map, in parallel when there are several
 
-            # Step 3: Merge
-            if old_nodes:
+        Each map's pipeline touches only that map's files, so maps run in
+        a process pool; their output is printed in map order. The SQLite
+        backend has a single database, so its maps run one after another.
+        """
+        if len(extracted) == 1 or self.db is not None or self.jobs == 1:
+            for mapname, (new_nodes, new_links) in extracted.items():
+                self.process_map(mapname, new_nodes, new_links)
+        else:
+            workers = min(len(extracted), self.jobs or os.cpu_count() or 1)
+            print(f"\n🗺️  Processing {len(extracted)} maps with {workers} workers")
+            options = self.options()
+            with tool_metrics.stage('maps'), ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(process_map_worker, self.project_root, options, mapname, new_nodes, new_links)
+                           for mapname, (new_nodes, new_links) in extracted.items()]
+                for future in futures:
+                    _, output, counters, qc_results = future.result()
+                    print(output, end='')
+                    for name, amount in counters.items():
+                        tool_metrics.count(name, amount)
+                    self.qc_results.update(qc_results)
+
+        self._report_qc()
+
+    def _report_qc(self):
+        """Update the QC manifest with the files generated since the last report"""
+        if self.qc_results:
+            update_qc_manifest(self.maps_dir, self.qc_results)
+            self.qc_results = {}
+
+    def process_map(self, mapname: str, new_nodes: List[WaypointNode],
+                    new_links: Optional[WaypointGraph] = None) -> Path:
+        """Run load → merge → optimize → save → generate for one map's dump
+
+        new_links are the dump's links over new_nodes; they follow the nodes
+        through every stage.
+        """
+        print(f"\n📍 Processing map: {mapname}")
+
+        if new_links is None:
+            new_links = WaypointGraph.empty(len(new_nodes))
+
+        if self.db is not None:
+            data_file = self._process_map_db(mapname, new_nodes, new_links)
+            self._print_pipeline_complete(mapname, data_file, self.memory_dir / DB_FILENAME)
+            return data_file
+
+        # Columnar NumPy path when available (same results, far less memory)
+        use_tables = tables_available()
+        if use_tables:
+            new_nodes = WaypointTable.from_nodes(new_nodes)
+
+        # Step 2: Load existing
+        with tool_metrics.stage('load'):
+            old_nodes = self.load_memory(mapname, as_table=use_tables)
+
+        # Step 3: Merge
+        with tool_metrics.stage('merge'):
+            if len(old_nodes):
                 merged = self.merge_nodes(old_nodes, new_nodes)
+                links = self.merge_links(self.load_links(mapname, len(old_nodes)), new_links, len(merged))
             else:
                 merged = new_nodes
+                links = new_links
                 print("🆕 First-time extraction (no existing data)")
 
-            # Step 4: Optimize
+        # Step 4: Optimize
+        with tool_metrics.stage('optimize'):
             optimized = self.optimize_nodes(merged)
+            links = links.subset(self.kept_rows)
 
-            # Step 5: Save
-            self.save_memory({mapname: optimized})
+        # Step 5: Save
+        with tool_metrics.stage('save'):
+            self.save_memory({mapname: optimized}, {mapname: links})
 
-            # Step 6: Generate QC
-            qc_file = self.generate_qc_file(mapname, optimized)
+        # Step 6: Generate data file (and QC)
+        with tool_metrics.stage('generate'):
+            data_file = self._generate_outputs(mapname, optimized, links)
 
-            # Step 7: Stats
+        # Step 7: Stats
+        with tool_metrics.stage('stats'):
             self.print_stats(mapname, optimized)
 
-            print(f"\n✅ PIPELINE COMPLETE FOR {mapname}")
-            print(f"📁 QuakeC file: {qc_file}")
-            print(f"📁 JSON backup: {self.memory_dir / f'{mapname}.json'}")
-            print("\nNext steps:")
-            print(f"  1. Add to progs.src: maps/{mapname}_memory.qc")
-            print(f"  2. Call from worldspawn: if (mapname == \"{mapname}\") Load{mapname.upper()}Memory();")
-            print(f"  3. Recompile and test!")
+        self._print_pipeline_complete(mapname, data_file, memory_store.store_path(self.memory_dir, mapname))
+        return data_file
+
+    def _process_map_db(self, mapname: str, new_nodes: List[WaypointNode], new_links: WaypointGraph) -> Path:
+        """process_map for the SQLite backend: merge and optimize happen in SQL"""
+        # Steps 2-3: Record session + indexed merge
+        with tool_metrics.stage('merge'):
+            if self.db.map_id(mapname) is None:
+                print("🆕 First-time extraction (no existing data)")
+            else:
+                print("🔀 Merging waypoint data...")
+
+            self.merge_stats = self.db.merge_session(mapname, new_nodes, MERGE_THRESHOLD,
+                                                     source=str(self.log_path), links=new_links)
+            print(f"✅ Recorded session: {self.merge_stats['merged']} merged, "
+                  f"{self.merge_stats['inserted']} inserted, {self.merge_stats['duplicates']} duplicates dropped")
+            self._count_merge()
+
+        # Step 4: Optimize
+        with tool_metrics.stage('optimize'):
+            print("⚙️  Optimizing waypoint data...")
+            removed, remaining = self.db.optimize(mapname, MIN_TRAFFIC, MIN_DANGER)
+            print(f"🗑️  Removed {removed} low-value nodes ({remaining} remain)")
+            tool_metrics.count('nodes_removed', removed)
+
+        # Step 6: Generate data file (and QC)
+        with tool_metrics.stage('load'):
+            nodes = self.load_memory(mapname, as_table=tables_available())
+            links = self.db.load_links(mapname)
+        with tool_metrics.stage('generate'):
+            data_file = self._generate_outputs(mapname, nodes, links)
+
+        # Step 7: Stats
+        with tool_metrics.stage('stats'):
+            self.print_db_stats(mapname)
+
+        return data_file
+
+    def _print_pipeline_complete(self, mapname: str, data_file: Path, store: Path):
+        print(f"\n✅ PIPELINE COMPLETE FOR {mapname}")
+        print(f"📁 Data file: {data_file}")
+        print(f"📁 Memory store: {store}")
+        print("\nNext steps:")
+        print(f"  1. Restart the map - LoadBotMemory() reads the data file at map start")
+        print(f"     (needs an engine with FRIK_FILE, e.g. QuakeSpasm-Spiked or FTEQW; no recompile)")
+        if self.emit_qc:
+            print(f"  2. Plain QuakeSpasm: add maps/{mapname}_memory.qc to progs.src, call")
+            print(f"     Load{mapname.upper()}Memory() from worldspawn and recompile")
+
+    def follow_log(self):
+        """Tail the log live, running the pipeline for each dump as it completes"""
+        print(f"👀 Following {self.log_path} (Ctrl+C to stop)")
+
+        try:
+            for mapname, new_nodes, new_links in self.scan_dumps(self.reader.follow(), self.reader):
+                print(f"\n📥 New waypoint dump for '{mapname}' ({len(new_nodes)} nodes, {len(new_links)} links)")
+                self.process_map(mapname, new_nodes, new_links)
+                self._report_qc()
+                self.reader.save()
+        except KeyboardInterrupt:
+            print("\n🛑 Stopped following log")
 
 
 def main():
@@ -364,24 +1152,86 @@ def main():
         print(__doc__)
         return
 
-    command = sys.argv[1].lower()
+    parser = argparse.ArgumentParser(description="Bot memory extraction and persistence pipeline")
+    parser.add_argument("command", help="auto, extract, stats, history, export, or migrate")
+    parser.add_argument("mapname", nargs="?", default="dm4", help="map for the stats/export commands")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only read log data appended since the previous run")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep tailing the log and process each dump as it is written")
+    parser.add_argument("--checkpoint", help="checkpoint file for --incremental/--follow "
+                                             "(default: next to the log)")
+    parser.add_argument("--backend", choices=["wpm", "sqlite"], default="wpm",
+                        help="memory storage: per-map .wpm files, or bot_memory.db with session history")
+    parser.add_argument("--origin", help="node position for the history command, e.g. \"-272 160 -152\"")
+    parser.add_argument("--qc", action="store_true",
+                        help="also write compiled-in <map>_memory.qc files (engines without FRIK_FILE)")
+    parser.add_argument("--game-dir", type=Path,
+                        help="mod directory for data/maps/<map>.wpt (default: launch/quake-spasm/reaper_mre)")
+    parser.add_argument("--budget", type=int, default=node_budget.DEFAULT_NODE_BUDGET,
+                        help="most nodes written for the game; extra nodes are decimated "
+                             "keeping map coverage (0 = no limit)")
+    parser.add_argument("--jobs", type=int,
+                        help="worker processes when a log holds several maps (default: one per CPU)")
+    parse_cache.add_arguments(parser)
+    tool_metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    with tool_metrics.session("bot_memory_manager", args):
+        run_command(args)
+
+
+def run_command(args):
+    """Run the command given on the command line"""
+    command = args.command.lower()
     project_root = Path(__file__).parent.parent  # tools/ -> root
 
-    manager = BotMemoryManager(project_root)
+    manager = BotMemoryManager(project_root, backend=args.backend)
+    manager.emit_qc = args.qc
+    manager.budget = args.budget
+    manager.cache = parse_cache.from_args(args)
+    manager.jobs = args.jobs
+    if args.game_dir:
+        manager.game_dir = args.game_dir
+
+    if args.incremental or args.follow:
+        if not manager.log_path.exists():
+            print(f"❌ Log file not found: {manager.log_path}")
+            return
+        manager.reader = IncrementalLogReader(manager.log_path, args.checkpoint, tool="bot_memory_manager")
 
-    if command == "auto":
+    if args.follow:
+        manager.follow_log()
+    elif command == "auto":
         manager.run_auto_pipeline()
+        if manager.reader:
+            manager.reader.save()
     elif command == "extract":
-        data = manager.extract_from_log()
+        with tool_metrics.stage('extract'):
+            data = manager.extract_from_log()
         if data:
-            manager.save_memory(data)
+            with tool_metrics.stage('save'):
+                manager.save_memory({mapname: nodes for mapname, (nodes, _) in data.items()},
+                                    {mapname: links for mapname, (_, links) in data.items()})
+        if manager.reader:
+            manager.reader.save()
+    elif command == "stats" and manager.db is not None:
+        manager.print_db_stats(args.mapname)
+    elif command == "history":
+        if manager.db is None or not args.origin:
+            print("❌ history needs --backend sqlite and --origin \"X Y Z\"")
+            return
+        manager.print_node_history(args.mapname, tuple(float(v) for v in args.origin.split()))
     elif command == "stats":
-        mapname = sys.argv[2] if len(sys.argv) > 2 else "dm4"
-        nodes = manager.load_memory(mapname)
-        manager.print_stats(mapname, nodes)
+        nodes = manager.load_memory(args.mapname, as_table=tables_available(), mmap=True)
+        manager.print_stats(args.mapname, nodes)
+    elif command == "export":
+        manager.export_json(args.mapname)
+    elif command == "migrate":
+        manager.migrate_json()
     else:
         print(f"Unknown command: {command}")
-        print("Use: auto, extract, or stats")
+        print("Use: auto, extract, stats, history, export, or migrate")
 
 
 if __name__ == "__main__":
@@ -1,13 +1,24 @@
 #!/usr/bin/env python3
 import re
 
-# Read the qconsole.log
-with open(r'c:\reaperai\launch\quake-spasm\qconsole.log', 'r') as f:
-    lines = f.readlines()
-
-# Extract all SpawnSavedWaypoint lines
+import qc_emitter
+import waypoint_data
+import waypoint_graph
+import waypoint_routes
+from log_reader import read_last_block
+
+# Read the latest complete dump from the tail of qconsole.log
+dump = read_last_block(r'c:\reaperai\launch\quake-spasm\qconsole.log')
+if dump is None:
+    raise SystemExit("No complete waypoint dump found in qconsole.log")
+
+# Extract all SpawnSavedWaypoint lines (and the learned links between them)
 waypoints = []
-for line in lines:
+nodes = waypoint_data.parse_spawn_calls(dump)
+graph = waypoint_graph.WaypointGraph.from_edges(len(nodes), waypoint_graph.parse_link_calls(dump))
+routes = waypoint_routes.build_routes(graph, [origin for origin, _, _ in nodes], [danger for _, _, danger in nodes])
+links = graph.qc_lines()
+for line in dump.splitlines():
     if 'SpawnSavedWaypoint' in line:
         # Extract the SpawnSavedWaypoint call
         match = re.search(r"SpawnSavedWaypoint\([^)]+\)", line)
@@ -21,28 +32,31 @@ for line in lines:
             wp = wp.replace(", ')", ', "")')
             waypoints.append(wp)
 
-# Get the last 452 waypoints (the latest complete dump)
-waypoints = waypoints[-452:]
+# Stream the dm4.qc file
+with qc_emitter.write_qc_file(r'c:\reaperai\reaper_mre\maps\dm4.qc') as qc:
+    qc.comment(f"===== DM4 WAYPOINTS ({len(waypoints)} nodes - merged from gameplay) =====")
+    qc.comment("Generated from bot navigation data - PHASE 7: Active Projectile Dodging")
+    qc.comment("Expanded from 343 base waypoints + 109 discovered routes during Phase 7 testing")
+    qc.comment("Format: SpawnSavedWaypoint(origin, traffic_score, danger_scent, target)")
+    qc.line()
 
-# Generate the dm4.qc file
-output = """// ===== DM4 WAYPOINTS (452 nodes - merged from gameplay) =====
-// Generated from bot navigation data - PHASE 7: Active Projectile Dodging
-// Expanded from 343 base waypoints + 109 discovered routes during Phase 7 testing
-// Format: SpawnSavedWaypoint(origin, traffic_score, danger_scent, target)
+    with qc.loader("LoadMapWaypoints_dm4") as body:
+        if links:
+            body.statement("    saved_node_base = saved_node_count;")
 
-void() LoadMapWaypoints_dm4 =
-{
-"""
+        body.statements_from(f"    {wp};" for wp in waypoints)
 
-for wp in waypoints:
-    output += f"    {wp};\n"
+        # Links in graph order: the slot order the next-hop tables refer to
+        body.statements_from(links)
 
-output += """};
-// ===== END DM4 WAYPOINTS =====
-"""
+        if routes is not None:
+            body.statements_from(routes.qc_lines())
 
-# Write to dm4.qc
-with open(r'c:\reaperai\reaper_mre\maps\dm4.qc', 'w') as f:
-    f.write(output)
+    qc.comment("===== END DM4 WAYPOINTS =====")
 
 print(f"Generated dm4.qc with {len(waypoints)} waypoints")
+
+# Runtime data file, loaded at map start without a recompile (FRIK_FILE engines)
+count = waypoint_data.write_nodes(r'c:\reaperai\launch\quake-spasm\reaper_mre\data\maps\dm4.wpt',
+                                  nodes, waypoint_graph.parse_link_calls(dump))
+print(f"Generated dm4.wpt with {count} waypoints")
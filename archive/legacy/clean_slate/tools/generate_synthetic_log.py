@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Synthetic qconsole.log Generator for Modern Reaper Enhancements (MRE)
+Writes realistic, reproducible bot logs for benchmarking the tools.
+
+Usage:
+    python generate_synthetic_log.py <output_file> [--size 100MB] [--seed 1]
+    python generate_synthetic_log.py bench.log --size 1GB --maps dm2 dm4 dm6
+    python generate_synthetic_log.py rj.log --size 115MB --mix rj    # ~10^6 RJ markers
+
+The log mimics a long -condebug server session: map changes (SpawnServer),
+bot decision lines ([Bot] TARGET/GOAL/WEAPON/HEAR/COMBO/STUCK/UNSTUCK/
+HAZARD/FIXATE) in the formats the QuakeC prints them, kill/death lines,
+player observation PLAYER_RJ_DAMAGE markers and periodic impulse 99
+waypoint dumps between CUT HERE markers. Each map keeps a stable set of
+waypoints and links between dumps (traffic and link usage grow, positions
+jitter slightly), so the merge pipeline sees realistic overlap. The 'rj' mix
+is mostly PLAYER_RJ_DAMAGE markers and timed deaths, for scaling
+learn_rj_from_player.py to millions of events.
+
+The same seed and options always produce the same bytes.
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from log_reader import DUMP_START, DUMP_END
+
+BOT_NAMES = ["Hater", "Drooly", "Derang", "Assmunch", "Dragon", "Visor",
+             "Sarge", "Ranger", "Grunt", "Phobos", "Xaero", "Anarki"]
+
+GOAL_CLASSES = ["item_armor2", "item_armorInv", "item_health", "item_rockets",
+                "item_shells", "item_cells", "weapon_rocketlauncher", "weapon_lightning",
+                "weapon_supershotgun", "weapon_grenadelauncher", "item_artifact_super_damage"]
+
+WEAPONS = ["SG", "SSG", "NG", "SNG", "GL", "RL", "LG"]
+
+DEFAULT_MAPS = ["dm2", "dm3", "dm4", "dm6"]
+
+# Relative frequency of each line kind in a match
+LINE_MIX = {
+    'target': 30,
+    'goal': 22,
+    'noise': 20,
+    'weapon': 6,
+    'hear': 6,
+    'death': 5,
+    'hazard': 3,
+    'combo': 2,
+    'stuck': 2,
+    'unstuck': 1,
+    'fixate': 1,
+    'rj': 2,
+}
+
+# Rocket-jump practice: what learn_rj_from_player.py reads, and little else
+RJ_LINE_MIX = {
+    'rj': 90,
+    'death': 5,
+    'noise': 5,
+}
+
+LINE_MIXES = {'default': LINE_MIX, 'rj': RJ_LINE_MIX}
+
+# Engine chatter between bot decisions
+NOISE_LINES = [
+    "Hater got the Mega Health",
+    "You got the rockets",
+    "Drooly ate a rocket",
+    "Sarge was telefragged by Grunt",
+    "R_AllocBlock: full",
+    "Player entered the game",
+    "Ranger rides Visor's rocket",
+]
+
+# Waypoint dumps: nodes per map and log bytes between dumps
+DUMP_NODES = 450
+DUMP_INTERVAL = 8 * 1024 * 1024
+
+# Relative frequency of each LINK_* type (walk, jump, drop, plat, tele,
+# rocketjump, ladder) among the links in a dump
+LINK_TYPE_MIX = (80, 8, 6, 2, 1, 2, 1)
+
+# Log bytes played on a map before the server changes level
+MAP_INTERVAL = 32 * 1024 * 1024
+
+WRITE_BLOCK_LINES = 4096
+
+SIZE_PATTERN = re.compile(r'^\s*([\d.]+)\s*([KMGT]?)I?B?\s*$', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(text: str) -> int:
+    """Parse '1MB', '500k', '10GB' or a plain byte count"""
+    match = SIZE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"invalid size: {text!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def _vec(v) -> str:
+    """Vector formatted like QuakeC vtos()"""
+    return f"'{v[0]:.1f} {v[1]:.1f} {v[2]:.1f}'"
+
+
+class SyntheticLog:
+    """Seeded line source for a synthetic server session"""
+
+    def __init__(self, seed: int = 1, maps: List[str] = None, bots: int = 8, mix: str = 'default'):
+        self.rng = random.Random(seed)
+        self.maps = maps or DEFAULT_MAPS
+        self.bots = BOT_NAMES[:max(1, min(bots, len(BOT_NAMES)))]
+        self.time = 0.0
+        self.map_index = -1  # change_map() moves to the first map
+        self.map_nodes = {}
+        self.map_links = {}
+
+        self.kinds = list(LINE_MIXES[mix])
+        self.weights = [LINE_MIXES[mix][k] for k in self.kinds]
+
+        # Per-bot state, so switches and repeats look like real play
+        self.current_target = {bot: "None visible" for bot in self.bots}
+        self.current_goal = {bot: None for bot in self.bots}
+
+        self.stats = {'lines': 0, 'bytes': 0, 'dumps': 0, 'rj_events': 0, 'maps': 0}
+
+    @property
+    def mapname(self) -> str:
+        return self.maps[self.map_index % len(self.maps)]
+
+    def change_map(self) -> List[str]:
+        self.map_index += 1
+        self.stats['maps'] += 1
+        return ["", f"SpawnServer: {self.mapname}", f"Map: {self.mapname}", ""]
+
+    def _nodes(self):
+        """Stable waypoint set for the current map"""
+        nodes = self.map_nodes.get(self.mapname)
+        if nodes is None:
+            rng = random.Random(f"{self.mapname}-nodes")
+            nodes = [[(rng.uniform(-2048, 2048), rng.uniform(-2048, 2048), rng.uniform(-512, 512)),
+                      rng.uniform(0, 20), rng.uniform(0, 5)] for _ in range(DUMP_NODES)]
+            # 1-3 links per node along the bots' routes, mostly plain walking
+            self.map_links[self.mapname] = [
+                [src, (src + rng.randint(1, 8)) % DUMP_NODES,
+                 rng.choices(range(len(LINK_TYPE_MIX)), LINK_TYPE_MIX)[0], rng.uniform(1, 10)]
+                for src in range(DUMP_NODES) for _ in range(rng.randint(1, 3))]
+            self.map_nodes[self.mapname] = nodes
+        return nodes
+
+    def dump(self) -> List[str]:
+        """An impulse 99 waypoint dump for the current map"""
+        rng = self.rng
+        lines = ["", DUMP_START,
+                 "// Format: SpawnSavedWaypoint(origin, traffic_score, danger_scent)",
+                 "//         SpawnSavedLink(from, to, link_type, usage)",
+                 "void() LoadMapWaypoints =", "{"]
+        total_traffic = total_danger = 0.0
+
+        for node in self._nodes():
+            (x, y, z), traffic, danger = node
+            # Bots revisit known spots; traffic builds up, danger fades
+            node[1] = traffic + rng.uniform(0, 2)
+            node[2] = max(0.0, danger + rng.uniform(-0.5, 0.5))
+            origin = (x + rng.uniform(-4, 4), y + rng.uniform(-4, 4), z)
+            lines.append(f"    SpawnSavedWaypoint({_vec(origin)}, {node[1]:.1f}, {node[2]:.1f});")
+            total_traffic += node[1]
+            total_danger += node[2]
+
+        # A few new spots discovered this session
+        for _ in range(rng.randint(0, 10)):
+            origin = (rng.uniform(-2048, 2048), rng.uniform(-2048, 2048), rng.uniform(-512, 512))
+            lines.append(f"    SpawnSavedWaypoint({_vec(origin)}, 1.0, 0.0);")
+
+        count = len(lines) - 6
+        for link in self.map_links[self.mapname]:
+            link[3] += rng.uniform(0, 1)
+            lines.append(f"    SpawnSavedLink({link[0] + 1}, {link[1] + 1}, {link[2]}, {link[3]:.1f});")
+
+        lines += ["};", DUMP_END, f"// Total Nodes: {count}",
+                  f"// Avg Traffic Score: {total_traffic / count:.1f}",
+                  f"// Avg Danger Scent: {total_danger / count:.1f}", ""]
+        self.stats['dumps'] += 1
+        return lines
+
+    def line(self, kind: str) -> str:
+        rng = self.rng
+        bot = rng.choice(self.bots)
+        self.time += rng.uniform(0.0, 0.1)
+
+        if kind == 'target':
+            if rng.random() < 0.35:
+                target = "None visible"
+            elif rng.random() < 0.6:
+                target = self.current_target[bot]  # Still tracking the same enemy
+                if target == "None visible":
+                    target = rng.choice(self.bots)
+            else:
+                target = rng.choice(self.bots)
+            self.current_target[bot] = target
+            if target == "None visible":
+                return f"[{bot}] TARGET: None visible"
+            return (f"[{bot}] TARGET: {target} (score={rng.uniform(0, 30):.1f}, "
+                    f"HP={rng.randint(1, 200)}, dist={rng.uniform(64, 2048):.1f}u)")
+
+        if kind == 'goal':
+            goal = self.current_goal[bot]
+            if goal is None or rng.random() < 0.4:
+                goal = (f"{rng.choice(GOAL_CLASSES)} (score={rng.uniform(0, 500):.1f}, "
+                        f"dist={rng.uniform(32, 3000):.1f}u)")
+                self.current_goal[bot] = goal
+            return f"[{bot}] GOAL: {goal}"
+
+        if kind == 'weapon':
+            if rng.random() < 0.1:
+                return f"[{bot}] WEAPON: GL → {rng.choice(['SSG', 'SNG', 'LG'])} (GL-suicide-prevent)"
+            old, new = rng.sample(WEAPONS, 2)
+            return f"[{bot}] WEAPON: {old} → {new} (tactical)"
+
+        if kind == 'hear':
+            return f"[{bot}] HEAR: {rng.choice(self.bots)} (weapon-fire)"
+
+        if kind == 'combo':
+            if rng.random() < 0.5:
+                return f"[{bot}] COMBO: RL → LG (Juggler shaft-combo)"
+            return f"[{bot}] COMBO: RL → SSG (Juggler burst-combo)"
+
+        if kind == 'stuck':
+            return f"[{bot}] STUCK: Desperate escape (count={rng.randint(3, 12)})"
+
+        if kind == 'unstuck':
+            return f"[{bot}] UNSTUCK: {rng.choice(['Train surf', 'Rocket jump', 'Super jump'])} escape"
+
+        if kind == 'hazard':
+            return f"[{bot}] HAZARD: " + rng.choice(["Edge Catch (soft stop)", "Blocked jump (unsafe landing)",
+                                                    "Blocked jump (no landing, soft stop)"])
+
+        if kind == 'fixate':
+            return f"[{bot}] FIXATE: Avoid goal {rng.choice(GOAL_CLASSES)}"
+
+        if kind == 'death':
+            if rng.random() < 0.2:
+                return f"[{self.time:.2f}] Player died in {rng.choice(['slime', 'lava', 'the void'])}"
+            return f"{bot} died"
+
+        if kind == 'rj':
+            origin = (rng.uniform(-2048, 2048), rng.uniform(-2048, 2048), rng.uniform(-512, 512))
+            velocity = (rng.uniform(-300, 300), rng.uniform(-300, 300), rng.uniform(-100, 700))
+            angles = (rng.uniform(-90, 30), rng.uniform(0, 360), 0.0)
+            return (f"PLAYER_RJ_DAMAGE: {_vec(origin)} | dmg={rng.uniform(10, 90):.1f} | "
+                    f"vel={_vec(velocity)} | ang={_vec(angles)} | time={self.time:.2f}")
+
+        return rng.choice(NOISE_LINES)
+
+    def blocks(self, size: int):
+        """Yield blocks of log text until about `size` bytes have been produced"""
+        rng = self.rng
+        written = 0
+        next_dump = DUMP_INTERVAL
+        next_map = MAP_INTERVAL
+
+        block = self.change_map()
+        while written < size:
+            for kind in rng.choices(self.kinds, self.weights, k=WRITE_BLOCK_LINES):
+                block.append(self.line(kind))
+
+            if written >= next_dump:
+                block.extend(self.dump())
+                next_dump += DUMP_INTERVAL
+            if written >= next_map:
+                # Dump before leaving the map, as a player would
+                block.extend(self.dump())
+                block.extend(self.change_map())
+                next_dump = written + DUMP_INTERVAL
+                next_map += MAP_INTERVAL
+
+            encoded = ("\n".join(block) + "\n").encode('utf-8')
+            block = []
+            if written + len(encoded) > size:
+                # Trim the last block to the target size, on a line boundary
+                encoded = encoded[:encoded.rfind(b"\n", 0, size - written) + 1]
+
+            written += len(encoded)
+            self.stats['lines'] += encoded.count(b"\n")
+            self.stats['rj_events'] += encoded.count(b"PLAYER_RJ_DAMAGE")
+            yield encoded
+            if not encoded:
+                break
+
+        # Every session ends with a dump so the memory tools always find one
+        tail = ("\n".join(self.dump()) + "\n").encode('utf-8')
+        self.stats['lines'] += tail.count(b"\n")
+        written += len(tail)
+        yield tail
+
+        self.stats['bytes'] = written
+
+
+def generate_log(output_file, size: int, seed: int = 1, maps: List[str] = None,
+                 bots: int = 8, mix: str = 'default') -> dict:
+    """Write a synthetic log of about `size` bytes and return its stats"""
+    log = SyntheticLog(seed, maps, bots, mix)
+    with open(output_file, 'wb') as f:
+        for block in log.blocks(size):
+            f.write(block)
+    return log.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a reproducible synthetic qconsole.log for benchmarks",
+        epilog="Example: python generate_synthetic_log.py bench.log --size 100MB --seed 7")
+    parser.add_argument("output_file", help="log file to write")
+    parser.add_argument("--size", default="10MB", help="approximate size, e.g. 1MB, 500MB, 10GB "
+                                                       "(default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: %(default)s)")
+    parser.add_argument("--maps", nargs="+", default=DEFAULT_MAPS, help="maps to cycle through")
+    parser.add_argument("--bots", type=int, default=8, help="bots in the match (default: %(default)s)")
+    parser.add_argument("--mix", choices=sorted(LINE_MIXES), default='default',
+                        help="line kinds: a full match, or mostly rocket jumps (default: %(default)s)")
+    args = parser.parse_args()
+
+    try:
+        size = parse_size(args.size)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    stats = generate_log(Path(args.output_file), size, args.seed, args.maps, args.bots, args.mix)
+    elapsed = time.perf_counter() - start
+
+    print(f"Wrote {args.output_file}: {stats['bytes'] / 1024 / 1024:.1f} MB, {stats['lines']} lines, "
+          f"{stats['dumps']} waypoint dumps, {stats['rj_events']} RJ markers, "
+          f"{stats['maps']} maps ({elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,8 @@ Rocket Jump Learning Tool for Modern Reaper Enhancements
 Analyzes player observation logs to extract validated rocket jump techniques.
 
 Usage:
-    python learn_rj_from_player.py <log_file> <map_name> [output_file]
+    python learn_rj_from_player.py <log_file> <map_name> [output_file] [--incremental]
+                                   [--metrics FILE] [--profile FILE] [--no-cache]
 
 Example:
     python learn_rj_from_player.py ../launch/quake-spasm/qconsole.log dm2
@@ -24,10 +25,31 @@ Detection Criteria:
     - Pitch angle ~-45 to -90 degrees (downward shot)
 """
 
+import argparse
+import bisect
+from array import array
+import math
 import re
 import sys
+from collections import defaultdict
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Optional: vectorised validation
+
+import parse_cache
+import qc_emitter
+import tool_metrics
+from log_reader import IncrementalLogReader, map_log, matching_lines
+
+# Parse cache entry kind; bump when parse_rj_log changes
+RJ_CACHE_KIND = "rj-1"
+
+# Doubles per event in a cache entry: origin, damage, velocity, angles, timestamp
+RJ_RECORD_SIZE = 11
 
 
 class RocketJumpEvent:
@@ -58,17 +80,59 @@ def parse_vector(vector_str: str) -> tuple:
         return (0.0, 0.0, 0.0)
 
 
+def read_new_log_text(reader: IncrementalLogReader) -> str:
+    """
+    Return the log text appended since the reader's checkpoint.
+
+    A PLAYER_RJ_DAMAGE record may wrap onto a second line ("ang=..."); if the
+    new data ends inside such a record, the reader is rewound so the whole
+    record is read next time.
+    """
+    lines = []
+    last_start = 0
+    for line in reader.lines():
+        lines.append(line)
+        last_start = reader.line_start
+
+    if lines and 'PLAYER_RJ_DAMAGE' in lines[-1] and 'time=' not in lines[-1]:
+        reader.rewind(last_start)
+        lines.pop()
+
+    return "".join(lines)
+
+
+# Pattern: PLAYER_RJ_DAMAGE: '1234.5 678.9 12.3' | dmg=45.0 | vel='100 200 300' | ang='0 90 0' | time=123.45
+# Handles optional quotes, whitespace, and line breaks in the log output
+RJ_DAMAGE_PATTERN = re.compile(r"PLAYER_RJ_DAMAGE:\s*'?([0-9.\s-]+?)'?\s*\|\s*dmg=\s*([0-9.]+)\s*\|\s*vel=\s*'?([0-9.\s-]+?)'?\s*\|\s*\n?ang=\s*'?([0-9.\s-]+?)'?\s*\|\s*time=\s*([0-9.]+)")
+
+# Player death with its timestamp (case-insensitive, never spans lines)
+DEATH_PATTERN = re.compile(r"(\d+\.\d+).*?(?:died|killed|suicide)", re.IGNORECASE)
+DEATH_KEYWORDS = ('died', 'killed', 'suicide')
+
+# Bytes patterns for the memory-mapped log; the keywords are matched in
+# lowercased blocks (matching_lines ignore_case)
+RJ_DAMAGE_BYTES_PATTERN = re.compile(RJ_DAMAGE_PATTERN.pattern.encode('ascii'))
+DEATH_KEYWORD_BYTES_PATTERN = re.compile(b'|'.join(k.encode('ascii') for k in DEATH_KEYWORDS))
+
+# Seconds after an RJ during which a death marks it as unsurvivable
+SURVIVAL_WINDOW = 2.0
+
+
 def extract_rj_events(log_file: str) -> List[RocketJumpEvent]:
     """Extract all PLAYER_RJ_DAMAGE events from log file."""
-    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
+    with map_log(log_file) as data:
+        return parse_rj_events(data)
 
-    # Pattern: PLAYER_RJ_DAMAGE: '1234.5 678.9 12.3' | dmg=45.0 | vel='100 200 300' | ang='0 90 0' | time=123.45
-    # Handles optional quotes, whitespace, and line breaks in the log output
-    pattern = r"PLAYER_RJ_DAMAGE:\s*'?([0-9.\s-]+?)'?\s*\|\s*dmg=\s*([0-9.]+)\s*\|\s*vel=\s*'?([0-9.\s-]+?)'?\s*\|\s*\n?ang=\s*'?([0-9.\s-]+?)'?\s*\|\s*time=\s*([0-9.]+)"
 
+def parse_rj_events(content) -> List[RocketJumpEvent]:
+    """Extract all PLAYER_RJ_DAMAGE events from log text (or a mapped log's bytes).
+
+    The fields are all numbers, which parse_vector() and float() read
+    straight from bytes, so a mapped log is never decoded.
+    """
+    pattern = RJ_DAMAGE_PATTERN if isinstance(content, str) else RJ_DAMAGE_BYTES_PATTERN
     events = []
-    for match in re.finditer(pattern, content):
+    for match in pattern.finditer(content):
         origin = parse_vector(match.group(1))
         damage = float(match.group(2))
         velocity = parse_vector(match.group(3))
@@ -81,7 +145,67 @@ def extract_rj_events(log_file: str) -> List[RocketJumpEvent]:
     return events
 
 
-def validate_rj_success(events: List[RocketJumpEvent], log_content: str) -> None:
+def parse_death_times(content) -> List[float]:
+    """
+    Extract player death timestamps from log text (or a mapped log's
+    bytes), sorted ascending.
+
+    The case-insensitive death regex is only run on lines that contain a
+    death keyword; trying it at every number in the log dominated the cost.
+    In a mapped log only those lines are decoded.
+    """
+    if isinstance(content, str):
+        lines = (line for line in content.split('\n')
+                 if any(keyword in line.lower() for keyword in DEATH_KEYWORDS))
+    else:
+        lines = matching_lines(content, DEATH_KEYWORD_BYTES_PATTERN, ignore_case=True)
+
+    death_times = []
+    for line in lines:
+        death_times.extend(float(m.group(1)) for m in DEATH_PATTERN.finditer(line))
+
+    death_times.sort()
+    return death_times
+
+
+def parse_rj_log(content) -> Tuple[List[RocketJumpEvent], List[float]]:
+    """
+    Extract RJ events and death timestamps from the same log text (or
+    mapped log bytes).
+
+    Returns (events, death_times) with death_times sorted ascending, ready
+    for validate_rj_success().
+    """
+    return parse_rj_events(content), parse_death_times(content)
+
+
+def rj_log_to_record(events: List[RocketJumpEvent], death_times: List[float]) -> tuple:
+    """Parse result as packed doubles, for the parse cache"""
+    values = array('d')
+    for event in events:
+        values.extend(event.origin)
+        values.append(event.damage)
+        values.extend(event.velocity)
+        values.extend(event.angles)
+        values.append(event.timestamp)
+    return values.tobytes(), array('d', death_times).tobytes()
+
+
+def rj_log_from_record(record: tuple) -> Tuple[List[RocketJumpEvent], List[float]]:
+    event_bytes, death_bytes = record
+    values = array('d')
+    values.frombytes(event_bytes)
+    events = []
+    for i in range(0, len(values), RJ_RECORD_SIZE):
+        v = values[i:i + RJ_RECORD_SIZE]
+        events.append(RocketJumpEvent((v[0], v[1], v[2]), v[3], (v[4], v[5], v[6]),
+                                      (v[7], v[8], v[9]), v[10]))
+    death_times = array('d')
+    death_times.frombytes(death_bytes)
+    return events, death_times.tolist()
+
+
+def validate_rj_success(events: List[RocketJumpEvent], death_times: List[float]) -> None:
     """
     Validate which RJ events were successful.
 
@@ -89,10 +213,14 @@ def validate_rj_success(events: List[RocketJumpEvent], log_content: str) -> None
     - Upward velocity component >200 u/s (meaningful vertical boost)
     - No death within 2 seconds after the event
     - Pitch angle between -20 and -90 degrees (downward shot - relaxed for realistic RJs)
+
+    death_times must be sorted ascending (as returned by parse_rj_log); the
+    survival check is then a binary search per event. Uses the NumPy path
+    when NumPy is installed.
     """
-    # Extract all player death timestamps from log
-    death_pattern = r"(\d+\.\d+).*?(?:died|killed|suicide)"
-    death_times = [float(m.group(1)) for m in re.finditer(death_pattern, log_content, re.IGNORECASE)]
+    if np is not None and events:
+        _validate_rj_success_numpy(events, death_times)
+        return
 
     for event in events:
         # Check 1: Upward velocity gain (Z component in Quake)
@@ -103,12 +231,9 @@ def validate_rj_success(events: List[RocketJumpEvent], log_content: str) -> None
         pitch = event.angles[0]  # Pitch in Quake angles
         proper_angle = -90 <= pitch <= -20  # Looking down for RJ (relaxed from -45 to -20)
 
-        # Check 3: Survivability (no death within 2s)
-        survived = True
-        for death_time in death_times:
-            if 0 < (death_time - event.timestamp) < 2.0:
-                survived = False
-                break
+        # Check 3: Survivability (no death within 2s) - first death after the RJ
+        idx = bisect.bisect_right(death_times, event.timestamp)
+        survived = idx == len(death_times) or (death_times[idx] - event.timestamp) >= SURVIVAL_WINDOW
 
         # Mark as successful if all criteria met
         if upward_velocity > 200 and proper_angle and survived:
@@ -116,87 +241,180 @@ def validate_rj_success(events: List[RocketJumpEvent], log_content: str) -> None
             event.height_gain = upward_velocity / 10.0  # Rough estimate (vel → height)
 
 
+def _validate_rj_success_numpy(events: List[RocketJumpEvent], death_times: List[float]) -> None:
+    """Vectorised validate_rj_success: all three checks for all events at once."""
+    upward_velocity = np.fromiter((e.velocity[2] for e in events), dtype=np.float64, count=len(events))
+    pitch = np.fromiter((e.angles[0] for e in events), dtype=np.float64, count=len(events))
+    timestamps = np.fromiter((e.timestamp for e in events), dtype=np.float64, count=len(events))
+
+    proper_angle = (pitch >= -90) & (pitch <= -20)
+
+    deaths = np.asarray(death_times, dtype=np.float64)
+    if deaths.size:
+        idx = np.searchsorted(deaths, timestamps, side='right')
+        next_death = deaths[np.minimum(idx, deaths.size - 1)]
+        survived = (idx == deaths.size) | ((next_death - timestamps) >= SURVIVAL_WINDOW)
+    else:
+        survived = np.ones(len(events), dtype=bool)
+
+    success = (upward_velocity > 200) & proper_angle & survived
+
+    for event, gain, ok in zip(events, upward_velocity.tolist(), success.tolist()):
+        event.speed_gain = gain
+        if ok:
+            event.success = True
+            event.height_gain = gain / 10.0  # Rough estimate (vel → height)
+
+
 def cluster_rj_locations(events: List[RocketJumpEvent], radius: float = 128.0) -> List[RocketJumpEvent]:
     """
     Cluster nearby successful RJs and return representative events.
     If multiple RJs occur within radius, keep the one with highest velocity gain.
+
+    Events are bucketed into a uniform grid of radius-sized cells, so each
+    seed only compares squared distances against events in its own and the
+    26 neighbouring cells instead of every other event.
     """
     successful = [e for e in events if e.success]
     if not successful:
         return []
 
+    radius_sq = radius * radius
+    origins = [e.origin for e in successful]
+
+    # Bucket event indices by grid cell (each bucket stays in index order)
+    cells = [_grid_cell(origin, radius) for origin in origins]
+    grid = defaultdict(list)
+    for i, cell in enumerate(cells):
+        grid[cell].append(i)
+
     clusters = []
-    used = set()
+    used = [False] * len(successful)
 
     for i, event in enumerate(successful):
-        if i in used:
+        if used[i]:
             continue
 
-        # Find all events within radius
-        cluster = [event]
-        for j, other in enumerate(successful):
-            if i == j or j in used:
+        # Find all unused events within radius. Buckets only ever hold unused
+        # events: the seed and its cluster members are dropped as they are
+        # claimed, so dense areas are not rescanned by later seeds.
+        ox, oy, oz = origins[i]
+        cx, cy, cz = cells[i]
+        members = []
+        for dx, dy, dz in _NEIGHBOUR_OFFSETS:
+            key = (cx + dx, cy + dy, cz + dz)
+            bucket = grid.get(key)
+            if not bucket:
                 continue
 
-            # Distance calculation (simple Euclidean)
-            dx = event.origin[0] - other.origin[0]
-            dy = event.origin[1] - other.origin[1]
-            dz = event.origin[2] - other.origin[2]
-            dist = (dx*dx + dy*dy + dz*dz) ** 0.5
-
-            if dist < radius:
-                cluster.append(other)
-                used.add(j)
+            remaining = []
+            for j in bucket:
+                if j == i:
+                    continue
+                px, py, pz = origins[j]
+                ddx = ox - px
+                ddy = oy - py
+                ddz = oz - pz
+                if ddx * ddx + ddy * ddy + ddz * ddz < radius_sq:
+                    members.append(j)
+                else:
+                    remaining.append(j)
+
+            if remaining:
+                grid[key] = remaining
+            else:
+                del grid[key]
+
+        # Keep event order so ties resolve exactly like the original pairwise scan
+        members.sort()
+        cluster = [event]
+        for j in members:
+            used[j] = True
+            cluster.append(successful[j])
 
         # Keep the best RJ from this cluster (highest velocity gain)
         best = max(cluster, key=lambda e: e.speed_gain)
         clusters.append(best)
-        used.add(i)
 
     return clusters
 
 
-def generate_rj_waypoints(events: List[RocketJumpEvent], map_name: str) -> str:
-    """Generate QuakeC code for learned rocket jump waypoints."""
-    if not events:
-        return "// No successful rocket jumps detected\n"
-
-    output_lines = [
-        f"// ===== {map_name.upper()} ROCKET JUMP WAYPOINTS =====\n",
-        f"// Generated: {len(events)} validated RJ techniques from player observation\n",
-        f"// Source: Player observation mode (impulse 199)\n",
-        f"// Format: SpawnLearnedRJ(origin, angles, velocity_gain, technique_type)\n",
-        f"//\n",
-        f"// PLAYER OBSERVATION LEARNING SYSTEM - Phase 1: Rocket Jump Detection\n",
-        f"\n",
-        f"void() LoadPlayerLearnedRJ_{map_name} =\n",
-        f"{{\n"
-    ]
-
-    for i, event in enumerate(events, 1):
-        # Format as QuakeC function call
-        origin_str = f"'{event.origin[0]:.1f} {event.origin[1]:.1f} {event.origin[2]:.1f}'"
-        angles_str = f"'{event.angles[0]:.1f} {event.angles[1]:.1f} {event.angles[2]:.1f}'"
-        velocity_gain = event.speed_gain
-
-        # Comment with metadata
-        output_lines.append(f"    // RJ #{i}: vel_gain={velocity_gain:.1f} u/s, height~{event.height_gain:.0f}u\n")
-        output_lines.append(f"    SpawnLearnedRJ({origin_str}, {angles_str}, {velocity_gain:.1f}, \"rj_vertical\");\n")
+# The cell itself plus its 26 neighbours
+_NEIGHBOUR_OFFSETS = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
 
-        if i < len(events):
-            output_lines.append("\n")
 
-    output_lines.append("};\\n")
+def _grid_cell(origin: tuple, cell_size: float) -> tuple:
+    """Uniform grid cell containing origin."""
+    return (
+        math.floor(origin[0] / cell_size),
+        math.floor(origin[1] / cell_size),
+        math.floor(origin[2] / cell_size)
+    )
 
-    return "".join(output_lines)
 
-
-def learn_from_player(log_file: str, map_name: str, output_file: Optional[str] = None) -> bool:
-    """Main learning pipeline: extract → validate → cluster → generate."""
+def write_rj_waypoints(events: List[RocketJumpEvent], map_name: str, qc: qc_emitter.QCEmitter):
+    """Write QuakeC code for learned rocket jump waypoints."""
+    if not events:
+        qc.comment("No successful rocket jumps detected")
+        return
+
+    qc.comment(f"===== {map_name.upper()} ROCKET JUMP WAYPOINTS =====")
+    qc.comment(f"Generated: {len(events)} validated RJ techniques from player observation")
+    qc.comment("Source: Player observation mode (impulse 199)")
+    qc.comment("Format: SpawnLearnedRJ(origin, angles, velocity_gain, technique_type)")
+    qc.comment()
+    qc.comment("PLAYER OBSERVATION LEARNING SYSTEM - Phase 1: Rocket Jump Detection")
+    qc.line()
+
+    with qc.loader(f"LoadPlayerLearnedRJ_{map_name}") as body:
+        for i, event in enumerate(events, 1):
+            # Format as QuakeC function call
+            origin_str = f"'{event.origin[0]:.1f} {event.origin[1]:.1f} {event.origin[2]:.1f}'"
+            angles_str = f"'{event.angles[0]:.1f} {event.angles[1]:.1f} {event.angles[2]:.1f}'"
+            velocity_gain = event.speed_gain
+
+            # Comment with metadata
+            body.comment(f"RJ #{i}: vel_gain={velocity_gain:.1f} u/s, height~{event.height_gain:.0f}u")
+            body.statement(f"    SpawnLearnedRJ({origin_str}, {angles_str}, {velocity_gain:.1f}, \"rj_vertical\");")
+
+            if i < len(events):
+                body.blank()
+
+
+def learn_from_player(log_file: str, map_name: str, output_file: Optional[str] = None,
+                      reader: Optional[IncrementalLogReader] = None,
+                      cache: Optional[parse_cache.ParseCache] = None) -> bool:
+    """Main learning pipeline: extract → validate → cluster → generate.
+
+    With an IncrementalLogReader only the log text appended since its
+    checkpoint is analyzed; the caller saves the checkpoint. Otherwise the
+    events of an unchanged log come from the parse cache, if given.
+    """
 
     # Step 1: Extract raw RJ events
     print(f"Analyzing log file: {log_file}")
-    events = extract_rj_events(log_file)
+    cached = None
+    if cache is not None and reader is None:
+        with tool_metrics.stage('extract'):
+            cached = cache.load(log_file, RJ_CACHE_KIND)
+    if cached is not None:
+        print("Log unchanged since last run, using cached parse")
+        events, death_times = rj_log_from_record(cached)
+    else:
+        if reader is not None:
+            with tool_metrics.stage('extract'):
+                log_content = read_new_log_text(reader)
+            with tool_metrics.stage('parse'):
+                events, death_times = parse_rj_log(log_content)
+            tool_metrics.count('lines_scanned', log_content.count('\n'))
+        else:
+            # Regexes run over the mapped file; the log is never read into memory
+            with tool_metrics.stage('parse'), map_log(log_file) as data:
+                events, death_times = parse_rj_log(data)
+        tool_metrics.count('regex_hits', len(events) + len(death_times))
+        if cache is not None and reader is None:
+            cache.store(log_file, RJ_CACHE_KIND, rj_log_to_record(events, death_times))
+    tool_metrics.count('rj_events', len(events))
     print(f"Found {len(events)} rocket jump attempts")
 
     if not events:
@@ -208,11 +426,11 @@ def learn_from_player(log_file: str, map_name: str, output_file: Optional[str] =
         return False
 
     # Step 2: Validate success criteria
-    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-        log_content = f.read()
-    validate_rj_success(events, log_content)
+    with tool_metrics.stage('validate'):
+        validate_rj_success(events, death_times)
 
     successful = [e for e in events if e.success]
+    tool_metrics.count('rj_successful', len(successful))
     print(f"Validated {len(successful)} successful rocket jumps")
 
     if not successful:
@@ -224,21 +442,21 @@ def learn_from_player(log_file: str, map_name: str, output_file: Optional[str] =
         return False
 
     # Step 3: Cluster nearby locations
-    clustered = cluster_rj_locations(successful, radius=128.0)
+    with tool_metrics.stage('cluster'):
+        clustered = cluster_rj_locations(successful, radius=128.0)
+    tool_metrics.count('rj_locations', len(clustered))
     print(f"Clustered into {len(clustered)} unique RJ locations (128u radius)")
 
     # Step 4: Generate QuakeC waypoints
-    waypoint_code = generate_rj_waypoints(clustered, map_name)
-
-    # Output results
-    if output_file:
-        output_path = Path(output_file)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(waypoint_code)
-        print(f"\nWrote {len(clustered)} RJ waypoints to: {output_file}")
-    else:
-        print("\n" + waypoint_code)
+    with tool_metrics.stage('generate'):
+        # Output results
+        if output_file:
+            with qc_emitter.write_qc_file(output_file) as qc:
+                write_rj_waypoints(clustered, map_name, qc)
+            print(f"\nWrote {len(clustered)} RJ waypoints to: {output_file}")
+        else:
+            print()
+            write_rj_waypoints(clustered, map_name, qc_emitter.QCEmitter(sys.stdout))
 
     # Summary statistics
     print("\n=== Learning Summary ===")
@@ -255,23 +473,36 @@ def learn_from_player(log_file: str, map_name: str, output_file: Optional[str] =
 
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python learn_rj_from_player.py <log_file> <map_name> [output_file]")
-        print("\nExample:")
-        print("  python learn_rj_from_player.py ../launch/quake-spasm/qconsole.log dm2")
-        print("  python learn_rj_from_player.py ../launch/quake-spasm/qconsole.log dm2 ../reaper_mre/maps/dm2_rj.qc")
+    parser = argparse.ArgumentParser(
+        description="Extract validated rocket jump techniques from player observation logs",
+        epilog="Example: python learn_rj_from_player.py ../launch/quake-spasm/qconsole.log dm2 "
+               "../reaper_mre/maps/dm2_rj.qc")
+    parser.add_argument("log_file", help="path to qconsole.log")
+    parser.add_argument("map_name", help="map name (e.g. dm2)")
+    parser.add_argument("output_file", nargs="?", help="QuakeC output file (default: print)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only analyze log data appended since the previous --incremental run")
+    parser.add_argument("--checkpoint", help="checkpoint file for --incremental (default: next to the log)")
+    parse_cache.add_arguments(parser)
+    tool_metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not Path(args.log_file).exists():
+        print(f"ERROR: Log file not found: {args.log_file}", file=sys.stderr)
         sys.exit(1)
 
-    log_file = sys.argv[1]
-    map_name = sys.argv[2]
-    output_file = sys.argv[3] if len(sys.argv) > 3 else None
+    with tool_metrics.session("learn_rj_from_player", args):
+        reader = None
+        if args.incremental:
+            reader = IncrementalLogReader(args.log_file, args.checkpoint, tool="learn_rj_from_player")
 
-    if not Path(log_file).exists():
-        print(f"ERROR: Log file not found: {log_file}", file=sys.stderr)
-        sys.exit(1)
+        success = learn_from_player(args.log_file, args.map_name, args.output_file, reader,
+                                    parse_cache.from_args(args))
+
+        if reader is not None:
+            reader.save()
 
-    success = learn_from_player(log_file, map_name, output_file)
-    sys.exit(0 if success else 1)
+        sys.exit(0 if success else 1)
 
 
 if __name__ == "__main__":
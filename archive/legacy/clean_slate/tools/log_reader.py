@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Log Reader for Modern Reaper Enhancements (MRE)
+Shared qconsole.log access helpers for the bot tools.
+
+Quake console logs grow for the whole life of a server (-condebug appends),
+so the helpers here avoid reading more of the file than a tool actually needs.
+
+Whole-log scans go through map_log(): the log is memory-mapped and the
+tools run compiled bytes regexes over the mapping. Everything they look
+for (SpawnSavedWaypoint, PLAYER_RJ_DAMAGE, CUT HERE, bot event tags) is
+ASCII, so only the matched lines or sections are decoded, and the log is
+never copied into one huge bytes or str object.
+"""
+
+import io
+import json
+import mmap
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Pattern, Tuple, Union
+
+import tool_metrics
+
+# Waypoint dump markers printed by DumpWaypoints (impulse 99)
+DUMP_START = "// ===== CUT HERE: START WAYPOINTS ====="
+DUMP_END = "// ===== CUT HERE: END WAYPOINTS ====="
+
+# Backward read size; a typical dump (~450 nodes) fits in one or two blocks
+REVERSE_BLOCK_SIZE = 64 * 1024
+
+# Forward read size for incremental/follow reads
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Seconds between polls in follow mode
+FOLLOW_POLL_INTERVAL = 1.0
+
+# Smallest byte range worth handing to a separate worker
+MIN_RANGE_SIZE = 4 * 1024 * 1024
+
+
+def read_last_block(log_file, start_marker: str = DUMP_START, end_marker: str = DUMP_END,
+                    block_size: int = REVERSE_BLOCK_SIZE) -> Optional[str]:
+    """
+    Return the last complete start_marker..end_marker section of a log.
+
+    Reads the file backwards in blocks: first the last end_marker is located
+    from the tail, then the nearest start_marker before it. The cost scales
+    with the distance from the end of the file to the start of the section,
+    not with the size of the log.
+
+    Returns the section text including both markers, or None if the log has
+    no complete section.
+    """
+    start_bytes = start_marker.encode('ascii')
+    end_bytes = end_marker.encode('ascii')
+
+    with open(log_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+
+        data = b''
+        end_idx = -1
+
+        while pos > 0:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            data = f.read(size) + data
+            tool_metrics.count('bytes_read', size)
+
+            # Only the new block (plus a marker-length overlap into the data
+            # already scanned) can hold a match we have not seen yet
+            if end_idx == -1:
+                end_idx = data.rfind(end_bytes, 0, size + len(end_bytes) - 1)
+                if end_idx == -1:
+                    data = data[:len(end_bytes) - 1]
+                    continue
+                data = data[:end_idx + len(end_bytes)]
+                limit = end_idx
+            else:
+                limit = size + len(start_bytes) - 1
+
+            start_idx = data.rfind(start_bytes, 0, limit)
+            if start_idx != -1:
+                return data[start_idx:].decode('utf-8', errors='ignore')
+
+    return None
+
+
+def split_line_ranges(log_file, parts: int, min_size: int = MIN_RANGE_SIZE) -> List[Tuple[int, int]]:
+    """
+    Split a log into up to `parts` byte ranges that start and end on line
+    boundaries.
+
+    Each range ends just after a newline, so no line (and no UTF-8
+    character) is cut in two, and reading the ranges in order yields
+    exactly the lines of the whole file.
+    """
+    size = os.path.getsize(log_file)
+    parts = max(1, min(parts, size // min_size))
+
+    ranges = []
+    start = 0
+    with open(log_file, 'rb') as f:
+        for i in range(1, parts):
+            if start >= size:
+                break
+            f.seek(max(start, size * i // parts))
+            f.readline()  # Move to the start of the next line
+            end = f.tell()
+            if end > start:
+                ranges.append((start, end))
+                start = end
+        if start < size or not ranges:
+            ranges.append((start, size))
+
+    return ranges
+
+
+def read_range_lines(log_file, start: int, end: int) -> Iterator[str]:
+    """
+    Yield the lines in bytes [start, end) of a log, decoded like a text-mode
+    open() (UTF-8, errors ignored, universal newlines).
+    """
+    with open(log_file, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        pending = b''
+
+        while remaining > 0:
+            chunk = f.read(min(READ_BLOCK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            tool_metrics.count('bytes_read', len(chunk))
+
+            # Decode whole lines only, so '\r\n' pairs are never split
+            data = pending + chunk
+            cut = data.rfind(b'\n') + 1
+            if cut == 0 and remaining > 0:
+                pending = data
+                continue
+            if remaining <= 0:
+                cut = len(data)
+            pending = data[cut:]
+            yield from io.StringIO(data[:cut].decode('utf-8', errors='ignore'), newline=None)
+
+        if pending:
+            yield from io.StringIO(pending.decode('utf-8', errors='ignore'), newline=None)
+
+
+@contextmanager
+def map_log(log_file) -> Iterator[Union[mmap.mmap, bytes]]:
+    """
+    Memory-map a whole log read-only for bytes regexes and find()/rfind().
+
+    An empty log yields b'' (a zero-length file cannot be mapped). The
+    mapping is only valid inside the with-block: decode or copy what is kept.
+    """
+    with open(log_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        tool_metrics.count('bytes_mapped', size)
+        if not size:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def decode_range(data, start: int, end: int) -> str:
+    """Text of bytes [start, end) of a mapped log, decoded like a text-mode open()"""
+    text = data[start:end].decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _line_spans(buffer, pattern: Pattern[bytes], start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """[start, end) of each line in buffer[start:end] holding a match, once per line"""
+    pos = start
+    while pos < end:
+        match = pattern.search(buffer, pos, end)
+        if match is None:
+            return
+        line_start = max(start, buffer.rfind(b'\n', start, match.start()) + 1)
+        line_end = buffer.find(b'\n', match.end(), end)
+        pos = end if line_end == -1 else line_end + 1
+        yield line_start, pos
+
+
+def matching_lines(data, pattern: Pattern[bytes], start: int = 0, end: Optional[int] = None,
+                   ignore_case: bool = False) -> Iterator[str]:
+    """
+    Yield, in order, the lines of a mapped log (or of its bytes
+    [start, end), which must lie on line boundaries) that contain a match
+    of a bytes pattern.
+
+    Only those lines are decoded, with their '\n', each at most once
+    however many matches it holds. The pattern must not match across a
+    newline. With ignore_case the pattern is written in lower case and
+    runs over lowercased copies of READ_BLOCK_SIZE blocks of lines, which
+    is much faster than a re.IGNORECASE scan.
+    """
+    if end is None:
+        end = len(data)
+
+    if not ignore_case:
+        for line_start, line_end in _line_spans(data, pattern, start, end):
+            yield data[line_start:line_end].decode('utf-8', errors='ignore')
+        return
+
+    while start < end:
+        block_end = data.find(b'\n', min(end, start + READ_BLOCK_SIZE), end)
+        block_end = end if block_end == -1 else block_end + 1
+        block = data[start:block_end].lower()
+        for line_start, line_end in _line_spans(block, pattern, 0, len(block)):
+            yield data[start + line_start:start + line_end].decode('utf-8', errors='ignore')
+        start = block_end
+
+
+def default_checkpoint(log_file, tool: str) -> Path:
+    """Checkpoint path used by a tool when none is given (next to the log)"""
+    log_path = Path(log_file)
+    return log_path.with_name(f"{log_path.name}.{tool}.ckpt")
+
+
+class IncrementalLogReader:
+    """
+    Reads only the lines appended to a log since the previous run.
+
+    The checkpoint file records the log's inode, the byte offset consumed so
+    far and any trailing partial line, so the next run resumes exactly where
+    this one stopped. If the inode changes or the file shrinks below the
+    saved offset, the log was rotated/truncated and is re-read from byte 0.
+
+    Tools may also keep a small JSON-serialisable `state` dict in the
+    checkpoint (e.g. the current map name) and can rewind() to re-read an
+    unfinished multi-line section on the next run.
+    """
+
+    def __init__(self, log_file, checkpoint_file=None, tool: str = "tool"):
+        self.log_path = Path(log_file)
+        self.checkpoint_path = Path(checkpoint_file) if checkpoint_file else default_checkpoint(log_file, tool)
+
+        self.inode = None
+        self.offset = 0
+        self.partial = b''
+        self.state = {}
+        self.rotated = False
+
+        # File offset of the start of the line most recently yielded
+        self.line_start = 0
+
+        self._load()
+
+    def _load(self):
+        """Restore the previous checkpoint, if any"""
+        if not self.checkpoint_path.exists():
+            return
+
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return  # Corrupt checkpoint - start from the beginning
+
+        self.inode = data.get('inode')
+        self.offset = data.get('offset', 0)
+        self.partial = data.get('partial', '').encode('latin-1')
+        self.state = data.get('state', {})
+
+    def save(self):
+        """Persist inode, offset, partial-line buffer and tool state"""
+        data = {
+            'log': str(self.log_path),
+            'inode': self.inode,
+            'offset': self.offset,
+            'partial': self.partial.decode('latin-1'),
+            'state': self.state,
+        }
+
+        tmp_path = self.checkpoint_path.with_name(self.checkpoint_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def rewind(self, offset: int):
+        """Make the next read start again at offset (start of an unfinished section)"""
+        self.offset = offset
+        self.partial = b''
+
+    def _check_rotation(self, stat_result):
+        """Reset to byte 0 when the log was rotated or truncated"""
+        if self.inode is None:
+            self.inode = stat_result.st_ino
+            return
+
+        if stat_result.st_ino != self.inode or stat_result.st_size < self.offset:
+            self.inode = stat_result.st_ino
+            self.offset = 0
+            self.partial = b''
+            self.state = {}
+            self.rotated = True
+
+    def lines(self) -> Iterator[str]:
+        """Yield every complete line appended since the checkpoint"""
+        stat_result = os.stat(self.log_path)
+        self._check_rotation(stat_result)
+
+        with open(self.log_path, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                chunk = f.read(READ_BLOCK_SIZE)
+                if not chunk:
+                    break
+                tool_metrics.count('bytes_read', len(chunk))
+
+                data = self.partial + chunk
+                line_start = self.offset - len(self.partial)
+                chunk_end = self.offset + len(chunk)
+
+                parts = data.split(b'\n')
+                tail = parts.pop()  # Incomplete last line, kept for later
+
+                # offset/partial always describe a resumable position, so a
+                # save() from inside the consumer loop never skips or repeats
+                # a line: the line being yielded counts as consumed.
+                self.partial = b''
+                for raw in parts:
+                    self.line_start = line_start
+                    line_start += len(raw) + 1
+                    self.offset = line_start
+                    yield (raw + b'\n').decode('utf-8', errors='ignore')
+
+                self.offset = chunk_end
+                self.partial = tail
+
+    def follow(self, poll_interval: float = FOLLOW_POLL_INTERVAL) -> Iterator[Optional[str]]:
+        """
+        Tail the log forever, yielding new lines as they are written.
+
+        Yields None after each poll that produced no new data, so callers can
+        do periodic work (reports, checkpointing) while the log is idle.
+        Callers decide when to save(), since only they know whether they are
+        in the middle of a multi-line section.
+        """
+        while True:
+            got_data = False
+            for line in self.lines():
+                got_data = True
+                yield line
+
+            if not got_data:
+                yield None
+                time.sleep(poll_interval)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Memory Store for Modern Reaper Enhancements (MRE)
+Compact binary storage for per-map bot memory (bot_memory/<map>.wpm).
+
+File layout (little-endian):
+
+    Header (64 bytes)
+        magic        4s   b'MREW'
+        version      H    FORMAT_VERSION
+        record_size  H    RECORD_STRUCT.size
+        count        Q    number of records
+        saved_at     d    epoch seconds of the save
+        mapname      32s  UTF-8, NUL padded
+        (8 bytes reserved)
+
+    count fixed-width records (40 bytes each)
+        traffic      d
+        danger       d
+        updated      d    epoch seconds
+        origin       3f
+        sessions     i
+
+Every field is naturally aligned, so with NumPy the records can be loaded
+straight into (or memory-mapped as) a structured array whose columns become
+a WaypointTable without copying. Without NumPy the same file is read and
+written with the struct module.
+
+The learned links between a map's nodes live next to it in <map>.wpl:
+
+    Header (24 bytes)
+        magic        4s   b'MREL'
+        version      H    FORMAT_VERSION
+        record_size  H    LINK_STRUCT.size
+        nodes        I    node count of the store the links belong to
+        count        Q    number of links
+
+    count links (16 bytes each), grouped by source as in a WaypointGraph
+        src, dst     2i   node indices in the store
+        link_type    i    LINK_* type
+        usage        f
+"""
+
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from waypoint_graph import WaypointGraph
+from waypoint_table import WaypointTable
+
+MAGIC = b'MREW'
+FORMAT_VERSION = 1
+
+HEADER_STRUCT = struct.Struct('<4sHHQd32s8x')
+RECORD_STRUCT = struct.Struct('<ddd3fi')
+
+STORE_SUFFIX = '.wpm'
+
+LINK_MAGIC = b'MREL'
+LINK_HEADER_STRUCT = struct.Struct('<4sHHIQ')
+LINK_STRUCT = struct.Struct('<iiif')
+LINK_SUFFIX = '.wpl'
+
+# (origin, traffic, danger, updated epoch, sessions_seen)
+Record = Tuple[Tuple[float, float, float], float, float, float, int]
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([
+        ('traffic', '<f8'),
+        ('danger', '<f8'),
+        ('updated', '<f8'),
+        ('origin', '<f4', (3,)),
+        ('sessions', '<i4'),
+    ])
+    assert RECORD_DTYPE.itemsize == RECORD_STRUCT.size
+
+
+class StoreFormatError(ValueError):
+    """Raised when a file is not a bot memory store this version can read"""
+
+
+def read_header(f) -> dict:
+    """Read and validate the header from an open binary file"""
+    raw = f.read(HEADER_STRUCT.size)
+    if len(raw) < HEADER_STRUCT.size:
+        raise StoreFormatError("truncated header")
+
+    magic, version, record_size, count, saved_at, mapname = HEADER_STRUCT.unpack(raw)
+    if magic != MAGIC:
+        raise StoreFormatError("not a bot memory store")
+    if version != FORMAT_VERSION:
+        raise StoreFormatError(f"unsupported store version {version}")
+    if record_size != RECORD_STRUCT.size:
+        raise StoreFormatError(f"unexpected record size {record_size}")
+
+    return {
+        'version': version,
+        'count': count,
+        'saved_at': saved_at,
+        'map': mapname.rstrip(b'\0').decode('utf-8'),
+    }
+
+
+def _header_bytes(mapname: str, count: int) -> bytes:
+    name = mapname.encode('utf-8')[:32]
+    return HEADER_STRUCT.pack(MAGIC, FORMAT_VERSION, RECORD_STRUCT.size, count,
+                              datetime.now().timestamp(), name)
+
+
+def _replace_atomically(path: Path, write):
+    """Write to a temp file next to path, then swap it in"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def write_records(path, mapname: str, records: List[Record]):
+    """Write a store from plain Python records (no NumPy needed)"""
+    pack = RECORD_STRUCT.pack
+
+    def write(f):
+        f.write(_header_bytes(mapname, len(records)))
+        f.write(b''.join(pack(traffic, danger, updated, origin[0], origin[1], origin[2], sessions)
+                         for origin, traffic, danger, updated, sessions in records))
+
+    _replace_atomically(Path(path), write)
+
+
+def read_records(path) -> Tuple[dict, List[Record]]:
+    """Read a store into plain Python records (no NumPy needed)"""
+    with open(path, 'rb') as f:
+        header = read_header(f)
+        data = f.read(header['count'] * RECORD_STRUCT.size)
+
+    if len(data) != header['count'] * RECORD_STRUCT.size:
+        raise StoreFormatError("truncated records")
+
+    # Origins are stored as float32; dumped origins have one decimal, so
+    # rounding restores the exact values (as WaypointTable.origin_list does)
+    records = [((round(x, 1), round(y, 1), round(z, 1)), traffic, danger, updated, sessions)
+               for traffic, danger, updated, x, y, z, sessions in RECORD_STRUCT.iter_unpack(data)]
+    return header, records
+
+
+def write_table(path, mapname: str, table):
+    """Write a WaypointTable as one block of records"""
+    records = np.empty(len(table), dtype=RECORD_DTYPE)
+    records['traffic'] = table.traffic
+    records['danger'] = table.danger
+    records['updated'] = table.updated
+    records['origin'] = table.origins
+    records['sessions'] = table.sessions_seen
+
+    def write(f):
+        f.write(_header_bytes(mapname, len(records)))
+        records.tofile(f)
+
+    _replace_atomically(Path(path), write)
+
+
+def read_table(path, mmap: bool = False):
+    """
+    Load a store as a WaypointTable.
+
+    The table's columns are views into one structured array. With mmap=True
+    that array is a read-only memory map of the file, so nothing is read
+    until a column is touched; use it for read-only work (e.g. stats), since
+    an open map keeps the file locked on Windows.
+    """
+    with open(path, 'rb') as f:
+        header = read_header(f)
+        if mmap and header['count']:
+            records = np.memmap(f, dtype=RECORD_DTYPE, mode='r', offset=HEADER_STRUCT.size,
+                                shape=(header['count'],))
+        else:
+            records = np.fromfile(f, dtype=RECORD_DTYPE, count=header['count'])
+
+    if len(records) != header['count']:
+        raise StoreFormatError("truncated records")
+
+    table = WaypointTable(records['origin'], records['traffic'], records['danger'],
+                          records['sessions'], records['updated'])
+    return header, table
+
+
+def store_path(memory_dir: Path, mapname: str) -> Path:
+    """Binary store location for a map"""
+    return memory_dir / f"{mapname}{STORE_SUFFIX}"
+
+
+def links_path(memory_dir: Path, mapname: str) -> Path:
+    """Link file location for a map"""
+    return memory_dir / f"{mapname}{LINK_SUFFIX}"
+
+
+def write_links(path, graph: WaypointGraph):
+    """Write a map's links (indices refer to the store written with them)"""
+    pack = LINK_STRUCT.pack
+
+    def write(f):
+        f.write(LINK_HEADER_STRUCT.pack(LINK_MAGIC, FORMAT_VERSION, LINK_STRUCT.size, graph.count, len(graph)))
+        f.write(b''.join(pack(*edge) for edge in graph.edges()))
+
+    _replace_atomically(Path(path), write)
+
+
+def read_links(path, count: int) -> WaypointGraph:
+    """
+    Read a map's links for a store of `count` nodes.
+
+    A missing file, or one written for a different node count (the store
+    was replaced without it), gives an empty graph.
+    """
+    path = Path(path)
+    if not path.exists():
+        return WaypointGraph.empty(count)
+
+    with open(path, 'rb') as f:
+        raw = f.read(LINK_HEADER_STRUCT.size)
+        if len(raw) < LINK_HEADER_STRUCT.size:
+            raise StoreFormatError("truncated link header")
+
+        magic, version, record_size, nodes, links = LINK_HEADER_STRUCT.unpack(raw)
+        if magic != LINK_MAGIC:
+            raise StoreFormatError("not a bot memory link file")
+        if version != FORMAT_VERSION or record_size != LINK_STRUCT.size:
+            raise StoreFormatError(f"unsupported link file version {version}")
+        if nodes != count:
+            return WaypointGraph.empty(count)
+
+        data = f.read(links * LINK_STRUCT.size)
+
+    if len(data) != links * LINK_STRUCT.size:
+        raise StoreFormatError("truncated links")
+
+    return WaypointGraph.from_edges(count, LINK_STRUCT.iter_unpack(data))
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory Watcher - Bot Memory Daemon for Game Servers
+Modern Reaper Enhancements (MRE) - Phase 5 Tool
+
+Watches one or more server qconsole.log files and runs the bot memory
+pipeline (load → merge → optimize → save → generate, see
+bot_memory_manager.py) for each map as soon as its waypoint dump is written,
+so the data files the servers load at map start are never stale.
+
+Usage:
+    python memory_watcher.py                                    # launch/quake-spasm/qconsole.log
+    python memory_watcher.py server1/qconsole.log server2/qconsole.log --jobs 2
+    python memory_watcher.py logs/*/qconsole.log --debounce 60 --queue 4
+
+How it works:
+    - One asyncio task per log polls for appended lines (IncrementalLogReader,
+      checkpointed next to each log), tracking SpawnServer: map changes and
+      complete CUT HERE dumps.
+    - Dumps are debounced per (log, map): a newer dump of the same map
+      replaces a pending one (each dump holds everything the bots learned so
+      far). The pending dump is queued once the server moves to another map,
+      or after --debounce seconds without a newer dump.
+    - Queued dumps run in a process pool (--jobs workers), one at a time per
+      map, so the other logs keep being watched while a pipeline runs.
+    - A log's checkpoint is saved only once every dump read from it has
+      been processed, so a restart re-reads dumps that were still pending,
+      queued or running.
+    - The queue holds at most --queue dumps. When it is full, watchers stop
+      reading their logs until a worker frees up (the data stays on disk),
+      so a burst of map rotations cannot pile up unbounded work.
+
+Options:
+    --jobs N        Worker processes (default 2; 1 with --backend sqlite)
+    --debounce S    Seconds to wait for a newer dump of the same map (default 30)
+    --queue N       Dumps waiting for a worker before watchers pause (default 8)
+    --interval S    Seconds between log polls (default 1)
+    --backend, --qc, --game-dir, --budget
+                    As for bot_memory_manager.py
+    --metrics FILE  Write timings and counters as JSON on exit
+"""
+
+import argparse
+import asyncio
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import node_budget
+import tool_metrics
+from bot_memory_manager import (BotMemoryManager, WaypointNode, latest_dumps, process_map_worker,
+                                update_qc_manifest)
+from log_reader import FOLLOW_POLL_INTERVAL, IncrementalLogReader
+from waypoint_graph import WaypointGraph
+
+# Fix Windows console encoding for UTF-8
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except:
+        pass  # Fallback: use ASCII symbols
+
+# Seconds a dump waits for a newer dump of the same map before it is processed
+DEFAULT_DEBOUNCE = 30.0
+
+# Dumps waiting for a worker before the watchers stop reading
+DEFAULT_QUEUE_SIZE = 8
+
+DEFAULT_JOBS = 2
+
+Dump = Tuple[List[WaypointNode], WaypointGraph]
+
+
+def scan_new_dumps(manager: BotMemoryManager, reader: IncrementalLogReader) -> Dict[str, Dump]:
+    """Newest complete dump per map in the lines appended since the last poll"""
+    return latest_dumps(manager.scan_dumps(reader.lines(), reader))[1]
+
+
+class MemoryWatcher:
+    """Watches server logs and feeds their dumps to a bounded worker pool"""
+
+    def __init__(self, project_root: Path, log_paths: List[Path], options: dict,
+                 jobs: int = DEFAULT_JOBS, debounce: float = DEFAULT_DEBOUNCE,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, interval: float = FOLLOW_POLL_INTERVAL):
+        self.project_root = project_root
+        self.log_paths = log_paths
+        self.options = options
+        self.jobs = jobs
+        self.debounce = debounce
+        self.queue_size = queue_size
+        self.interval = interval
+
+        # Print each pipeline's full output, not just a summary line
+        self.verbose = False
+
+        # Where --qc files and their manifest go (BotMemoryManager.maps_dir)
+        self.maps_dir = project_root / "reaper_mre" / "maps"
+
+        # Created in run(), inside the event loop
+        self.queue: Optional[asyncio.Queue] = None
+        self.map_locks: Dict[str, asyncio.Lock] = {}
+
+        # Dumps of each log queued or in a worker; its checkpoint waits for them
+        self.in_flight: Dict[Path, int] = {}
+
+    async def run(self):
+        """Watch every log until interrupted"""
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        print(f"👀 Watching {len(self.log_paths)} log(s) with {self.jobs} worker(s) (Ctrl+C to stop)")
+        for log_path in self.log_paths:
+            print(f"   {log_path}")
+
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker) as pool:
+            watchers = [asyncio.ensure_future(self.watch(log_path)) for log_path in self.log_paths]
+            dispatcher = asyncio.ensure_future(self.dispatch(pool))
+            try:
+                await asyncio.gather(*watchers, dispatcher)
+            finally:
+                for task in watchers + [dispatcher]:
+                    task.cancel()
+
+    async def watch(self, log_path: Path):
+        """Poll one log, debounce its dumps per map and queue them"""
+        loop = asyncio.get_running_loop()
+        manager = BotMemoryManager(self.project_root, backend="wpm")
+        reader = IncrementalLogReader(log_path, tool="memory_watcher")
+        server = log_path.parent.name or str(log_path)
+
+        # mapname -> (dump, time it was seen), waiting for a newer dump
+        pending: Dict[str, Tuple[Dump, float]] = {}
+        self.in_flight[log_path] = 0
+
+        while True:
+            dumps = {}
+            if log_path.exists():
+                try:
+                    dumps = await loop.run_in_executor(None, scan_new_dumps, manager, reader)
+                except OSError as e:
+                    print(f"⚠️  [{server}] Could not read {log_path}: {e}")
+
+            now = time.monotonic()
+            for mapname, dump in dumps.items():
+                nodes, links = dump
+                print(f"📥 [{server}] Waypoint dump for '{mapname}' ({len(nodes)} nodes, {len(links)} links)")
+                pending[mapname] = (dump, now)
+
+            current_map = reader.state.get('mapname', "unknown")
+            for mapname, (dump, seen) in list(pending.items()):
+                if mapname != current_map or now - seen >= self.debounce:
+                    del pending[mapname]
+                    self.in_flight[log_path] += 1
+                    # Blocks while the queue is full: backpressure on this log
+                    await self.queue.put((log_path, server, mapname, dump))
+                    tool_metrics.count('dumps_queued')
+
+            # Checkpoint only when every dump read so far has been through its
+            # pipeline, so a restart re-reads any dump still waiting out its
+            # debounce, queued or being processed
+            if not pending and not self.in_flight[log_path]:
+                reader.save()
+
+            await asyncio.sleep(self.interval)
+
+    async def dispatch(self, pool: ProcessPoolExecutor):
+        """Start queued dumps as workers free up"""
+        slots = asyncio.Semaphore(self.jobs)
+        while True:
+            job = await self.queue.get()
+            await slots.acquire()
+            task = asyncio.ensure_future(self.run_job(pool, job))
+            task.add_done_callback(lambda _: slots.release())
+
+    async def run_job(self, pool: ProcessPoolExecutor, job: Tuple[Path, str, str, Dump]):
+        """Run the pipeline for one dump; runs for the same map never overlap"""
+        log_path, server, mapname, dump = job
+        try:
+            await self._process(pool, server, mapname, dump)
+        finally:
+            # Done, or failed for good: re-reading the dump would fail the same way
+            self.in_flight[log_path] -= 1
+
+    async def _process(self, pool: ProcessPoolExecutor, server: str, mapname: str, dump: Dump):
+        loop = asyncio.get_running_loop()
+        nodes, links = dump
+        lock = self.map_locks.setdefault(mapname, asyncio.Lock())
+
+        async with lock:
+            print(f"⚙️  [{server}] Processing '{mapname}'...")
+            started = time.monotonic()
+            try:
+                with tool_metrics.stage('pipeline'):
+                    data_file, output, counters, qc_results = await loop.run_in_executor(
+                        pool, process_map_worker, self.project_root, self.options, mapname, nodes, links)
+            except Exception as e:
+                print(f"❌ [{server}] Pipeline failed for '{mapname}': {e}")
+                tool_metrics.count('pipelines_failed')
+                return
+            finally:
+                self.queue.task_done()
+
+        for name, amount in counters.items():
+            tool_metrics.count(name, amount)
+        tool_metrics.count('pipelines_run')
+        if self.verbose:
+            print(output, end='')
+        if qc_results:
+            # Only this event loop writes the manifest, so workers never race on it
+            update_qc_manifest(self.maps_dir, qc_results)
+        print(f"✅ [{server}] '{mapname}' updated in {time.monotonic() - started:.1f}s: {data_file}")
+
+
+def _init_worker():
+    """Workers leave Ctrl+C and SIGTERM to the watcher, which waits for them"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def _stop(signum, frame):
+    """SIGTERM (service manager stop) ends the watcher like Ctrl+C"""
+    raise KeyboardInterrupt
+
+
+def main():
+    """CLI entry point"""
+    project_root = Path(__file__).parent.parent  # tools/ -> root
+
+    parser = argparse.ArgumentParser(description="Run the bot memory pipeline as server logs receive dumps")
+    parser.add_argument("log_paths", nargs="*", type=Path,
+                        help="server qconsole.log files (default: launch/quake-spasm/qconsole.log)")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                        help="worker processes (default: %(default)s)")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help="seconds to wait for a newer dump of the same map (default: %(default)s)")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="dumps waiting for a worker before watchers pause (default: %(default)s)")
+    parser.add_argument("--interval", type=float, default=FOLLOW_POLL_INTERVAL,
+                        help="seconds between log polls (default: %(default)s)")
+    parser.add_argument("--backend", choices=["wpm", "sqlite"], default="wpm",
+                        help="memory storage: per-map .wpm files, or bot_memory.db with session history")
+    parser.add_argument("--qc", action="store_true",
+                        help="also write compiled-in <map>_memory.qc files (engines without FRIK_FILE)")
+    parser.add_argument("--game-dir", type=Path,
+                        help="mod directory for data/maps/<map>.wpt (default: launch/quake-spasm/reaper_mre)")
+    parser.add_argument("--budget", type=int, default=node_budget.DEFAULT_NODE_BUDGET,
+                        help="most nodes written for the game (0 = no limit)")
+    parser.add_argument("--verbose", action="store_true", help="print each pipeline's full output")
+    tool_metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    log_paths = args.log_paths or [project_root / "launch" / "quake-spasm" / "qconsole.log"]
+    jobs = max(1, args.jobs)
+    if args.backend == "sqlite":
+        jobs = 1  # One writer for bot_memory.db
+
+    # Pipeline settings for the workers (see BotMemoryManager.options)
+    manager = BotMemoryManager(project_root, backend=args.backend)
+    manager.emit_qc = args.qc
+    manager.budget = args.budget
+    if args.game_dir:
+        manager.game_dir = args.game_dir
+
+    watcher = MemoryWatcher(project_root, log_paths, manager.options(), jobs=jobs, debounce=args.debounce,
+                            queue_size=max(1, args.queue), interval=args.interval)
+    watcher.verbose = args.verbose
+    watcher.maps_dir = manager.maps_dir
+
+    signal.signal(signal.SIGTERM, _stop)
+    with tool_metrics.session("memory_watcher", args):
+        try:
+            asyncio.run(watcher.run())
+        except KeyboardInterrupt:
+            print("\n🛑 Stopped watching")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Node Budget for Modern Reaper Enhancements (MRE)
+Decimates a waypoint set to the number of nodes the QC runtime can afford.
+
+Every spawned BotPath is an edict, and the mod guards its edict use hard
+(NUMPATHS > 140 in botroute.qc, NUMGIBS + NUMPATHS > 436 in player.qc), while
+findradius() cost grows with the number of BotPath entities. decimate() picks
+a subset of at most `budget` nodes by weighted farthest-point sampling: each
+step takes the node that maximises
+
+    distance to the nearest node already kept  x  importance
+
+where importance grows with traffic and danger. High-value nodes are kept
+first and the rest of the map stays evenly covered, instead of thresholding
+away whole quiet areas. The distances tracked along the way give the
+coverage report for free.
+
+Works on plain lists of origins, or NumPy arrays when NumPy is installed
+(same picks either way).
+"""
+
+import math
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Default in-game budget. SpawnSavedWaypoint counts every loaded node in
+# NUMPATHS, and bots stop learning new paths once it passes 140 (botroute.qc),
+# so the budget leaves room for runtime path learning and keeps gibs far from
+# player.qc's 436 guard
+DEFAULT_NODE_BUDGET = 100
+
+# A node counts as covered if a kept node is within this distance
+COVERAGE_RADIUS = 128.0
+
+Vector = Tuple[float, float, float]
+
+
+def importance(traffic: Sequence[float], danger: Sequence[float]) -> List[float]:
+    """Per-node weight in [1, 3]: 1 + traffic and danger relative to their maxima"""
+    max_traffic = max(traffic, default=0) or 1.0
+    max_danger = max(danger, default=0) or 1.0
+    return [1.0 + t / max_traffic + d / max_danger for t, d in zip(traffic, danger)]
+
+
+def decimate(origins: Sequence[Vector], traffic: Sequence[float], danger: Sequence[float],
+             budget: int) -> Tuple[List[int], dict]:
+    """
+    Choose at most `budget` nodes; returns (kept indices in input order, report).
+
+    The report describes the coverage of the full set by the kept nodes:
+    nodes/kept, max and mean distance from any node to its nearest kept node,
+    the share of nodes within COVERAGE_RADIUS of a kept node, and the share
+    of total traffic and danger on kept nodes.
+    """
+    count = len(origins)
+    if count <= budget or budget <= 0:
+        kept = list(range(count))
+        return kept, _report(count, kept, [0.0] * count, traffic, danger)
+
+    weights = importance(traffic, danger)
+    if np is not None:
+        kept, nearest_sq = _farthest_points_numpy(origins, weights, budget)
+    else:
+        kept, nearest_sq = _farthest_points(origins, weights, budget)
+
+    kept.sort()
+    return kept, _report(count, kept, nearest_sq, traffic, danger)
+
+
+def _farthest_points(origins, weights, budget):
+    """Weighted farthest-point sampling (pure Python)"""
+    count = len(origins)
+    nearest_sq = [math.inf] * count
+    weights_sq = [w * w for w in weights]
+    chosen = [False] * count
+
+    # Start from the most important node (first one on ties)
+    pick = max(range(count), key=lambda i: (weights[i], -i))
+    kept = []
+    for _ in range(budget):
+        kept.append(pick)
+        chosen[pick] = True
+        px, py, pz = origins[pick]
+
+        best, best_score = -1, -1.0
+        for i in range(count):
+            x, y, z = origins[i]
+            dx, dy, dz = x - px, y - py, z - pz
+            dist_sq = dx * dx + dy * dy + dz * dz
+            if dist_sq < nearest_sq[i]:
+                nearest_sq[i] = dist_sq
+            if not chosen[i]:
+                # Compare squared scores: dist^2 * w^2 ranks like dist * w
+                score = nearest_sq[i] * weights_sq[i]
+                if score > best_score:
+                    best, best_score = i, score
+        pick = best
+
+    return kept, nearest_sq
+
+
+def _farthest_points_numpy(origins, weights, budget):
+    """Weighted farthest-point sampling, one vectorised pass per kept node"""
+    points = np.asarray(origins, dtype=np.float64)
+    xs, ys, zs = points[:, 0], points[:, 1], points[:, 2]
+    weights = np.asarray(weights, dtype=np.float64)
+    weights_sq = weights * weights
+
+    nearest_sq = np.full(len(points), np.inf)
+    chosen = np.zeros(len(points), dtype=bool)
+
+    # argmax takes the first index on ties, like the pure Python loop
+    pick = int(np.argmax(weights))
+    kept = []
+    for _ in range(budget):
+        kept.append(pick)
+        chosen[pick] = True
+        dx, dy, dz = xs - xs[pick], ys - ys[pick], zs - zs[pick]
+        np.minimum(nearest_sq, dx * dx + dy * dy + dz * dz, out=nearest_sq)
+
+        scores = nearest_sq * weights_sq
+        scores[chosen] = -1.0
+        pick = int(np.argmax(scores))
+
+    return kept, nearest_sq.tolist()
+
+
+def _report(count, kept, nearest_sq, traffic, danger) -> dict:
+    distances = [math.sqrt(d) for d in nearest_sq]
+    kept_set = set(kept)
+    total_traffic = sum(traffic)
+    total_danger = sum(danger)
+    kept_traffic = sum(t for i, t in enumerate(traffic) if i in kept_set)
+    kept_danger = sum(d for i, d in enumerate(danger) if i in kept_set)
+
+    return {
+        'nodes': count,
+        'kept': len(kept),
+        'max_gap': max(distances, default=0.0),
+        'mean_gap': sum(distances) / count if count else 0.0,
+        'covered': sum(1 for d in distances if d <= COVERAGE_RADIUS) / count if count else 1.0,
+        'traffic_kept': kept_traffic / total_traffic if total_traffic else 1.0,
+        'danger_kept': kept_danger / total_danger if total_danger else 1.0,
+    }
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Parse Cache for Modern Reaper Enhancements (MRE)
+Keeps what the tools extracted from a log, so an unchanged log is not
+parsed again.
+
+Tuning a threshold usually means running analyze_bot_logs.py or
+learn_rj_from_player.py on the same archived qconsole.log over and over.
+Each tool stores its parse result (per-bot summaries, RJ events and death
+times, waypoint dumps) under the log's identity:
+
+    size, mtime and a SHA-256 of the first and last HASH_BLOCK bytes
+
+so any append, truncation or rewrite of the log misses. One file per
+(log, kind) in the cache directory:
+
+    MREC                magic
+    version, marshal    uint16 format version, uint16 marshal format
+    payload             marshal.dumps() of the tool's result
+
+Results are plain tuples, lists, dicts and bytes (numbers packed with the
+array module), which marshal writes compactly and reads back fast. Each
+kind carries its own version ("rj-1"), bumped when its parser changes.
+
+A hit refreshes the entry's mtime; after each store the least recently
+used entries are deleted until the directory fits the budget. Only whole-
+file parses are cached: --incremental and --follow runs read new data
+every time.
+"""
+
+import hashlib
+import marshal
+import os
+import struct
+from pathlib import Path
+from typing import Any, List, Optional
+
+import tool_metrics
+
+CACHE_MAGIC = b'MREC'
+CACHE_VERSION = 1
+CACHE_HEADER_STRUCT = struct.Struct('<4sHH')
+CACHE_SUFFIX = '.mrc'
+
+# Bytes hashed at each end of the log
+HASH_BLOCK = 64 * 1024
+
+DEFAULT_BUDGET_MB = 256
+
+
+def default_cache_dir() -> Path:
+    """$MRE_PARSE_CACHE, else <user cache dir>/mre/parse"""
+    if os.environ.get('MRE_PARSE_CACHE'):
+        return Path(os.environ['MRE_PARSE_CACHE'])
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA') or Path.home() / '.cache'
+    return Path(base) / 'mre' / 'parse'
+
+
+def file_key(path) -> str:
+    """Identity of a log: size, mtime and a hash of its head and tail"""
+    stat_result = os.stat(path)
+    digest = hashlib.sha256(f"{stat_result.st_size}:{stat_result.st_mtime_ns}:".encode('ascii'))
+    with open(path, 'rb') as f:
+        digest.update(f.read(HASH_BLOCK))
+        if stat_result.st_size > HASH_BLOCK:
+            f.seek(max(HASH_BLOCK, stat_result.st_size - HASH_BLOCK))
+            digest.update(f.read(HASH_BLOCK))
+    return digest.hexdigest()[:32]
+
+
+class ParseCache:
+    """Parse results on disk, keyed by log identity, LRU within a byte budget"""
+
+    def __init__(self, cache_dir=None, budget_mb: float = DEFAULT_BUDGET_MB):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.budget = int(budget_mb * 1024 * 1024)
+
+    def _entry_path(self, log_path, kind: str) -> Path:
+        return self.cache_dir / f"{file_key(log_path)}-{kind}{CACHE_SUFFIX}"
+
+    def load(self, log_path, kind: str) -> Optional[Any]:
+        """The stored result for this log and kind, or None"""
+        try:
+            path = self._entry_path(log_path, kind)
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            tool_metrics.count('cache_misses')
+            return None
+
+        header_size = CACHE_HEADER_STRUCT.size
+        magic, version, marshal_version = CACHE_HEADER_STRUCT.unpack_from(data) \
+            if len(data) >= header_size else (b'', 0, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or marshal_version != marshal.version:
+            tool_metrics.count('cache_misses')
+            return None
+
+        try:
+            value = marshal.loads(data[header_size:])
+        except (EOFError, ValueError, TypeError):
+            tool_metrics.count('cache_misses')
+            return None
+
+        # Most recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        tool_metrics.count('cache_hits')
+        tool_metrics.count('cache_bytes_read', len(data))
+        return value
+
+    def store(self, log_path, kind: str, value: Any):
+        """Save a result for this log and kind, then trim to the budget"""
+        try:
+            path = self._entry_path(log_path, kind)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(CACHE_HEADER_STRUCT.pack(CACHE_MAGIC, CACHE_VERSION, marshal.version))
+                f.write(marshal.dumps(value))
+            os.replace(tmp_path, path)
+        except (OSError, ValueError):
+            return  # A cache that cannot be written only costs speed
+        self.evict(keep=path)
+
+    def entries(self) -> List[os.DirEntry]:
+        try:
+            return [entry for entry in os.scandir(self.cache_dir)
+                    if entry.is_file() and entry.name.endswith(CACHE_SUFFIX)]
+        except OSError:
+            return []
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """Delete least recently used entries until the cache fits the budget; returns bytes freed"""
+        entries = []
+        total = 0
+        for entry in self.entries():
+            try:
+                stat_result = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat_result.st_mtime_ns, stat_result.st_size, entry.path))
+            total += stat_result.st_size
+
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= self.budget:
+                break
+            if keep is not None and Path(path) == keep:
+                continue
+            try:
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+        if freed:
+            tool_metrics.count('cache_evicted_bytes', freed)
+        return freed
+
+
+def add_arguments(parser):
+    """Add --cache-dir, --cache-budget and --no-cache to a tool's argument parser"""
+    parser.add_argument("--cache-dir", type=Path,
+                        help="parse cache directory (default: $MRE_PARSE_CACHE or ~/.cache/mre/parse)")
+    parser.add_argument("--cache-budget", type=float, default=DEFAULT_BUDGET_MB, metavar="MB",
+                        help="disk space for the parse cache; least recently used entries "
+                             "go first (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always parse the log, without reading or writing the parse cache")
+
+
+def from_args(args) -> Optional[ParseCache]:
+    """The cache a tool's command line asks for (None with --no-cache)"""
+    if args.no_cache:
+        return None
+    return ParseCache(args.cache_dir, args.cache_budget)
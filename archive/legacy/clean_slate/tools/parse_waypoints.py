@@ -4,7 +4,8 @@ Waypoint Parser for Modern Reaper Enhancements
 Extracts waypoint dumps from qconsole.log and converts to proper QuakeC format.
 
 Usage:
-    python parse_waypoints.py <log_file> <map_name> [output_file]
+    python parse_waypoints.py <log_file> <map_name> [output_file] [--incremental] [--data]
+                              [--metrics FILE] [--profile FILE]
 
 Example:
     python parse_waypoints.py ../launch/quake-spasm/qconsole.log dm2
@@ -13,31 +14,70 @@ Example:
 Output format:
     - Vectors use single quotes: '1234.5 678.9 12.3'
     - Strings use double quotes: "target_name" or ""
+
+With --data the dump is written as a runtime data file instead (see
+waypoint_data.py), e.g. <game dir>/data/maps/dm2.wpt, which the mod loads
+at map start without a recompile.
 """
 
+import argparse
 import re
 import sys
 from pathlib import Path
 
+import qc_emitter
+import tool_metrics
+import waypoint_data
+import waypoint_graph
+import waypoint_routes
+from log_reader import DUMP_START, DUMP_END, IncrementalLogReader, read_last_block
 
-def extract_waypoints(log_file):
-    """Extract waypoint data between CUT HERE markers."""
-    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
 
-    # Find the waypoint section
-    start_marker = "// ===== CUT HERE: START WAYPOINTS ====="
-    end_marker = "// ===== CUT HERE: END WAYPOINTS ====="
+def extract_waypoints(log_file, reader=None):
+    """
+    Extract the last waypoint dump between CUT HERE markers.
 
-    start_idx = content.rfind(start_marker)  # Use rfind to get the LAST occurrence
-    end_idx = content.rfind(end_marker)
+    The log is read backwards from the tail, so the cost scales with the
+    dump size rather than the log size. With an IncrementalLogReader only
+    dumps written since its checkpoint are considered.
+    """
+    if reader is not None:
+        waypoint_section = extract_new_waypoints(reader)
+    else:
+        waypoint_section = read_last_block(log_file, DUMP_START, DUMP_END)
 
-    if start_idx == -1 or end_idx == -1:
+    if waypoint_section is None:
         print("ERROR: Waypoint markers not found in log file", file=sys.stderr)
-        print("Make sure you ran 'impulse 100' in-game to dump waypoints", file=sys.stderr)
+        print("Make sure you ran 'impulse 99' in-game to dump waypoints", file=sys.stderr)
         return None
 
-    waypoint_section = content[start_idx:end_idx + len(end_marker)]
+    return waypoint_section
+
+
+def extract_new_waypoints(reader):
+    """
+    Return the last complete dump among the lines appended since the checkpoint.
+
+    A dump that is still being written is left for the next run (the reader
+    is rewound to its START line).
+    """
+    waypoint_section = None
+    block = None
+    block_start = 0
+
+    for line in reader.lines():
+        if DUMP_START in line:
+            block = [line]
+            block_start = reader.line_start
+        elif block is not None:
+            block.append(line)
+            if DUMP_END in line:
+                waypoint_section = "".join(block)
+                block = None
+
+    if block is not None:
+        reader.rewind(block_start)
+
     return waypoint_section
 
 
@@ -57,14 +97,37 @@ def fix_quote_syntax(waypoint_line):
     return line
 
 
-def parse_waypoints(log_file, map_name, output_file=None):
-    """Parse waypoints and generate QuakeC file."""
+def write_waypoint_data(waypoint_section, output_file=None):
+    """Write the dump as a runtime data file (or print it)."""
+    nodes = waypoint_data.parse_spawn_calls(waypoint_section)
+    edges = waypoint_graph.parse_link_calls(waypoint_section)
 
-    # Extract raw waypoint data
-    waypoint_section = extract_waypoints(log_file)
-    if not waypoint_section:
-        return False
+    if output_file:
+        waypoint_data.write_nodes(output_file, nodes, edges)
+        print(f"Wrote {len(nodes)} waypoints to: {output_file}")
+    else:
+        graph = waypoint_graph.WaypointGraph.from_edges(len(nodes), edges)
+        links = waypoint_data.link_blocks(graph)
+        routes = build_routes(graph, nodes)
+        hops = routes.hops if routes is not None else []
+        print(f"{waypoint_data.DATA_HEADER}\n{len(nodes)}")
+        print("".join(waypoint_data.format_node(*node) for node in nodes), end="")
+        print(len(links))
+        print("".join(links), end="")
+        print(len(hops))
+        print("".join(row + "\n" for row in hops), end="")
 
+    return True
+
+
+def build_routes(graph, nodes):
+    """Next-hop tables over the dump's nodes (None without links)"""
+    return waypoint_routes.build_routes(graph, [origin for origin, _, _ in nodes],
+                                        [danger for _, _, danger in nodes])
+
+
+def write_waypoint_qc(waypoint_section, map_name, output_file=None):
+    """Write the dump as a QuakeC loader function (or print it)."""
     # Extract stats from footer
     total_match = re.search(r'// Total Nodes:\s*(\d+)', waypoint_section)
     traffic_match = re.search(r'// Avg Traffic Score:\s*([\d.]+)', waypoint_section)
@@ -78,65 +141,104 @@ def parse_waypoints(log_file, map_name, output_file=None):
     print(f"Avg Traffic Score: {avg_traffic:.1f}")
     print(f"Avg Danger Scent: {avg_danger:.1f}")
 
-    # Extract waypoint lines (SpawnSavedWaypoint calls)
+    # Extract waypoint lines (SpawnSavedWaypoint calls) and learned links;
+    # links are written in graph order, the slot order the route tables use
     waypoint_lines = re.findall(r'    SpawnSavedWaypoint\([^)]+\);', waypoint_section)
+    nodes = waypoint_data.parse_spawn_calls(waypoint_section)
+    graph = waypoint_graph.WaypointGraph.from_edges(len(nodes), waypoint_graph.parse_link_calls(waypoint_section))
+    link_lines = graph.qc_lines()
+    routes = build_routes(graph, nodes)
+    route_lines = routes.qc_lines() if routes is not None else []
 
     if len(waypoint_lines) != total_nodes:
         print(f"WARNING: Found {len(waypoint_lines)} waypoint lines but expected {total_nodes}", file=sys.stderr)
 
-    # Generate output file content
-    output_lines = [
-        f"// ===== {map_name.upper()} WAYPOINTS =====\n",
-        f"// Generated: {total_nodes} nodes from bot traffic analysis\n",
-        f"// Avg Traffic Score: {avg_traffic:.1f}\n",
-        f"// Avg Danger Scent: {avg_danger:.1f}\n",
-        f"// Format: SpawnSavedWaypoint(origin, traffic_score, danger_scent, target)\n",
-        f"//\n",
-        f"// PHASE 6: Smart Triggers (Target Linking for Button->Door Logic)\n",
-        f"\n",
-        f"void() LoadMapWaypoints_{map_name} =\n",
-        f"{{\n"
-    ]
-
-    # Fix quote syntax for each waypoint
-    for line in waypoint_lines:
-        fixed_line = fix_quote_syntax(line)
-        output_lines.append(fixed_line + '\n')
-
-    output_lines.append("};\n")
+    def emit(qc):
+        qc.comment(f"===== {map_name.upper()} WAYPOINTS =====")
+        qc.comment(f"Generated: {total_nodes} nodes from bot traffic analysis")
+        qc.comment(f"Avg Traffic Score: {avg_traffic:.1f}")
+        qc.comment(f"Avg Danger Scent: {avg_danger:.1f}")
+        qc.comment("Format: SpawnSavedWaypoint(origin, traffic_score, danger_scent, target)")
+        qc.comment("        SpawnSavedLink(from, to, link_type, usage) (node numbers from 1)")
+        qc.comment("        SpawnSavedRoutes(node, next_hop_slots)")
+        qc.comment()
+        qc.comment("PHASE 6: Smart Triggers (Target Linking for Button->Door Logic)")
+        qc.line()
+
+        with qc.loader(f"LoadMapWaypoints_{map_name}") as body:
+            # Links number the nodes spawned from here on
+            if link_lines:
+                body.statement("    saved_node_base = saved_node_count;")
+
+            # Fix quote syntax for each waypoint
+            body.statements_from(fix_quote_syntax(line) for line in waypoint_lines)
+
+            # Links refer to the nodes above by number, so they come last
+            body.statements_from(link_lines)
+            body.statements_from(route_lines)
 
     # Write output
     if output_file:
-        output_path = Path(output_file)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.writelines(output_lines)
+        with qc_emitter.write_qc_file(output_file) as qc:
+            emit(qc)
         print(f"\nWrote {total_nodes} waypoints to: {output_file}")
     else:
         # Print to stdout
-        print("\n" + "".join(output_lines))
+        print()
+        emit(qc_emitter.QCEmitter(sys.stdout))
 
     return True
 
 
+def parse_waypoints(log_file, map_name, output_file=None, reader=None, data=False):
+    """Parse waypoints and generate QuakeC file (or a runtime data file)."""
+
+    # Extract raw waypoint data
+    with tool_metrics.stage('extract'):
+        waypoint_section = extract_waypoints(log_file, reader)
+    if not waypoint_section:
+        return False
+
+    if data:
+        with tool_metrics.stage('generate'):
+            return write_waypoint_data(waypoint_section, output_file)
+
+    with tool_metrics.stage('generate'):
+        return write_waypoint_qc(waypoint_section, map_name, output_file)
+
+
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python parse_waypoints.py <log_file> <map_name> [output_file]")
-        print("\nExample:")
-        print("  python parse_waypoints.py ../launch/quake-spasm/qconsole.log dm2")
-        print("  python parse_waypoints.py ../launch/quake-spasm/qconsole.log dm2 ../reaper_mre/maps/dm2.qc")
+    parser = argparse.ArgumentParser(
+        description="Convert waypoint dumps from qconsole.log into QuakeC",
+        epilog="Example: python parse_waypoints.py ../launch/quake-spasm/qconsole.log dm2 "
+               "../reaper_mre/maps/dm2.qc")
+    parser.add_argument("log_file", help="path to qconsole.log")
+    parser.add_argument("map_name", help="map name (e.g. dm2)")
+    parser.add_argument("output_file", nargs="?", help="QuakeC output file (default: print)")
+    parser.add_argument("--data", action="store_true",
+                        help="write a runtime data file (.wpt) instead of QuakeC; "
+                             "loaded at map start without recompiling")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only look at dumps written since the previous --incremental run")
+    parser.add_argument("--checkpoint", help="checkpoint file for --incremental (default: next to the log)")
+    tool_metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not Path(args.log_file).exists():
+        print(f"ERROR: Log file not found: {args.log_file}", file=sys.stderr)
         sys.exit(1)
 
-    log_file = sys.argv[1]
-    map_name = sys.argv[2]
-    output_file = sys.argv[3] if len(sys.argv) > 3 else None
+    with tool_metrics.session("parse_waypoints", args):
+        reader = None
+        if args.incremental:
+            reader = IncrementalLogReader(args.log_file, args.checkpoint, tool="parse_waypoints")
 
-    if not Path(log_file).exists():
-        print(f"ERROR: Log file not found: {log_file}", file=sys.stderr)
-        sys.exit(1)
+        success = parse_waypoints(args.log_file, args.map_name, args.output_file, reader, args.data)
+
+        if reader is not None:
+            reader.save()
 
-    success = parse_waypoints(log_file, map_name, output_file)
-    sys.exit(0 if success else 1)
+        sys.exit(0 if success else 1)
 
 
 if __name__ == "__main__":
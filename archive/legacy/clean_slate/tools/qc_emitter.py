@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+QuakeC Emitter for Modern Reaper Enhancements (MRE)
+Streams generated QuakeC loader functions to a file.
+
+The tools that turn bot memory into compiled-in QuakeC (bot_memory_manager
+--qc, parse_waypoints, learn_rj_from_player, generate_dm4_waypoints) all
+write the same shape of file: a comment header and one loader function
+holding a spawn call per node, link and route table. QCEmitter writes those
+lines straight to a buffered file handle as they are produced, so the tool
+never holds the whole file in memory.
+
+Big maps make for huge loaders, and old compilers and VMs cap the size of a
+single function. A loader is therefore split into sub-functions of at most
+LOADER_CHUNK statements, chained from the entry point that worldspawn calls:
+
+    void() Loaddm4Memory_1 = { ...256 statements... };
+    void() Loaddm4Memory_2 = { ... };
+    void() Loaddm4Memory =
+    {
+        Loaddm4Memory_1();
+        Loaddm4Memory_2();
+    };
+
+A loader that fits in one chunk is written as a single function, as
+before. Only the current chunk is buffered until it is known which case
+applies.
+
+write_qc_file() streams to a temporary file and hashes the text on the way;
+the target is only replaced when the content changed, so unchanged output
+keeps its timestamp and does not trigger a recompile.
+"""
+
+import hashlib
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, TextIO
+
+# Statements per loader sub-function
+LOADER_CHUNK = 256
+
+# Write buffer of QC output files
+WRITE_BUFFER = 256 * 1024
+
+INDENT = "    "
+
+
+class QCEmitter:
+    """Writes QuakeC text to a file object, hashing it as it goes"""
+
+    def __init__(self, out: TextIO, chunk_size: int = LOADER_CHUNK):
+        self.out = out
+        self.chunk_size = chunk_size
+        self._hash = hashlib.sha256()
+
+        # Set by write_qc_file() once the file is complete
+        self.sha256: Optional[str] = None
+        self.changed = True
+
+    def write(self, text: str):
+        self.out.write(text)
+        self._hash.update(text.encode('utf-8'))
+
+    def line(self, text: str = ""):
+        """One line at file level"""
+        self.write(text + "\n")
+
+    def comment(self, text: str = ""):
+        """A // comment line at file level"""
+        self.line(f"// {text}" if text else "//")
+
+    def hexdigest(self) -> str:
+        """SHA-256 of everything written so far"""
+        return self._hash.hexdigest()
+
+    @contextmanager
+    def loader(self, name: str) -> Iterator['LoaderWriter']:
+        """Write the loader function `name`, split into chained sub-functions if long"""
+        writer = LoaderWriter(self, name)
+        yield writer
+        writer.close()
+
+
+class LoaderWriter:
+    """Body of one loader function; see QCEmitter.loader()"""
+
+    def __init__(self, emitter: QCEmitter, name: str):
+        self.emitter = emitter
+        self.name = name
+        self.parts = 0           # Sub-functions written so far
+        self.statements = 0      # Statements in the current chunk
+        self.pending: Optional[List[str]] = []  # Current chunk, until it is known to be the only one
+
+    def statement(self, line: str):
+        """One statement (a full line, indentation included)"""
+        if self.statements >= self.emitter.chunk_size:
+            self._end_part()
+        self.statements += 1
+        self._add(line)
+
+    def statements_from(self, lines: Iterable[str]):
+        for line in lines:
+            self.statement(line)
+
+    def comment(self, text: str):
+        """A // comment inside the function"""
+        self._add(f"{INDENT}// {text}")
+
+    def blank(self):
+        self._add("")
+
+    def _add(self, line: str):
+        if self.pending is not None:
+            self.pending.append(line)
+        else:
+            self.emitter.line(line)
+
+    def _end_part(self):
+        """Close the current sub-function; the next statement opens another"""
+        if self.pending is not None:
+            # More than one chunk: the buffered one becomes part 1
+            self._open_part()
+            for line in self.pending:
+                self.emitter.line(line)
+            self.pending = None
+        self.emitter.line("};")
+        self.emitter.line()
+        self._open_part()
+        self.statements = 0
+
+    def _open_part(self):
+        self.parts += 1
+        self.emitter.line(f"void() {self.name}_{self.parts} =")
+        self.emitter.line("{")
+
+    def close(self):
+        emit = self.emitter
+        if self.pending is not None:
+            # Everything fitted in one chunk: a single plain function
+            emit.line(f"void() {self.name} =")
+            emit.line("{")
+            for line in self.pending:
+                emit.line(line)
+            emit.line("};")
+            self.pending = None
+            return
+
+        emit.line("};")
+        emit.line()
+        emit.line(f"void() {self.name} =")
+        emit.line("{")
+        for part in range(1, self.parts + 1):
+            emit.line(f"{INDENT}{self.name}_{part}();")
+        emit.line("};")
+
+
+def file_sha256(path) -> Optional[str]:
+    """SHA-256 of a file's bytes, or None if it cannot be read"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(WRITE_BUFFER), b''):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+@contextmanager
+def write_qc_file(path, chunk_size: int = LOADER_CHUNK) -> Iterator[QCEmitter]:
+    """
+    Stream a QC file to path through a QCEmitter.
+
+    The text goes to path + '.tmp' and replaces path only if its SHA-256
+    differs from the current file. Afterwards emitter.sha256 holds the
+    hash and emitter.changed tells whether path was rewritten. Nothing is
+    replaced if the with-block raises.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n', buffering=WRITE_BUFFER) as f:
+            emitter = QCEmitter(f, chunk_size)
+            yield emitter
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    emitter.sha256 = emitter.hexdigest()
+    emitter.changed = file_sha256(path) != emitter.sha256
+    if emitter.changed:
+        os.replace(tmp_path, path)
+    else:
+        os.remove(tmp_path)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for analyze_bot_logs.py: chunked parsing must give the same result as
+one sequential pass.
+
+Run from tools/:
+    python -m pytest test_analyze_bot_logs.py
+    python -m unittest test_analyze_bot_logs
+"""
+
+import contextlib
+import io
+import random
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from analyze_bot_logs import BotLogAnalyzer
+from log_reader import split_line_ranges
+
+BOTS = ["Ranger", "Sarge", "Hater", "Visor"]
+TARGETS = ["None visible", "Ranger (score=12.9, HP=21, dist=243.5u)", "Sarge (score=40.0, HP=100, dist=80.0u)"]
+GOALS = ["item_armorInv (score=330.4, dist=2344.7u)", "weapon_rocketlauncher (score=81.0, dist=520.9u)",
+         "item_health (score=12.0, dist=64.0u)"]
+
+# PLAYER_RJ_DAMAGE is printed wrapped over two lines; a chunk boundary inside
+# it must neither break the parse nor turn its halves into events
+RJ_WRAPPED = ["PLAYER_RJ_DAMAGE: '1234.5 678.9 12.3' | dmg=45.0 | vel='100 200 300' |",
+              "ang='-60 90 0' | time=123.45"]
+
+# Job counts to compare against the sequential pass; the last one puts a
+# chunk boundary after every line
+JOB_COUNTS = (1, 2, 3, 7, 1000)
+
+
+def synthetic_lines(seed: int = 1, count: int = 400):
+    """A small server log: bot events, deaths (some before a bot's first
+    event), noise and wrapped multi-line events"""
+    rng = random.Random(seed)
+    lines = ["SpawnServer: dm4", "Visor died", "Unknown died"]
+    for i in range(count):
+        bot = rng.choice(BOTS)
+        roll = rng.random()
+        if roll < 0.35:
+            lines.append(f"[{bot}] TARGET: {rng.choice(TARGETS)}")
+        elif roll < 0.6:
+            lines.append(f"[{bot}] GOAL: {rng.choice(GOALS)}")
+        elif roll < 0.65:
+            lines.append(f"[{bot}] WEAPON: RL → GL (tactical)")
+        elif roll < 0.7:
+            lines.append(f"[{bot}] COMBO: shaft-combo")
+        elif roll < 0.73:
+            lines.append(f"[{bot}] UNSTUCK: Train surf")
+        elif roll < 0.8:
+            lines.append(f"{bot} died")
+        elif roll < 0.85:
+            lines.extend(RJ_WRAPPED)
+        else:
+            lines.append(f"{bot} got the Mega Health")
+    return lines
+
+
+def parse(log_path, jobs=None):
+    """(per-bot summaries as records, report text) of a sequential or chunked parse"""
+    analyzer = BotLogAnalyzer(log_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if jobs is None:
+            analyzer.parse_log()
+        else:
+            analyzer.parse_chunked(jobs, min_size=1)
+    with contextlib.redirect_stdout(io.StringIO()) as report:
+        analyzer.print_summary()
+    summaries = {name: bot.to_record() for name, bot in analyzer.bot_summaries().items()}
+    return summaries, report.getvalue()
+
+
+class ChunkedParseTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix="mre_analyze_"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_log(self, lines, newline="\n") -> Path:
+        log_path = self.tmp_dir / "qconsole.log"
+        log_path.write_bytes((newline.join(lines) + newline).encode('utf-8'))
+        return log_path
+
+    def assert_summaries_equal(self, actual, expected):
+        """Equal summaries; float sums may differ in the last bits, as the
+        chunks add their scores in a different grouping"""
+        self.assertEqual(actual.keys(), expected.keys())
+        for name, record in expected.items():
+            self.assertEqual(actual[name].keys(), record.keys())
+            for field_name, value in record.items():
+                if isinstance(value, float):
+                    self.assertAlmostEqual(actual[name][field_name], value, places=6, msg=(name, field_name))
+                elif field_name == 'goal_values':
+                    # A set in the summary, listed in no particular order
+                    self.assertEqual(set(actual[name][field_name]), set(value), msg=(name, field_name))
+                else:
+                    self.assertEqual(actual[name][field_name], value, msg=(name, field_name))
+
+    def assert_chunked_matches(self, log_path):
+        expected_summaries, expected_report = parse(log_path)
+        self.assertTrue(expected_summaries, "the synthetic log should produce bot summaries")
+        for jobs in JOB_COUNTS:
+            with self.subTest(jobs=jobs):
+                summaries, report = parse(log_path, jobs)
+                self.assertEqual(report, expected_report)
+                self.assert_summaries_equal(summaries, expected_summaries)
+
+    def test_chunked_matches_sequential(self):
+        self.assert_chunked_matches(self.write_log(synthetic_lines()))
+
+    def test_chunked_matches_sequential_crlf(self):
+        self.assert_chunked_matches(self.write_log(synthetic_lines(seed=2), newline="\r\n"))
+
+    def test_boundary_inside_multiline_event(self):
+        lines = synthetic_lines(seed=3, count=40)
+        lines[20:20] = RJ_WRAPPED
+        log_path = self.write_log(lines)
+
+        # With a boundary after every line, one falls between the two halves
+        # of each wrapped event
+        data = log_path.read_bytes()
+        wrap_split = data.index(RJ_WRAPPED[1].encode('utf-8'))
+        ranges = split_line_ranges(log_path, JOB_COUNTS[-1], min_size=1)
+        self.assertIn(wrap_split, [start for start, _ in ranges])
+
+        self.assert_chunked_matches(log_path)
+
+    def test_switches_across_boundary(self):
+        # Every line switches target or goal; each boundary splits a switch
+        lines = []
+        for i in range(30):
+            lines.append(f"[Ranger] TARGET: {TARGETS[i % len(TARGETS)]}")
+            lines.append(f"[Ranger] GOAL: {GOALS[i % len(GOALS)]}")
+        log_path = self.write_log(lines)
+        self.assert_chunked_matches(log_path)
+
+        summaries, _ = parse(log_path, JOB_COUNTS[-1])
+        self.assertEqual(summaries["Ranger"]["target_switches"], 29)
+        self.assertEqual(summaries["Ranger"]["goal_switches"], 29)
+
+
+if __name__ == "__main__":
+    unittest.main()
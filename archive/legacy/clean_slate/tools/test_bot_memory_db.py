@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Tests for bot_memory_db.py.
+
+Run from tools/:
+    python -m pytest test_bot_memory_db.py
+    python -m unittest test_bot_memory_db
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from bot_memory_db import BotMemoryDB
+from bot_memory_manager import WaypointNode
+
+RADIUS = 64.0
+
+
+def node(origin, traffic, danger) -> WaypointNode:
+    return WaypointNode(origin=origin, traffic_score=traffic, danger_scent=danger, last_updated="")
+
+
+class NodeIdTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix="mre_db_"))
+        self.db = BotMemoryDB(self.tmp_dir / "bot_memory.db")
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_dropped_node_id_is_not_reused(self):
+        # optimize() drops the highest id but keeps its observation
+        self.db.merge_session('dm4', [node((0.0, 0.0, 0.0), 50.0, 5.0), node((500.0, 0.0, 0.0), 0.1, 0.1)], RADIUS)
+        self.assertEqual(self.db.optimize('dm4', 5.0, 2.0), (1, 1))
+        self.db.merge_session('dm4', [node((1000.0, 0.0, 0.0), 20.0, 3.0)], RADIUS)
+
+        history = self.db.node_history('dm4', (1000.0, 0.0, 0.0), RADIUS)
+        self.assertEqual([(traffic, danger) for _, traffic, danger in history], [(20.0, 3.0)])
+        self.assertEqual(len(self.db.load_nodes('dm4')), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for learn_rj_from_player.py: the bisect/NumPy survival check and the
+grid clustering must pick what the original O(n^2) scans picked.
+
+Run from tools/:
+    python -m pytest test_learn_rj_from_player.py
+    python -m unittest test_learn_rj_from_player
+"""
+
+import random
+import unittest
+from unittest import mock
+
+import learn_rj_from_player as learn_rj
+from learn_rj_from_player import RocketJumpEvent
+
+SEEDS = range(20)
+
+
+def reference_validate(events, death_times):
+    """validate_rj_success as first written: every death for every event"""
+    for event in events:
+        upward_velocity = event.velocity[2]
+        event.speed_gain = upward_velocity
+        pitch = event.angles[0]
+        proper_angle = -90 <= pitch <= -20
+        survived = True
+        for death_time in death_times:
+            if 0 < (death_time - event.timestamp) < 2.0:
+                survived = False
+                break
+        if upward_velocity > 200 and proper_angle and survived:
+            event.success = True
+            event.height_gain = upward_velocity / 10.0
+
+
+def reference_cluster(events, radius=128.0):
+    """cluster_rj_locations as first written: every pair of events"""
+    successful = [e for e in events if e.success]
+    clusters = []
+    used = set()
+    for i, event in enumerate(successful):
+        if i in used:
+            continue
+        cluster = [event]
+        for j, other in enumerate(successful):
+            if i == j or j in used:
+                continue
+            dx = event.origin[0] - other.origin[0]
+            dy = event.origin[1] - other.origin[1]
+            dz = event.origin[2] - other.origin[2]
+            if (dx * dx + dy * dy + dz * dz) ** 0.5 < radius:
+                cluster.append(other)
+                used.add(j)
+        clusters.append(max(cluster, key=lambda e: e.speed_gain))
+        used.add(i)
+    return clusters
+
+
+def random_log(seed, count=300):
+    """Events bunched into a few spots, as (events, copy of events, sorted deaths)
+
+    Integer origins land events on cell edges and exactly one radius apart;
+    repeated speeds make the best-per-cluster pick depend on order; deaths
+    share timestamps with events and fall exactly 2 s after some.
+    """
+    rng = random.Random(seed)
+    spots = [(rng.randint(-1024, 1024), rng.randint(-1024, 1024), rng.randint(-256, 256)) for _ in range(8)]
+    rows = []
+    time = 0.0
+    for _ in range(count):
+        time = round(time + rng.choice((0.0, 0.5, 1.0, 2.0)), 2)
+        x, y, z = rng.choice(spots)
+        origin = (x + rng.randint(-160, 160), y + rng.randint(-160, 160), z + rng.choice((0, 64, 128)))
+        velocity = (0.0, 0.0, float(rng.choice((150, 250, 400, 400, 650))))
+        angles = (float(rng.choice((-95, -90, -60, -20, -10))), 0.0, 0.0)
+        rows.append((origin, 50.0, velocity, angles, time))
+    deaths = sorted(round(t + rng.choice((0.0, 0.5, 2.0, 3.0)), 2)
+                    for *_, t in rng.sample(rows, count // 5))
+
+    def events():
+        return [RocketJumpEvent(*row) for row in rows]
+    return events(), events(), deaths
+
+
+class ValidateTest(unittest.TestCase):
+    def assert_validate_matches(self):
+        for seed in SEEDS:
+            with self.subTest(seed=seed):
+                events, expected, deaths = random_log(seed)
+                learn_rj.validate_rj_success(events, deaths)
+                reference_validate(expected, deaths)
+                # Indices of the events judged differently (a full list diff is slow)
+                self.assertEqual([i for i, (event, reference) in enumerate(zip(events, expected))
+                                  if (event.success, event.speed_gain, event.height_gain)
+                                  != (reference.success, reference.speed_gain, reference.height_gain)], [])
+
+    def test_matches_pairwise_scan(self):
+        with mock.patch.object(learn_rj, 'np', None):
+            self.assert_validate_matches()
+
+    @unittest.skipIf(learn_rj.np is None, "NumPy not installed")
+    def test_numpy_matches_pairwise_scan(self):
+        self.assert_validate_matches()
+
+    def test_no_deaths(self):
+        events, expected, _ = random_log(0)
+        learn_rj.validate_rj_success(events, [])
+        reference_validate(expected, [])
+        self.assertEqual([e.success for e in events], [e.success for e in expected])
+
+
+class ClusterTest(unittest.TestCase):
+    def test_matches_pairwise_scan(self):
+        for seed in SEEDS:
+            with self.subTest(seed=seed):
+                events, _, deaths = random_log(seed)
+                learn_rj.validate_rj_success(events, deaths)
+                self.assertTrue(any(e.success for e in events))
+                index = {id(e): i for i, e in enumerate(events)}
+                for radius in (64.0, 128.0):
+                    picked = [index[id(e)] for e in learn_rj.cluster_rj_locations(events, radius)]
+                    expected = [index[id(e)] for e in reference_cluster(events, radius)]
+                    self.assertEqual(picked, expected, msg=radius)
+
+    def test_no_successful_events(self):
+        events, _, _ = random_log(0)
+        self.assertEqual(learn_rj.cluster_rj_locations(events), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
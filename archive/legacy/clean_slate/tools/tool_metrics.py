@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Tool Metrics for Modern Reaper Enhancements (MRE)
+Stage timers, counters and peak memory for the bot tools, as JSON.
+
+Every tool runs its command inside a session and marks its stages:
+
+    with tool_metrics.session("bot_memory_manager", args):
+        with tool_metrics.stage("extract"):
+            ...
+        tool_metrics.count("lines_scanned", lines)
+
+and takes two extra options (add_arguments):
+
+    --metrics FILE   write the run's metrics to FILE as JSON
+    --profile FILE   run under cProfile and write a pstats file
+                     (read it with python -m pstats FILE)
+
+The JSON report, one object per run:
+
+    {
+      "tool": "bot_memory_manager", "version": 1,
+      "started": "2026-01-04T16:30:00", "argv": ["auto"], "exit_code": 0,
+      "wall": 1.92, "cpu": 1.85, "cpu_children": 0.0,
+      "peak_rss_mb": 61.3, "peak_rss_children_mb": null,
+      "stages": {"extract": {"wall": 1.2, "cpu": 1.19, "calls": 1}, ...},
+      "counters": {"bytes_read": 20971520, "lines_scanned": 431230, ...}
+    }
+
+Times are seconds. Stages keep the order they were first entered in and
+may nest (an outer stage's time includes the inner one). Worker processes
+show up in cpu_children / peak_rss_children_mb once they have exited.
+Timers and counters are always collected (a dict update per stage or per
+read block) but only written when asked. Peak RSS needs the resource module
+(Unix); elsewhere it is null.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows: no peak RSS
+
+METRICS_VERSION = 1
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """Peak resident set size of this process (or its waited-for children) in MB"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    if not usage.ru_maxrss:
+        return None
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+class Metrics:
+    """Timers and counters of one tool run"""
+
+    def __init__(self, tool: str = "tool"):
+        self.tool = tool
+        self.started = datetime.now()
+        self.exit_code: Optional[int] = None
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._children_cpu = self._children_time()
+
+    @staticmethod
+    def _children_time() -> float:
+        times = os.times()
+        return times.children_user + times.children_system
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the wall and CPU time of the with-block to stage `name`"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+            entry['wall'] += time.perf_counter() - wall
+            entry['cpu'] += time.process_time() - cpu
+            entry['calls'] += 1
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self) -> dict:
+        return {
+            'tool': self.tool,
+            'version': METRICS_VERSION,
+            'started': self.started.isoformat(timespec='seconds'),
+            'argv': sys.argv[1:],
+            'exit_code': self.exit_code,
+            'wall': round(time.perf_counter() - self._wall, 6),
+            'cpu': round(time.process_time() - self._cpu, 6),
+            'cpu_children': round(self._children_time() - self._children_cpu, 6),
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_rss_children_mb': peak_rss_mb(children=True),
+            'stages': {name: {'wall': round(entry['wall'], 6), 'cpu': round(entry['cpu'], 6),
+                              'calls': entry['calls']}
+                       for name, entry in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+
+    def write(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write('\n')
+        return path
+
+
+# Metrics of the running tool; a fresh one per session()
+_current = Metrics()
+
+
+def current() -> Metrics:
+    return _current
+
+
+def stage(name: str):
+    """Time a with-block as stage `name` of the running tool"""
+    return _current.stage(name)
+
+
+def count(name: str, amount: int = 1):
+    """Add `amount` to counter `name` of the running tool"""
+    _current.count(name, amount)
+
+
+def add_arguments(parser):
+    """Add --metrics and --profile to a tool's argument parser"""
+    parser.add_argument("--metrics", type=Path, metavar="FILE",
+                        help="write stage timings, counters and peak memory as JSON")
+    parser.add_argument("--profile", type=Path, metavar="FILE",
+                        help="run under cProfile and write a pstats file")
+
+
+@contextmanager
+def session(tool: str, args=None, metrics_path=None, profile_path=None) -> Iterator[Metrics]:
+    """
+    Collect metrics for one tool run, profiling it if asked.
+
+    Paths default to args.metrics / args.profile (see add_arguments). The
+    report is written even if the run ends in sys.exit() or an exception,
+    with its exit code. Sessions nest: the enclosing one resumes afterwards.
+    """
+    global _current
+    metrics_path = metrics_path or getattr(args, 'metrics', None)
+    profile_path = profile_path or getattr(args, 'profile', None)
+
+    previous = _current
+    _current = metrics = Metrics(tool)
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler is not None:
+        profiler.enable()
+
+    try:
+        yield metrics
+        metrics.exit_code = 0
+    except SystemExit as stop:
+        if stop.code is None or isinstance(stop.code, int):
+            metrics.exit_code = stop.code or 0
+        else:
+            metrics.exit_code = 1  # sys.exit("message")
+        raise
+    except KeyboardInterrupt:
+        metrics.exit_code = 130
+        raise
+    except BaseException:
+        metrics.exit_code = 1
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            Path(profile_path).parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(profile_path))
+        if metrics_path:
+            metrics.write(metrics_path)
+        _current = previous
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Waypoint Data Files for Modern Reaper Enhancements (MRE)
+Runtime bot memory read by LoadBotMemory() in mre/botroute.qc.
+
+Instead of compiling thousands of SpawnSavedWaypoint() calls into progs.dat,
+the tools can write data/maps/<mapname>.wpt into the game directory. The
+mod reads it at map start with the FRIK_FILE builtins, a batch of nodes per
+frame, so refreshing bot memory needs no recompile.
+
+QuakeC can only read files a line at a time (fgets), so the format is text:
+
+    MREWPT 3            header and format version
+    <count>             number of nodes
+    'x y z'             then three lines per node: origin (stov),
+    traffic             traffic score (stof),
+    danger              danger scent (stof)
+    <links>             number of links (version 2)
+    'from to type'      then two lines per link: node numbers counting
+    usage               from 1 and LINK_* type (stov), usage (stof)
+    <routes>            number of route rows, 0 or <count> (version 3)
+    0312...             then one line per node: its next-hop table, one
+                        movetarget slot per node (see waypoint_routes.py)
+
+Values use one decimal, as in the waypoint dumps. Version 1 files (nodes
+only) and version 2 files (no routes) are still read.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from waypoint_graph import Edge, WaypointGraph
+from waypoint_routes import RouteTable, build_routes
+
+DATA_HEADER = "MREWPT 3"
+DATA_SUFFIX = ".wpt"
+
+# Headers LoadBotMemory accepts; version 1 has no link section, version 2
+# no route section
+READ_HEADERS = ("MREWPT 1", "MREWPT 2", DATA_HEADER)
+
+# Template for one node (three lines)
+NODE_FORMAT = "'%.1f %.1f %.1f'\n%.1f\n%.1f\n"
+
+# Template for one link (two lines)
+LINK_FORMAT = "'%d %d %d'\n%.1f\n"
+
+# SpawnSavedWaypoint call from a dump or a generated .qc file; the origin may
+# be in doubled quotes (''x y z'') as printed by bprint in the dump
+SPAWN_CALL_PATTERN = re.compile(
+    r"SpawnSavedWaypoint\(\s*'+\s*([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s*'+\s*,\s*([-\d.]+)\s*,\s*([-\d.]+)")
+
+Vector = Tuple[float, float, float]
+
+
+def data_path(game_dir: Path, mapname: str) -> Path:
+    """Where the mod looks for a map's data file (FRIK_FILE reads from data/)"""
+    return Path(game_dir) / "data" / "maps" / f"{mapname}{DATA_SUFFIX}"
+
+
+def format_node(origin: Vector, traffic: float, danger: float) -> str:
+    return NODE_FORMAT % (origin[0], origin[1], origin[2], traffic, danger)
+
+
+def parse_spawn_calls(text: str) -> List[Tuple[Vector, float, float]]:
+    """(origin, traffic, danger) for every SpawnSavedWaypoint call in text"""
+    return [((float(x), float(y), float(z)), float(traffic), float(danger))
+            for x, y, z, traffic, danger in SPAWN_CALL_PATTERN.findall(text)]
+
+
+def link_blocks(graph: Optional[WaypointGraph]) -> List[str]:
+    """Link lines for a graph over the nodes in file order"""
+    if graph is None:
+        return []
+    return [LINK_FORMAT % (src + 1, dst + 1, link_type, usage)
+            for src, dst, link_type, usage in graph.edges()]
+
+
+def write_data_file(path, node_blocks: Iterable[str], count: int,
+                    graph: Optional[WaypointGraph] = None,
+                    routes: Optional[RouteTable] = None) -> Path:
+    """
+    Write a data file from pre-formatted node blocks (see format_node), and
+    the links of graph and next-hop tables of routes (over the nodes in the
+    same order) if given.
+
+    The file is written next to its destination and swapped in, so a map
+    starting meanwhile never reads half a file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    # newline='\n': the header check in QuakeC compares the whole line
+    with open(tmp_path, 'w', encoding='ascii', newline='\n') as f:
+        f.write(f"{DATA_HEADER}\n{count}\n")
+        f.writelines(node_blocks)
+        links = link_blocks(graph)
+        f.write(f"{len(links)}\n")
+        f.writelines(links)
+        hops = routes.hops if routes is not None else []
+        f.write(f"{len(hops)}\n")
+        f.writelines(row + '\n' for row in hops)
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_nodes(path, nodes: Iterable[Tuple[Vector, float, float]],
+                edges: Iterable[Edge] = ()) -> int:
+    """Write (origin, traffic, danger) tuples, links and routes between them; returns the node count"""
+    nodes = list(nodes)
+    graph = WaypointGraph.from_edges(len(nodes), edges)
+    routes = build_routes(graph, [origin for origin, _, _ in nodes], [danger for _, _, danger in nodes])
+    blocks = [format_node(origin, traffic, danger) for origin, traffic, danger in nodes]
+    write_data_file(path, blocks, len(blocks), graph, routes)
+    return len(blocks)
+
+
+def read_data(path) -> Optional[Tuple[List[Tuple[Vector, float, float]], List[Edge]]]:
+    """Read a data file back as (nodes, links) (None if it is not one)"""
+    with open(path, 'r', encoding='ascii') as f:
+        lines = f.read().split('\n')
+
+    if not lines or lines[0] not in READ_HEADERS:
+        return None
+
+    count = int(lines[1])
+    nodes = []
+    for i in range(2, 2 + count * 3, 3):
+        origin = tuple(float(v) for v in lines[i].strip("'").split())
+        nodes.append((origin, float(lines[i + 1]), float(lines[i + 2])))
+
+    edges = []
+    links_at = 2 + count * 3
+    if lines[0] != READ_HEADERS[0] and links_at < len(lines):
+        for i in range(links_at + 1, links_at + 1 + int(lines[links_at]) * 2, 2):
+            src, dst, link_type = (int(v) for v in lines[i].strip("'").split())
+            edges.append((src - 1, dst - 1, link_type, float(lines[i + 1])))
+
+    return nodes, edges
+
+
+def read_nodes(path) -> Optional[List[Tuple[Vector, float, float]]]:
+    """Read a data file's nodes back (None if it is not one)"""
+    data = read_data(path)
+    return data[0] if data is not None else None
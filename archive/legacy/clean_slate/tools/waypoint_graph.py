@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Waypoint Graph for Modern Reaper Enhancements (MRE)
+Learned links between waypoints (movetarget..movetarget6 in QuakeC).
+
+Each BotPath keeps up to six outgoing links, each with a type (LINK_WALK,
+LINK_JUMP, ... in defs.qc) and a usage count (LinkNodes in botroute.qc).
+DumpWaypoints prints them as
+
+    SpawnSavedLink(from, to, link_type, usage);
+
+with node numbers counting from 1 in dump order. A WaypointGraph stores them
+in compressed sparse row (CSR) form over node indices 0..count-1:
+
+    offsets     count + 1 ints; links of node i are rows offsets[i]..offsets[i+1]
+    neighbours  destination node of each link
+    link_types  LINK_* type of each link
+    weights     usage of each link
+
+Per node, links are ordered by usage (highest first) and capped at
+MAX_LINKS, so a graph always fits in the QC slots. Uses the array module
+only, no NumPy needed.
+"""
+
+import re
+from array import array
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Link types (defs.qc)
+LINK_WALK = 0
+LINK_JUMP = 1
+LINK_DROP = 2
+LINK_PLAT = 3
+LINK_TELE = 4
+LINK_ROCKETJUMP = 5
+LINK_LADDER = 6
+
+LINK_NAMES = ("walk", "jump", "drop", "plat", "tele", "rocketjump", "ladder")
+
+# movetarget, movetarget2 .. movetarget6
+MAX_LINKS = 6
+
+# SpawnSavedLink(from, to, link_type, usage) in a dump or generated .qc file
+LINK_CALL_PATTERN = re.compile(
+    r"SpawnSavedLink\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*([-\d.]+)\s*\)")
+
+# (source, destination, link type, usage)
+Edge = Tuple[int, int, int, float]
+
+
+def parse_link_calls(text: str) -> List[Edge]:
+    """Links of every SpawnSavedLink call in text, with 0-based node indices"""
+    return [(int(src) - 1, int(dst) - 1, int(link_type), float(usage))
+            for src, dst, link_type, usage in LINK_CALL_PATTERN.findall(text)]
+
+
+def combine_link_type(old: int, new: int) -> int:
+    """A special movement type sticks, as in LinkNodes"""
+    return new if old == LINK_WALK else old
+
+
+class WaypointGraph:
+    """Directed, typed, weighted links between `count` waypoints (CSR)"""
+
+    def __init__(self, count: int, offsets: array, neighbours: array, link_types: array, weights: array):
+        self.count = count
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.link_types = link_types
+        self.weights = weights
+
+    def __len__(self) -> int:
+        """Number of links"""
+        return len(self.neighbours)
+
+    @classmethod
+    def empty(cls, count: int = 0) -> 'WaypointGraph':
+        return cls.from_edges(count, ())
+
+    @classmethod
+    def from_edges(cls, count: int, edges: Iterable[Edge]) -> 'WaypointGraph':
+        """
+        Build from (src, dst, type, usage) tuples.
+
+        Links out of range or to the node itself are skipped. Repeated
+        src -> dst links are one link: usages add up and a special type wins
+        over LINK_WALK.
+        """
+        links: Dict[Tuple[int, int], List] = {}
+        for src, dst, link_type, usage in edges:
+            if src == dst or not (0 <= src < count and 0 <= dst < count):
+                continue
+            key = (src, dst)
+            if key in links:
+                link = links[key]
+                link[0] = combine_link_type(link[0], link_type)
+                link[1] += usage
+            else:
+                links[key] = [link_type, usage]
+        return cls._from_links(count, links)
+
+    @classmethod
+    def _from_links(cls, count: int, links: Dict[Tuple[int, int], List]) -> 'WaypointGraph':
+        rows: List[List[Tuple[float, int, int]]] = [[] for _ in range(count)]
+        for (src, dst), (link_type, usage) in links.items():
+            rows[src].append((usage, dst, link_type))
+
+        offsets = array('l', [0])
+        neighbours, link_types, weights = array('l'), array('b'), array('f')
+        for row in rows:
+            # Busiest first, ties by destination; the QC has MAX_LINKS slots
+            row.sort(key=lambda link: (-link[0], link[1]))
+            for usage, dst, link_type in row[:MAX_LINKS]:
+                neighbours.append(dst)
+                link_types.append(link_type)
+                weights.append(usage)
+            offsets.append(len(neighbours))
+
+        return cls(count, offsets, neighbours, link_types, weights)
+
+    def links(self, node: int) -> List[Tuple[int, int, float]]:
+        """(destination, type, usage) of a node's links"""
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return list(zip(self.neighbours[start:end], self.link_types[start:end], self.weights[start:end]))
+
+    def edges(self) -> Iterator[Edge]:
+        """Every link as (src, dst, type, usage), grouped by source"""
+        offsets, neighbours, link_types, weights = self.offsets, self.neighbours, self.link_types, self.weights
+        for src in range(self.count):
+            for row in range(offsets[src], offsets[src + 1]):
+                yield src, neighbours[row], link_types[row], weights[row]
+
+    def remap(self, placement: Sequence[int], count: int) -> 'WaypointGraph':
+        """
+        Links re-expressed over another node set.
+
+        placement[i] is the new index of node i, or -1 if it was dropped
+        (its links go with it). Nodes that land on the same index pool their
+        links; links between them disappear.
+        """
+        return WaypointGraph.from_edges(count, (
+            (placement[src], placement[dst], link_type, usage)
+            for src, dst, link_type, usage in self.edges()
+            if placement[src] >= 0 and placement[dst] >= 0))
+
+    def subset(self, kept: Sequence[int]) -> 'WaypointGraph':
+        """Links among the nodes at `kept`, renumbered in that order"""
+        placement = [-1] * self.count
+        for new, old in enumerate(kept):
+            placement[old] = new
+        return self.remap(placement, len(kept))
+
+    def update(self, newer: 'WaypointGraph', placement: Sequence[int], count: int) -> 'WaypointGraph':
+        """
+        Fold a newer session's links into this graph after a node merge.
+
+        This graph's nodes keep their indices in the merged set of `count`
+        nodes; `placement` maps the newer graph's nodes into it (see remap).
+        A link in both keeps the newer usage (the dump already carries the
+        usage loaded at map start), and a special type sticks.
+        """
+        links: Dict[Tuple[int, int], List] = {
+            (src, dst): [link_type, usage] for src, dst, link_type, usage in self.edges()}
+
+        for src, dst, link_type, usage in newer.remap(placement, count).edges():
+            key = (src, dst)
+            if key in links:
+                links[key] = [combine_link_type(links[key][0], link_type), usage]
+            else:
+                links[key] = [link_type, usage]
+
+        return WaypointGraph._from_links(count, links)
+
+    def type_counts(self) -> Dict[str, int]:
+        """Number of links of each type, by name"""
+        counts = dict.fromkeys(LINK_NAMES, 0)
+        for link_type in self.link_types:
+            if 0 <= link_type < len(LINK_NAMES):
+                counts[LINK_NAMES[link_type]] += 1
+        return counts
+
+    def qc_lines(self) -> List[str]:
+        """SpawnSavedLink calls (node numbers from 1, as in a dump)"""
+        return [f"    SpawnSavedLink({src + 1}, {dst + 1}, {link_type}, {usage:.1f});"
+                for src, dst, link_type, usage in self.edges()]
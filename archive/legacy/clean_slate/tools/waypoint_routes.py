@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Waypoint Routes for Modern Reaper Enhancements (MRE)
+Precomputed next-hop tables over the learned waypoint graph.
+
+In game, a bot that wants to reach a node floods the link graph from it
+(cacheRoute / RouteToEnemy in botroute.qc) and then scans findradius()
+results for the best entry point. build_routes() does that work offline: a
+Dijkstra search from every node over the links of a WaypointGraph gives, for
+each pair of nodes, the first link of the cheapest route between them.
+
+Each node's table is one string with a character per node of the same
+memory: the movetarget slot ('1'..'6') of the next hop towards that node,
+or '0' if there is none. Slots follow the node's link order in the graph,
+which is the order SpawnSavedLink fills them in at load time, so
+RouteNextHop() in QC finds the next node with a single substring().
+
+Link costs follow cacheRouteTarget: length divided by the usage weight,
+plus the danger of the node reached and a fixed cost per hop, with extra
+cost for links that are slow or risky to take (plats, ladders, rocket
+jumps). Uses heapq over the CSR arrays only, no NumPy needed; the work is
+about nodes x links x log(nodes), fine for graphs of a few hundred nodes.
+"""
+
+import heapq
+import math
+from typing import List, Optional, Sequence, Tuple
+
+from waypoint_graph import (LINK_DROP, LINK_JUMP, LINK_LADDER, LINK_PLAT, LINK_ROCKETJUMP, LINK_TELE,
+                            LINK_WALK, WaypointGraph)
+
+# Length multiplier per link type; walking is the baseline
+TYPE_COST = {
+    LINK_WALK: 1.0,
+    LINK_JUMP: 1.2,
+    LINK_DROP: 1.0,
+    LINK_PLAT: 1.5,         # waiting for the plat
+    LINK_TELE: 1.0,
+    LINK_ROCKETJUMP: 4.0,   # needs a rocket launcher and health to spare
+    LINK_LADDER: 1.5,
+}
+
+# Values from cacheRouteTarget in botroute.qc
+TELEPORT_LENGTH = 250.0     # a teleporter counts as this long
+USAGE_WEIGHT = 0.1          # weight = 1 + usage * USAGE_WEIGHT ...
+MAX_WEIGHT = 10.0           # ... up to this
+HOP_COST = 20.0             # KINDA_WANT, added per link
+
+# Largest memory that gets tables: each node stores one character per node,
+# read with a single fgets() and kept with strzone()
+ROUTE_NODE_LIMIT = 1000
+
+NO_ROUTE = ord('0')
+
+Vector = Tuple[float, float, float]
+
+
+def link_cost(length: float, link_type: int, usage: float, danger: float) -> float:
+    """Cost of taking one link `length` units long into a node with `danger`"""
+    if link_type == LINK_TELE:
+        length = TELEPORT_LENGTH
+    weight = min(1.0 + usage * USAGE_WEIGHT, MAX_WEIGHT)
+    return length * TYPE_COST.get(link_type, 1.0) / max(weight, 1.0) + danger + HOP_COST
+
+
+class RouteTable:
+    """Next-hop slot of every node towards every other node"""
+
+    def __init__(self, graph: WaypointGraph, hops: List[str]):
+        self.graph = graph
+        self.hops = hops
+
+    def __len__(self) -> int:
+        return len(self.hops)
+
+    def next_hop(self, src: int, dst: int) -> int:
+        """Node to go to from src on the way to dst (-1 if dst is unreachable)"""
+        slot = ord(self.hops[src][dst]) - NO_ROUTE
+        if not slot:
+            return -1
+        return self.graph.neighbours[self.graph.offsets[src] + slot - 1]
+
+    def path(self, src: int, dst: int) -> List[int]:
+        """Nodes visited following the table from src to dst (empty if unreachable)"""
+        nodes = [src]
+        while nodes[-1] != dst:
+            hop = self.next_hop(nodes[-1], dst)
+            if hop < 0:
+                return []
+            nodes.append(hop)
+        return nodes
+
+    def connected(self) -> float:
+        """Share of ordered node pairs with a route"""
+        count = len(self.hops)
+        if count < 2:
+            return 1.0
+        routes = sum(count - row.count('0') for row in self.hops)
+        return routes / (count * (count - 1))
+
+    def qc_lines(self) -> List[str]:
+        """SpawnSavedRoutes calls (node numbers from 1, as SpawnSavedLink)"""
+        return [f'    SpawnSavedRoutes({node + 1}, "{row}");' for node, row in enumerate(self.hops)]
+
+
+def build_routes(graph: WaypointGraph, origins: Sequence[Vector],
+                 danger: Sequence[float]) -> Optional[RouteTable]:
+    """
+    All-pairs next hops over graph, whose nodes are at origins.
+
+    Returns None when the graph has no links or more than ROUTE_NODE_LIMIT
+    nodes.
+    """
+    count = graph.count
+    if not len(graph) or count > ROUTE_NODE_LIMIT:
+        return None
+
+    offsets, neighbours = graph.offsets, graph.neighbours
+    costs = []
+    for src, dst, link_type, usage in graph.edges():
+        (sx, sy, sz), (dx, dy, dz) = origins[src], origins[dst]
+        length = math.sqrt((dx - sx) ** 2 + (dy - sy) ** 2 + (dz - sz) ** 2)
+        costs.append(link_cost(length, link_type, usage, danger[dst]))
+
+    hops = []
+    for src in range(count):
+        if offsets[src] == offsets[src + 1]:
+            hops.append('0' * count)  # no way out
+        else:
+            hops.append(_first_hops(src, count, offsets, neighbours, costs).decode('ascii'))
+    return RouteTable(graph, hops)
+
+
+def _first_hops(src: int, count: int, offsets, neighbours, costs) -> bytearray:
+    """Dijkstra from src, carrying the slot of the first link along each route"""
+    dist = [math.inf] * count
+    dist[src] = 0.0
+    slot = bytearray(b'0' * count)
+    done = bytearray(count)
+    done[src] = 1
+
+    heap = []
+    for row in range(offsets[src], offsets[src + 1]):
+        dst = neighbours[row]
+        if costs[row] < dist[dst]:
+            dist[dst] = costs[row]
+            slot[dst] = NO_ROUTE + 1 + row - offsets[src]
+            heap.append((costs[row], dst))
+    heapq.heapify(heap)
+
+    while heap:
+        d, node = heapq.heappop(heap)
+        if done[node]:
+            continue
+        done[node] = 1
+        first = slot[node]
+        for row in range(offsets[node], offsets[node + 1]):
+            dst = neighbours[row]
+            cost = d + costs[row]
+            if cost < dist[dst]:
+                dist[dst] = cost
+                slot[dst] = first
+                heapq.heappush(heap, (cost, dst))
+
+    return slot
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Waypoint Table for Modern Reaper Enhancements (MRE)
+Columnar, NumPy-backed waypoint sets for the bot memory pipeline.
+
+A WaypointTable holds one array per field instead of one WaypointNode object
+per waypoint, so merge, optimize, statistics and QC generation run as array
+operations. NumPy is optional: bot_memory_manager.py only uses this module
+when NumPy is installed and falls back to its list-of-nodes code otherwise.
+
+Semantics match the list code exactly (same merge rules as
+SpatialMergeIndex.merge, same stable sort orders, same QC text), with two
+storage differences: origins are float32 and last_updated is kept as epoch
+seconds (converted to/from ISO strings at the JSON boundary).
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from waypoint_data import NODE_FORMAT
+
+# Merge weights, matching BotMemoryManager._combine_nodes
+WEIGHT_OLD = 0.6
+WEIGHT_NEW = 0.4
+
+# Cell key packing: each axis gets 21 bits, enough for any Quake map
+_KEY_BITS = 21
+_KEY_BIAS = 1 << (_KEY_BITS - 1)
+
+# Rows per vectorised block in radius queries and QC/data formatting
+QUERY_CHUNK = 16384
+
+
+# Corner offsets of the 2x2x2 probe block, scaled per axis by the query's side
+_PROBE_CORNERS = (np.array([(dx, dy, dz) for dx in (0, 1) for dy in (0, 1) for dz in (0, 1)])
+                  if np is not None else None)
+
+
+def available() -> bool:
+    """True when NumPy is installed and tables can be used"""
+    return np is not None
+
+
+class WaypointTable:
+    """
+    Struct-of-arrays waypoint set.
+
+    Columns (all length N):
+        origins        float32 (N, 3)
+        traffic        float64
+        danger         float64
+        sessions_seen  int32
+        updated        float64 epoch seconds
+    """
+
+    def __init__(self, origins, traffic, danger, sessions_seen, updated):
+        self.origins = np.asarray(origins, dtype=np.float32).reshape(-1, 3)
+        self.traffic = np.asarray(traffic, dtype=np.float64)
+        self.danger = np.asarray(danger, dtype=np.float64)
+        self.sessions_seen = np.asarray(sessions_seen, dtype=np.int32)
+        self.updated = np.asarray(updated, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.traffic)
+
+    # ------------------------------------------------------------------
+    # Conversion
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_nodes(cls, nodes) -> 'WaypointTable':
+        """Build a table from WaypointNode objects"""
+        count = len(nodes)
+        return cls(
+            np.array([n.origin for n in nodes], dtype=np.float32).reshape(count, 3),
+            np.fromiter((n.traffic_score for n in nodes), dtype=np.float64, count=count),
+            np.fromiter((n.danger_scent for n in nodes), dtype=np.float64, count=count),
+            np.fromiter((n.sessions_seen for n in nodes), dtype=np.int32, count=count),
+            np.fromiter((_to_epoch(n.last_updated) for n in nodes), dtype=np.float64, count=count),
+        )
+
+    @classmethod
+    def from_dicts(cls, records: List[dict]) -> 'WaypointTable':
+        """Build a table from the node dicts stored in a memory JSON file"""
+        count = len(records)
+        return cls(
+            np.array([r['origin'] for r in records], dtype=np.float32).reshape(count, 3),
+            np.fromiter((r['traffic_score'] for r in records), dtype=np.float64, count=count),
+            np.fromiter((r['danger_scent'] for r in records), dtype=np.float64, count=count),
+            np.fromiter((r.get('sessions_seen', 1) for r in records), dtype=np.int32, count=count),
+            np.fromiter((_to_epoch(r['last_updated']) for r in records), dtype=np.float64, count=count),
+        )
+
+    def to_dicts(self) -> List[dict]:
+        """Node dicts in the memory JSON layout (same keys as asdict(WaypointNode))"""
+        iso_cache: Dict[float, str] = {}
+        records = []
+        for origin, traffic, danger, sessions, updated in zip(
+                self.origin_list(), self.traffic.tolist(), self.danger.tolist(),
+                self.sessions_seen.tolist(), self.updated.tolist()):
+            iso = iso_cache.get(updated)
+            if iso is None:
+                iso = iso_cache[updated] = datetime.fromtimestamp(updated).isoformat()
+            records.append({
+                'origin': origin,
+                'traffic_score': traffic,
+                'danger_scent': danger,
+                'last_updated': iso,
+                'sessions_seen': sessions,
+            })
+        return records
+
+    def to_nodes(self, node_type):
+        """WaypointNode objects (node_type is the WaypointNode class)"""
+        return [node_type(origin=tuple(r['origin']), traffic_score=r['traffic_score'],
+                          danger_scent=r['danger_scent'], last_updated=r['last_updated'],
+                          sessions_seen=r['sessions_seen'])
+                for r in self.to_dicts()]
+
+    def origin_list(self) -> List[List[float]]:
+        """Origins as Python floats (see _exact_origins)"""
+        return _exact_origins(self.origins).tolist()
+
+    def take(self, indices) -> 'WaypointTable':
+        """Rows at indices (integer array or boolean mask)"""
+        return WaypointTable(self.origins[indices], self.traffic[indices], self.danger[indices],
+                             self.sessions_seen[indices], self.updated[indices])
+
+    # ------------------------------------------------------------------
+    # Pipeline stages
+    # ------------------------------------------------------------------
+
+    def merge(self, new: 'WaypointTable', radius: float,
+              now: Optional[float] = None) -> Tuple['WaypointTable', Dict[str, int], 'np.ndarray']:
+        """
+        Vectorised SpatialMergeIndex.merge with self as the old nodes.
+
+        Returns (merged table, stats, placement) where stats has merged/
+        inserted/duplicates counts and placement the merged row of each new
+        node (as SpatialMergeIndex.placement).
+        """
+        now = datetime.now().timestamp() if now is None else now
+        stats = {'merged': 0, 'inserted': 0, 'duplicates': 0}
+
+        # Nearest old node within radius for every new node
+        query, target, dist_sq = _radius_pairs(self.origins, new.origins, radius)
+        match = np.full(len(new), -1, dtype=np.int64)
+        match_dist = np.full(len(new), np.inf)
+        if len(query):
+            # Per query: smallest distance, ties to the lowest old index
+            order = np.lexsort((target, dist_sq, query))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = query[order][1:] != query[order][:-1]
+            best = order[first]
+            match[query[best]] = target[best]
+            match_dist[query[best]] = dist_sq[best]
+
+        # Per claimed old node: the closest new node wins, ties to input order
+        matched = np.flatnonzero(match >= 0)
+        claim_order = matched[np.lexsort((matched, match_dist[matched], match[matched]))]
+        winner = np.ones(len(claim_order), dtype=bool)
+        winner[1:] = match[claim_order][1:] != match[claim_order][:-1]
+        winners = claim_order[winner]
+        stats['merged'] = int(len(winners))
+        stats['duplicates'] += int(len(claim_order) - len(winners))
+
+        # Unmatched new nodes, minus those near an earlier inserted one
+        unmatched = np.flatnonzero(match < 0)
+        keep = _greedy_unique(new.origins[unmatched], radius)
+        inserted = unmatched[keep]
+        stats['inserted'] = int(len(inserted))
+        stats['duplicates'] += int(len(unmatched) - len(inserted))
+
+        placement = match.copy()
+        placement[inserted] = len(self) + np.arange(len(inserted))
+        dropped = unmatched[~keep]
+        if len(dropped):
+            placement[dropped] = _earlier_nearest(new.origins, inserted, dropped, radius, len(self))
+
+        origins = self.origins.copy()
+        traffic = self.traffic.copy()
+        danger = self.danger.copy()
+        sessions = self.sessions_seen.copy()
+        updated = self.updated.copy()
+
+        old_rows = match[winners]
+        origins[old_rows] = new.origins[winners]  # Use more recent position
+        traffic[old_rows] = traffic[old_rows] * WEIGHT_OLD + new.traffic[winners] * WEIGHT_NEW
+        danger[old_rows] = danger[old_rows] * WEIGHT_OLD + new.danger[winners] * WEIGHT_NEW
+        sessions[old_rows] += 1
+        updated[old_rows] = now
+
+        added = new.take(inserted)
+        merged = WaypointTable(
+            np.concatenate([origins, added.origins]),
+            np.concatenate([traffic, added.traffic]),
+            np.concatenate([danger, added.danger]),
+            np.concatenate([sessions, added.sessions_seen]),
+            np.concatenate([updated, added.updated]),
+        )
+        return merged, stats, placement
+
+    def optimize(self, min_traffic: float, min_danger: float) -> Tuple['WaypointTable', 'np.ndarray']:
+        """Drop low-value rows and normalise scores to 0-100; returns (table, kept rows)"""
+        kept = np.flatnonzero((self.traffic >= min_traffic) | (self.danger >= min_danger))
+        table = self.take(kept)
+
+        if len(table):
+            max_traffic = table.traffic.max()
+            max_danger = table.danger.max()
+            if max_traffic > 0:
+                table.traffic = (table.traffic / max_traffic) * 100
+            if max_danger > 0:
+                table.danger = (table.danger / max_danger) * 100
+
+        return table, kept
+
+    def ranked(self, column: str) -> 'np.ndarray':
+        """Row indices by descending column value (stable, like sorted(reverse=True))"""
+        values = getattr(self, column)
+        return np.argsort(-values, kind='stable')
+
+    def traffic_order(self) -> 'np.ndarray':
+        """Row indices by descending traffic, ties by origin (as BotMemoryManager._traffic_order)"""
+        origins = _exact_origins(self.origins)
+        return np.lexsort((origins[:, 2], origins[:, 1], origins[:, 0], -self.traffic))
+
+    def qc_lines(self, indices) -> List[str]:
+        """
+        SpawnSavedWaypoint lines for the given rows, in order.
+
+        Each block of rows is formatted with one %-operation. Origins have one
+        decimal (see _exact_origins), so %.1f prints them exactly as str()
+        does in WaypointNode.to_qc().
+        """
+        lines = []
+        for start in range(0, len(indices), QUERY_CHUNK):
+            rows = indices[start:start + QUERY_CHUNK]
+            columns = np.column_stack([_exact_origins(self.origins[rows]),
+                                       self.traffic[rows], self.danger[rows]])
+            template = "    SpawnSavedWaypoint('%.1f %.1f %.1f', %.1f, %.1f);\n" * len(columns)
+            lines.extend((template % tuple(columns.ravel().tolist())).splitlines())
+        return lines
+
+    def data_text(self, indices) -> List[str]:
+        """Runtime data file text (see waypoint_data) for the given rows, in blocks"""
+        blocks = []
+        for start in range(0, len(indices), QUERY_CHUNK):
+            rows = indices[start:start + QUERY_CHUNK]
+            columns = np.column_stack([_exact_origins(self.origins[rows]),
+                                       self.traffic[rows], self.danger[rows]])
+            blocks.append(NODE_FORMAT * len(columns) % tuple(columns.ravel().tolist()))
+        return blocks
+
+
+def _to_epoch(iso: str) -> float:
+    return datetime.fromisoformat(iso).timestamp()
+
+
+def _exact_origins(origins):
+    """
+    float64 copies of float32 origins.
+
+    Dumped origins come from vtos() and have one decimal; rounding back to
+    one decimal restores the exact numbers (and their str() form) that the
+    list-of-nodes code carries around, so distances and QC text match it.
+    """
+    return np.round(origins.astype(np.float64), 1)
+
+
+def _pack(cells):
+    """Packed int64 key per (..., 3) array of integer cell coordinates"""
+    shifted = cells + _KEY_BIAS
+    return (shifted[..., 0] << (2 * _KEY_BITS)) | (shifted[..., 1] << _KEY_BITS) | shifted[..., 2]
+
+
+def _radius_pairs(points, queries, radius: float):
+    """
+    All (query, point) pairs closer than radius, using the same 2r-cell,
+    8-probe layout as SpatialMergeIndex.
+
+    Queries are processed in chunks of QUERY_CHUNK so temporaries stay
+    small on very large tables.
+
+    Returns (query index, point index, squared distance) arrays.
+    """
+    results = []
+    if len(points) and len(queries):
+        points = _exact_origins(points)
+        cell_size = radius * 2
+        point_keys = _pack(np.floor(points / cell_size).astype(np.int64))
+        order = np.argsort(point_keys, kind='stable')
+        sorted_keys = point_keys[order]
+
+        for start in range(0, len(queries), QUERY_CHUNK):
+            chunk = _exact_origins(queries[start:start + QUERY_CHUNK])
+            query, target, dist_sq = _probe(points, order, sorted_keys, chunk, cell_size, radius)
+            results.append((query + start, target, dist_sq))
+
+    if not results:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    return tuple(np.concatenate(column) for column in zip(*results))
+
+
+def _probe(points, order, sorted_keys, queries, cell_size: float, radius: float):
+    """_radius_pairs for one chunk of queries"""
+    # The 2x2x2 block of cells each query sphere can touch
+    scaled = queries / cell_size
+    cells = np.floor(scaled).astype(np.int64)
+    side = np.where(scaled - cells < 0.5, -1, 1)
+    probe_keys = _pack(cells[:, None, :] + side[:, None, :] * _PROBE_CORNERS)  # (Q, 8)
+
+    lo = np.searchsorted(sorted_keys, probe_keys, side='left').ravel()
+    hi = np.searchsorted(sorted_keys, probe_keys, side='right').ravel()
+    counts = hi - lo
+    total = int(counts.sum())
+
+    # Expand every probe's [lo, hi) range into candidate pairs
+    query = np.repeat(np.arange(len(queries)).repeat(8), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    target = order[np.repeat(lo, counts) + offsets]
+
+    delta = points[target] - queries[query]
+    dist_sq = np.einsum('ij,ij->i', delta, delta)
+    close = dist_sq <= radius * radius
+    return query[close], target[close], dist_sq[close]
+
+
+def _earlier_nearest(points, inserted, dropped, radius: float, base: int):
+    """
+    Merged row each dropped duplicate is folded into: the nearest inserted
+    point before it in input order (ties to the lower index), like
+    SpatialMergeIndex.nearest at the time the duplicate is met.
+    """
+    query, target, dist_sq = _radius_pairs(points[inserted], points[dropped], radius)
+    earlier = inserted[target] < dropped[query]
+    query, target, dist_sq = query[earlier], target[earlier], dist_sq[earlier]
+
+    order = np.lexsort((target, dist_sq, query))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = query[order][1:] != query[order][:-1]
+    best = order[first]
+
+    rows = np.full(len(dropped), -1, dtype=np.int64)
+    rows[query[best]] = base + target[best]
+    return rows
+
+
+def _greedy_unique(points, radius: float):
+    """
+    Mask of points kept when each point is dropped if it lies within radius
+    of an earlier kept point (input order).
+
+    Only points with an earlier neighbour are decided in a Python loop;
+    isolated points are kept without one.
+    """
+    keep = np.ones(len(points), dtype=bool)
+    query, target, _ = _radius_pairs(points, points, radius)
+    earlier = target < query
+    if not earlier.any():
+        return keep
+
+    query, target = query[earlier], target[earlier]
+    order = np.lexsort((target, query))
+    neighbours: Dict[int, List[int]] = {}
+    for q, t in zip(query[order].tolist(), target[order].tolist()):
+        neighbours.setdefault(q, []).append(t)
+
+    for q in sorted(neighbours):
+        if any(keep[t] for t in neighbours[q]):
+            keep[q] = False
+
+    return keep